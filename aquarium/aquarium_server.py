@@ -8,18 +8,27 @@ Vidíš:
 - Historie rozhodnutí
 """
 
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, HTTPException, WebSocket
 from fastapi.responses import HTMLResponse
 from typing import Dict, List
 import json
+import os
 from datetime import datetime
 import asyncio
 
+from core import tracing
+
 app = FastAPI(title="Lucy Aquarium")
 
 # Active agents state
 active_agents: Dict[str, Dict] = {}
 agent_history: List[Dict] = []
+evaluation_history: List[Dict] = []
+MAX_EVALUATIONS = 500
+
+# Span files written by Lucy services (shared volume), comma-separated
+TRACE_FILES = [p for p in os.getenv("LUCY_TRACE_FILES", tracing.TRACE_FILE or "").split(",") if p]
+TRACE_SCAN_LINES = 20000  # Tail of each file scanned for /traces
 
 @app.get("/")
 async def aquarium_ui():
@@ -350,6 +359,70 @@ async def agent_status(agent_id: str, status: Dict):
     
     return {"ok": True}
 
+# Background evaluations from the orchestrator (LUCY_EVAL_MODE async/auto)
+@app.post("/evaluation")
+async def evaluation_result(entry: Dict):
+    """Orchestrator delivers an off-critical-path evaluation"""
+    
+    evaluation = entry.get("evaluation", {})
+    evaluation_history.append(entry)
+    del evaluation_history[:-MAX_EVALUATIONS]
+    
+    agent_history.append({
+        "timestamp": datetime.now().strftime("%H:%M:%S"),
+        "agent": ", ".join(entry.get("agents", [])) or "evaluator",
+        "action": f"Evaluated {entry.get('request_id', '')[:8]}: {evaluation.get('quality_score', 0):.2f}"
+                  + (" ⚠️ needs refinement" if entry.get("needs_refinement") else "")
+    })
+    
+    return {"ok": True}
+
+@app.get("/evaluations")
+async def recent_evaluations(limit: int = 50):
+    """Latest background evaluations, newest first"""
+    return list(reversed(evaluation_history[-limit:]))
+
+# Distributed traces (core/tracing.py JSONL spans)
+@app.get("/traces")
+async def slowest_traces(limit: int = 20):
+    """Slowest recent requests (root spans from the tail of the span files)"""
+    
+    # File IO off the event loop; partially written lines are skipped
+    spans = await asyncio.to_thread(tracing.read_spans, TRACE_FILES, TRACE_SCAN_LINES)
+    
+    # Roots: no parent, or the parent lives outside the scanned spans (remote caller)
+    ids = {s["span_id"] for s in spans}
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    roots.sort(key=lambda s: s["duration_ms"] or 0, reverse=True)
+    return [
+        {
+            "trace_id": s["trace_id"],
+            "service": s["service"],
+            "name": s["name"],
+            "duration_ms": s["duration_ms"],
+            "status": s["status"],
+            "started": datetime.fromtimestamp(s["start"]).strftime("%H:%M:%S")
+        }
+        for s in roots[:limit]
+    ]
+
+@app.get("/traces/{trace_id}")
+async def trace_detail(trace_id: str):
+    """All spans of one request plus its critical path (where the time went)"""
+    
+    spans = await asyncio.to_thread(tracing.load_trace, trace_id, TRACE_FILES)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    
+    path = tracing.critical_path(spans)
+    return {
+        "trace_id": trace_id,
+        "duration_ms": path[0]["duration_ms"] if path else None,
+        "services": sorted({s["service"] for s in spans}),
+        "critical_path": path,
+        "spans": spans
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8081)
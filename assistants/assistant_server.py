@@ -16,13 +16,21 @@ CAPABILITIES:
 """
 
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+import asyncio
 import httpx
 import os
 from datetime import datetime
 
+from core.deadline import DeadlineMiddleware
+from core.tracing import TracingMiddleware
+from core.sse import SSE_HEADERS, chunk_text, sse_event
+
 app = FastAPI(title="Lucy Communications")
+app.add_middleware(DeadlineMiddleware)  # Honors the caller's X-Lucy-Deadline-Ms
+app.add_middleware(TracingMiddleware, service=os.getenv("LUCY_SERVICE", "communications"))  # Continues the caller's traceparent
 
 # Configuration
 QDRANT_HOST = os.getenv("QDRANT_HOST", "192.168.1.129:6333")
@@ -49,6 +57,14 @@ class QueryResponse(BaseModel):
     sources: List[Dict]
     reasoning: str
 
+class BatchQueryItem(BaseModel):
+    id: str
+    query: str
+    context: Optional[Dict] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[BatchQueryItem]
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "assistant": "communications"}
@@ -80,6 +96,46 @@ async def query(request: QueryRequest) -> QueryResponse:
     # Default: search both emails + messages
     return await handle_general_query(request.query, request.context)
 
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Streaming variant of /query (SSE)
+
+    Events: delta {text} while the answer is produced, then done
+    {confidence, sources, reasoning}. Handlers are still placeholders, so
+    the finished answer is chunked; an LLM-backed handler yields its
+    tokens here instead.
+    """
+
+    async def events():
+        try:
+            result = await query(request)
+            for text in chunk_text(result.response):
+                yield sse_event("delta", {"text": text})
+            yield sse_event("done", result.dict(exclude={"response"}))
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest):
+    """
+    Batched /query (orchestrator's /query/batch sends one call per chunk)
+
+    Items run concurrently; a failing item returns {id, error} instead of
+    failing the batch. Results keep request order.
+    """
+
+    async def one(item: BatchQueryItem) -> Dict:
+        try:
+            result = await query(QueryRequest(query=item.query, context=item.context))
+            return {"id": item.id, **result.model_dump()}
+        except Exception as e:
+            return {"id": item.id, "error": str(e)}
+
+    return {"results": await asyncio.gather(*(one(item) for item in request.queries))}
+
 async def handle_email_query(query: str, context: Optional[Dict]) -> QueryResponse:
     """Query emails from Qdrant + Notion"""
     
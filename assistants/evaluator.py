@@ -20,7 +20,12 @@ from typing import List, Dict, Optional
 import httpx
 import os
 
+from core.deadline import DeadlineMiddleware
+from core.tracing import TracingMiddleware
+
 app = FastAPI(title="Lucy Evaluator")
+app.add_middleware(DeadlineMiddleware)  # Honors the caller's X-Lucy-Deadline-Ms
+app.add_middleware(TracingMiddleware, service="evaluator")  # Continues the caller's traceparent
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
@@ -27,6 +27,9 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from core import deadline, tracing
+from core.keyword_router import get_keyword_router
+
 class AgentDomain(Enum):
     COMMUNICATIONS = "communications"
     KNOWLEDGE = "knowledge"
@@ -66,44 +69,14 @@ class AgentCollaborationProtocol:
         Routing logic - který agent(i) by měli odpovídat
         
         Může být více agentů najednou pro komplexní query:
-        - "Show me emails about Qdrant docs" → Communications + Knowledge
+        - "Show me emails about Qdrant docs" → Communications + Knowledge + Data
         - "Create N8N workflow for Linear updates" → Content + Projects
         """
         
-        agents = []
-        query_lower = query.lower()
-        
-        # Email/messaging keywords
-        if any(kw in query_lower for kw in ["email", "message", "chat", "conversation"]):
-            agents.append(AgentDomain.COMMUNICATIONS)
-        
-        # Tech docs keywords
-        if any(kw in query_lower for kw in ["docs", "documentation", "how to", "api", "tutorial"]):
-            agents.append(AgentDomain.KNOWLEDGE)
-        
-        # Project management
-        if any(kw in query_lower for kw in ["linear", "github", "project", "issue", "pr", "pull request"]):
-            agents.append(AgentDomain.PROJECTS)
-        
-        # Automation
-        if any(kw in query_lower for kw in ["n8n", "workflow", "automation", "trigger"]):
-            agents.append(AgentDomain.CONTENT)
-        
-        # Database/data
-        if any(kw in query_lower for kw in ["qdrant", "supabase", "database", "query", "data"]):
-            agents.append(AgentDomain.DATA)
-        
-        # Development
-        if any(kw in query_lower for kw in ["code", "vscode", "docker", "deploy", "build"]):
-            agents.append(AgentDomain.DEV)
-        
-        # Business
-        if any(kw in query_lower for kw in ["invoice", "revenue", "finance", "business"]):
-            agents.append(AgentDomain.BUSINESS)
-        
-        # Personal
-        if any(kw in query_lower for kw in ["schedule", "reminder", "personal", "todo"]):
-            agents.append(AgentDomain.PERSONAL)
+        # Shared single-pass router compiled from ROUTING_RULES
+        known = {agent.value for agent in AgentDomain}
+        agents = [AgentDomain(domain.value) for domain in get_keyword_router().domains(query)
+                  if domain.value in known]
         
         # Default: Knowledge (fallback)
         if not agents:
@@ -133,20 +106,34 @@ class AgentCollaborationProtocol:
         
         import httpx
         
-        async with httpx.AsyncClient() as client:
-            eval_response = await client.post(
-                f"{evaluator_url}/evaluate",
-                json={
-                    "query": query,
-                    "response": response.response,
-                    "agent": response.agent,
-                    "sources": response.sources,
-                    "confidence": response.confidence
-                },
-                timeout=30.0
+        try:
+            # Keep a little budget to return the answer itself
+            budget = deadline.timeout(30.0, reserve=deadline.EVALUATION_RESERVE_SECONDS)
+        except deadline.DeadlineExceeded:
+            return EvaluationResult(
+                quality_score=0.7,
+                passed=False,
+                issues=[],
+                suggestions=[],
+                evaluator_reasoning="Not evaluated - request deadline reached"
             )
-            
-            result = eval_response.json()
+        
+        with tracing.span("call evaluator", upstream="evaluator", kind="client"):
+            async with httpx.AsyncClient() as client:
+                eval_response = await client.post(
+                    f"{evaluator_url}/evaluate",
+                    json={
+                        "query": query,
+                        "response": response.response,
+                        "agent": response.agent,
+                        "sources": response.sources,
+                        "confidence": response.confidence
+                    },
+                    headers={**deadline.headers(), **tracing.headers()},
+                    timeout=budget
+                )
+                
+                result = eval_response.json()
         
         return EvaluationResult(
             quality_score=result["quality_score"],
@@ -184,13 +171,20 @@ class AgentCollaborationProtocol:
             if not url:
                 return None
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{url}/query",
-                    json={"query": query},
-                    timeout=60.0
-                )
-                data = response.json()
+            try:
+                budget = deadline.timeout(60.0)
+            except deadline.DeadlineExceeded:
+                return None  # Budget spent - skip the agent
+            
+            with tracing.span(f"call {agent.value}", upstream=agent.value, kind="client"):
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(
+                        f"{url}/query",
+                        json={"query": query},
+                        headers={**deadline.headers(), **tracing.headers()},
+                        timeout=budget
+                    )
+                    data = response.json()
             
             return AgentResponse(
                 agent=agent.value,
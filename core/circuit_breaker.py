@@ -0,0 +1,146 @@
+"""
+Lucy Circuit Breaker - fail fast on assistants that are down
+
+Without a breaker every call to a dead assistant container waits for
+connect/timeout (up to 60s) and multi-agent queries wait for the slowest
+failure. Per assistant, the breaker tracks a sliding window of outcomes:
+
+- closed:    calls pass; opens when the window's failure rate (slow calls
+             count as failures) reaches the threshold, or after
+             consecutive failures
+- open:      calls are rejected instantly until open_seconds pass
+- half_open: a limited number of probe calls pass; success closes the
+             circuit, failure re-opens it
+
+Configuration (env):
+    LUCY_BREAKER_WINDOW        outcomes tracked (default 20)
+    LUCY_BREAKER_MIN_CALLS     calls before the rate applies (default 5)
+    LUCY_BREAKER_FAILURE_RATE  failure rate that opens (default 0.5)
+    LUCY_BREAKER_CONSECUTIVE   consecutive failures that open (default 3)
+    LUCY_BREAKER_SLOW_MS       latency counted as failure (default 20000)
+    LUCY_BREAKER_OPEN_SECONDS  open time before a probe (default 30)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+BREAKER_WINDOW = int(os.getenv("LUCY_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("LUCY_BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("LUCY_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_CONSECUTIVE = int(os.getenv("LUCY_BREAKER_CONSECUTIVE", "3"))
+BREAKER_SLOW_MS = float(os.getenv("LUCY_BREAKER_SLOW_MS", "20000"))
+BREAKER_OPEN_SECONDS = float(os.getenv("LUCY_BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Sliding-window breaker for one upstream"""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        consecutive: int = BREAKER_CONSECUTIVE,
+        slow_ms: float = BREAKER_SLOW_MS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_calls: int = 1
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.consecutive = consecutive
+        self.slow_ms = slow_ms
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        self._outcomes: deque = deque(maxlen=window)    # (failed, latency_ms)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """May a call go through now? (half-open: reserves a probe slot)"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state, self._probes = HALF_OPEN, 0
+
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+
+            self.calls += 1
+            return True
+
+    def record(self, ok: bool, latency_ms: float):
+        """Outcome of an allowed call"""
+        failed = not ok or latency_ms >= self.slow_ms
+
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._consecutive_failures = 0
+                self._outcomes.append((failed, latency_ms))
+                return
+
+            self._outcomes.append((failed, latency_ms))
+            self._consecutive_failures = self._consecutive_failures + 1 if failed else 0
+
+            if self.state == CLOSED and (
+                self._consecutive_failures >= self.consecutive
+                or (len(self._outcomes) >= self.min_calls and self._failure_rate() >= self.failure_rate)
+            ):
+                self._open()
+
+    def release(self):
+        """Allowed call was cancelled without an outcome (frees a probe slot)"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._consecutive_failures = 0
+        self.opened += 1
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for failed, _ in self._outcomes if failed) / len(self._outcomes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = [latency for _, latency in self._outcomes]
+            retry_in = self.open_seconds - (time.monotonic() - self._opened_at)
+            return {
+                "state": self.state,
+                "failure_rate": round(self._failure_rate(), 3),
+                "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+                "window_calls": len(self._outcomes),
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "opened": self.opened,
+                **({"retry_in_seconds": round(max(0.0, retry_in), 1)} if self.state == OPEN else {})
+            }
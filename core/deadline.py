@@ -0,0 +1,144 @@
+"""
+Lucy Deadlines - one overall budget per request, propagated downstream
+
+Hard-coded per-hop timeouts (60s assistant, 30s evaluator, 60s voice)
+stacked to 90s+ before a voice query failed. Instead each entry point
+sets a budget (voice much tighter than chat), the remaining budget
+travels in the X-Lucy-Deadline-Ms header, and every hop derives its
+timeout from what is left and gives up early once it is spent.
+
+The deadline lives in a contextvar: it follows the request through
+awaits, asyncio.to_thread and copy_context().run() in worker threads.
+
+Budgets (env, milliseconds):
+    LUCY_DEADLINE_CHAT_MS      /query (default 30000)
+    LUCY_DEADLINE_STREAM_MS    /query/stream (default 60000)
+    LUCY_DEADLINE_BRIEFING_MS  /briefing (default 45000)
+    LUCY_DEADLINE_BATCH_MS     /query/batch, whole batch (default 120000)
+    LUCY_DEADLINE_VOICE_MS     voice server, incl. STT/TTS (default 8000)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Mapping, Optional
+
+DEADLINE_HEADER = "X-Lucy-Deadline-Ms"
+MAX_BUDGET_MS = 120_000
+EVALUATION_RESERVE_SECONDS = 0.5  # Budget kept back to return the answer after evaluation
+
+BUDGETS_MS = {
+    "chat": float(os.getenv("LUCY_DEADLINE_CHAT_MS", "30000")),
+    "stream": float(os.getenv("LUCY_DEADLINE_STREAM_MS", "60000")),
+    "briefing": float(os.getenv("LUCY_DEADLINE_BRIEFING_MS", "45000")),
+    "batch": float(os.getenv("LUCY_DEADLINE_BATCH_MS", "120000")),
+    "voice": float(os.getenv("LUCY_DEADLINE_VOICE_MS", "8000"))
+}
+
+_deadline: ContextVar[Optional[float]] = ContextVar("lucy_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Request budget spent"""
+
+
+def start(budget_ms: float) -> Token:
+    """Set the deadline for the current context (never extends a tighter one)"""
+    deadline = time.monotonic() + budget_ms / 1000.0
+    current = _deadline.get()
+    return _deadline.set(deadline if current is None else min(current, deadline))
+
+
+def reset(token: Token):
+    _deadline.reset(token)
+
+
+@contextmanager
+def scope(budget_ms: float):
+    """Deadline for a block"""
+    token = start(budget_ms)
+    try:
+        yield
+    finally:
+        reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left (None = no deadline; may be negative)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(what: str = "request"):
+    """Raise DeadlineExceeded if the budget is spent"""
+    if expired():
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def timeout(cap: Optional[float] = None, reserve: float = 0.0) -> Optional[float]:
+    """
+    Timeout for the next hop: remaining budget (minus reserve) capped at `cap`
+
+    Without a deadline returns `cap`. Raises DeadlineExceeded when nothing
+    is left, so callers skip the hop instead of sending a doomed request.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    left -= reserve
+    if left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+    return left if cap is None else min(cap, left)
+
+
+def headers() -> Dict[str, str]:
+    """Propagation header with the remaining budget ({} without a deadline)"""
+    left = remaining()
+    if left is None:
+        return {}
+    return {DEADLINE_HEADER: str(max(0, int(left * 1000)))}
+
+
+def budget_from_headers(request_headers: Mapping[str, str], default_ms: Optional[float]) -> Optional[float]:
+    """Budget in ms from an incoming header (lowercase keys), else the entry point default"""
+    value = request_headers.get(DEADLINE_HEADER.lower())
+    if value is not None:
+        try:
+            return min(max(0.0, float(value)), MAX_BUDGET_MS)
+        except ValueError:
+            pass
+    return default_ms
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware: start each request's deadline
+
+    Uses the X-Lucy-Deadline-Ms header when the caller sent one, else the
+    budget configured for the path (paths not listed get no deadline).
+    """
+
+    def __init__(self, app, budgets: Optional[Dict[str, float]] = None):
+        self.app = app
+        self.budgets = budgets or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        budget = budget_from_headers(request_headers, self.budgets.get(scope["path"]))
+        if budget is None:
+            return await self.app(scope, receive, send)
+
+        token = start(budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset(token)
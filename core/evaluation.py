@@ -0,0 +1,143 @@
+"""
+Lucy Evaluation - synchronous or off-critical-path quality checks
+
+/query waited for the evaluator on every response although
+needs_refinement is only advisory. The policy keeps evaluation on the
+critical path only where it matters (low-confidence answers, sensitive
+domains); everything else returns immediately and is evaluated in the
+background. Background results land in the EvaluationStore (GET
+/evaluation/{request_id}), as a follow-up SSE event, and in the aquarium.
+
+Configuration (env):
+    LUCY_EVAL_MODE             auto | sync | async (default auto)
+    LUCY_EVAL_SYNC_CONFIDENCE  below this confidence evaluate synchronously (default 0.6)
+    LUCY_EVAL_SYNC_DOMAINS     comma-separated domains always evaluated synchronously (default business)
+    LUCY_EVAL_RESULTS          evaluation results kept (default 1024)
+    LUCY_EVAL_RESULT_TTL       seconds a result stays available (default 3600)
+    AQUARIUM_URL               deliver background results to the aquarium (unset = off)
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from core.ttl_cache import TTLCache
+
+EVAL_MODE = os.getenv("LUCY_EVAL_MODE", "auto")
+EVAL_SYNC_CONFIDENCE = float(os.getenv("LUCY_EVAL_SYNC_CONFIDENCE", "0.6"))
+EVAL_SYNC_DOMAINS = [d.strip() for d in os.getenv("LUCY_EVAL_SYNC_DOMAINS", "business").split(",") if d.strip()]
+EVAL_RESULTS = int(os.getenv("LUCY_EVAL_RESULTS", "1024"))
+EVAL_RESULT_TTL = float(os.getenv("LUCY_EVAL_RESULT_TTL", "3600"))
+
+SYNC, ASYNC, AUTO = "sync", "async", "auto"
+
+
+class EvaluationPolicy:
+    """Decides whether a response is evaluated before it is returned"""
+
+    def __init__(
+        self,
+        mode: str = EVAL_MODE,
+        min_confidence: float = EVAL_SYNC_CONFIDENCE,
+        sync_domains: Iterable[str] = EVAL_SYNC_DOMAINS
+    ):
+        self.mode = mode
+        self.min_confidence = min_confidence
+        self.sync_domains = set(sync_domains)
+
+        self.sync = 0
+        self.deferred = 0
+
+    def synchronous(self, agents: Iterable[str], confidence: float, requested: Optional[str] = None) -> bool:
+        """True = evaluate on the critical path (requested mode overrides the policy)"""
+        mode = requested or self.mode
+        if mode == AUTO:
+            sync = confidence < self.min_confidence or bool(self.sync_domains.intersection(agents))
+        else:
+            sync = mode != ASYNC
+
+        if sync:
+            self.sync += 1
+        else:
+            self.deferred += 1
+        return sync
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "min_confidence": self.min_confidence,
+            "sync_domains": sorted(self.sync_domains),
+            "sync": self.sync,
+            "deferred": self.deferred
+        }
+
+
+class EvaluationStore:
+    """Evaluation results by request ID; waiters can await pending ones"""
+
+    def __init__(self, max_entries: int = EVAL_RESULTS, ttl_seconds: float = EVAL_RESULT_TTL):
+        self.results = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._events: Dict[str, asyncio.Event] = {}
+
+        self.completed = 0
+
+    def pending(self, request_id: str, agents: Iterable[str]):
+        """Register a background evaluation"""
+        self.results.set(request_id, {
+            "request_id": request_id,
+            "status": "pending",
+            "agents": list(agents),
+            "started_at": time.time()
+        })
+        self._events[request_id] = asyncio.Event()
+
+    def complete(self, request_id: str, evaluation: Dict[str, Any], needs_refinement: bool):
+        entry = self.results.get(request_id) or {"request_id": request_id, "agents": []}
+        entry.update({
+            "status": "done",
+            "evaluation": evaluation,
+            "needs_refinement": needs_refinement,
+            "completed_at": time.time()
+        })
+        self.results.set(request_id, entry)
+        self.completed += 1
+
+        event = self._events.pop(request_id, None)
+        if event is not None:
+            event.set()
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        return self.results.get(request_id)
+
+    async def wait(self, request_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Result once done (None if unknown or still pending after timeout)"""
+        event = self._events.get(request_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        entry = self.get(request_id)
+        return entry if entry and entry["status"] == "done" else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stored": len(self.results),
+            "pending": len(self._events),
+            "completed": self.completed
+        }
+
+
+async def notify_aquarium(entry: Dict[str, Any]):
+    """Send a finished background evaluation to the aquarium (no-op unless AQUARIUM_URL)"""
+    url = os.getenv("AQUARIUM_URL")
+    if not url:
+        return
+    try:
+        async with httpx.AsyncClient() as client:
+            await client.post(f"{url}/evaluation", json=entry, timeout=2.0)
+    except Exception as e:
+        print(f"⚠️ Aquarium evaluation delivery failed: {e}")
@@ -0,0 +1,110 @@
+"""
+Lucy Health Prober - background, concurrent upstream health checks
+
+/health used to probe every assistant sequentially on each call, so one
+hung assistant stalled it for the full timeout. The prober checks all
+upstreams concurrently on an interval and /health answers from the
+cached snapshot. Results older than the staleness window are reported
+as "stale" (the prober itself is stuck or stopped).
+
+Configuration (env):
+    LUCY_HEALTH_INTERVAL   seconds between probe rounds (default 15)
+    LUCY_HEALTH_TIMEOUT    per-upstream probe timeout (default 3)
+    LUCY_HEALTH_STALENESS  max snapshot age before "stale" (default 60)
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from core.http_pool import HTTPPool
+
+HEALTH_INTERVAL = float(os.getenv("LUCY_HEALTH_INTERVAL", "15"))
+HEALTH_TIMEOUT = float(os.getenv("LUCY_HEALTH_TIMEOUT", "3"))
+HEALTH_STALENESS = float(os.getenv("LUCY_HEALTH_STALENESS", "60"))
+
+
+class HealthProber:
+    """Probes GET /health on every upstream concurrently, caches the result"""
+
+    def __init__(
+        self,
+        pool: HTTPPool,
+        interval: float = HEALTH_INTERVAL,
+        timeout: float = HEALTH_TIMEOUT,
+        staleness: float = HEALTH_STALENESS
+    ):
+        self.pool = pool
+        self.interval = interval
+        self.timeout = timeout
+        self.staleness = staleness
+
+        # name -> {status, latency_ms, checked_at (monotonic), checked_at_iso, error}
+        self._state: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+
+    async def _probe(self, name: str) -> Dict:
+        started = time.perf_counter()
+        try:
+            resp = await self.pool.probe_client(name).get("/health", timeout=self.timeout)
+            status = "healthy" if resp.status_code == 200 else "unhealthy"
+            error = None if status == "healthy" else f"HTTP {resp.status_code}"
+        except Exception as e:
+            status, error = "unreachable", str(e) or type(e).__name__
+        return {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": time.monotonic(),
+            "checked_at_iso": datetime.now().isoformat(),
+            "error": error
+        }
+
+    async def probe_all(self):
+        """One concurrent probe round; bounded by the probe timeout, not N x timeout"""
+        names = list(self.pool.upstreams)
+        results = await asyncio.gather(*(self._probe(name) for name in names))
+        self._state.update(zip(names, results))
+        self.rounds += 1
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"⚠️ Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        """Start background probing (FastAPI startup)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self):
+        """Stop background probing (FastAPI shutdown)"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Cached per-upstream state; never touches the network"""
+        now = time.monotonic()
+        snapshot = {}
+        for name in self.pool.upstreams:
+            state = self._state.get(name)
+            if state is None:
+                snapshot[name] = {"status": "unknown", "latency_ms": None, "age_seconds": None}
+                continue
+
+            age = now - state["checked_at"]
+            snapshot[name] = {
+                "status": "stale" if age > self.staleness else state["status"],
+                "latency_ms": state["latency_ms"],
+                "age_seconds": round(age, 1),
+                "checked_at": state["checked_at_iso"],
+                **({"error": state["error"]} if state["error"] else {})
+            }
+        return snapshot
@@ -0,0 +1,193 @@
+"""
+Lucy HTTP Pool - long-lived httpx clients per upstream
+
+Creating an AsyncClient per call pays TCP setup/teardown on every query.
+The pool keeps one client per upstream (assistant, evaluator) with
+keep-alive connections and per-upstream limits; HTTP/2 is used for https
+upstreams when the `h2` package is installed (plain http stays HTTP/1.1).
+
+Lifecycle is owned by the FastAPI lifespan: start() on startup,
+close() on shutdown. Clients are created lazily if used before start().
+
+Load test (local upstream, per-call clients vs pool):
+    python -m core.http_pool --requests 500 --concurrency 20
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from core.metrics import percentile
+
+DEFAULT_LIMITS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0
+}
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPPool:
+    """One pooled AsyncClient per named upstream"""
+
+    def __init__(
+        self,
+        upstreams: Dict[str, str],
+        limits: Optional[Dict[str, Dict]] = None,
+        timeout: float = 60.0
+    ):
+        self.upstreams = upstreams
+        self.limits = limits or {}
+        self.timeout = timeout
+        self.http2 = http2_available()
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.requests: Dict[str, int] = {}
+
+    def _limits(self, name: str) -> httpx.Limits:
+        return httpx.Limits(**{**DEFAULT_LIMITS, **self.limits.get("default", {}), **self.limits.get(name, {})})
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.upstreams[name],
+            limits=self._limits(name),
+            timeout=self.timeout,
+            http2=self.http2
+        )
+
+    async def start(self):
+        """Create clients for all upstreams (FastAPI startup)"""
+        for name in self.upstreams:
+            if name not in self._clients:
+                self._clients[name] = self._create(name)
+
+    async def close(self):
+        """Close all clients and their connections (FastAPI shutdown)"""
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(c.aclose() for c in clients.values()), return_exceptions=True)
+
+    def _get(self, name: str) -> httpx.AsyncClient:
+        if name not in self.upstreams:
+            raise KeyError(f"Unknown upstream: {name}")
+        if name not in self._clients:
+            self._clients[name] = self._create(name)
+        return self._clients[name]
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """Pooled client for an upstream; requests use paths relative to its URL"""
+        client = self._get(name)
+        self.requests[name] = self.requests.get(name, 0) + 1
+        return client
+
+    def probe_client(self, name: str) -> httpx.AsyncClient:
+        """Same pooled client, not counted in requests (background health probes)"""
+        return self._get(name)
+
+    def stats(self) -> Dict:
+        return {
+            "http2": self.http2,
+            "open_clients": sorted(self._clients),
+            "requests": dict(self.requests),
+            "limits": {
+                name: {
+                    "max_connections": self._limits(name).max_connections,
+                    "max_keepalive_connections": self._limits(name).max_keepalive_connections
+                }
+                for name in self.upstreams
+            }
+        }
+
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+
+async def _run_load(send, total: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await send()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "rps": round(total / elapsed, 1)
+    }
+
+
+async def load_test(url: str, total: int = 500, concurrency: int = 20) -> Dict[str, Dict]:
+    """POST /query to an upstream: fresh client per call vs pooled client"""
+    payload = {"query": "load test", "context": {}}
+
+    async def per_call():
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            (await client.post(f"{url}/query", json=payload)).raise_for_status()
+
+    pool = HTTPPool({"upstream": url}, {"upstream": {"max_connections": concurrency}})
+
+    async def pooled():
+        (await pool.client("upstream").post("/query", json=payload)).raise_for_status()
+
+    results = {
+        "per_call_client": await _run_load(per_call, total, concurrency),
+        "pooled_client": await _run_load(pooled, total, concurrency)
+    }
+    await pool.close()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import threading
+
+    parser = argparse.ArgumentParser(description="HTTP pool load test")
+    parser.add_argument("--url", help="Upstream base URL (default: local stub assistant)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        import uvicorn
+        from fastapi import FastAPI
+
+        stub = FastAPI()
+
+        @stub.post("/query")
+        async def stub_query():
+            return {"response": "ok", "confidence": 1.0, "sources": []}
+
+        server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=18080, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        url = "http://127.0.0.1:18080"
+
+    print(f"🔌 HTTP pool load test → {url} ({args.requests} requests, concurrency {args.concurrency})")
+    print("=" * 70)
+    results = asyncio.run(load_test(url, args.requests, args.concurrency))
+    for name, row in results.items():
+        print(f"   {name:16} p50={row['p50_ms']:7.2f}ms  p95={row['p95_ms']:7.2f}ms  "
+              f"p99={row['p99_ms']:7.2f}ms  {row['rps']:>7.1f} req/s")
+
+    before, after = results["per_call_client"]["p50_ms"], results["pooled_client"]["p50_ms"]
+    print(f"\n✅ p50 latency reduction: {(1 - after / before) * 100:.0f}%")
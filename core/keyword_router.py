@@ -0,0 +1,169 @@
+"""
+Lucy Keyword Router - one compiled regex for ROUTING_RULES
+
+Routing used to rescan the query once per keyword (`kw in q_lower`) in
+three places. The router compiles lucy_config.ROUTING_RULES into a
+single word-boundary alternation once and finds every keyword in one
+C-level scan of the query.
+
+Matching is word-boundary aware: a keyword must start a word, and
+keywords shorter than 4 characters must also end one ("pr" matches
+"pr #12" but not "project"; "email" still matches "emails").
+
+Micro-benchmark (substring loop vs regex):
+    python -m core.keyword_router
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from lucy_config import ROUTING_RULES
+
+WHOLE_WORD_BELOW = 4
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordRouter:
+    """Word-boundary regex matcher over routing keywords"""
+
+    def __init__(self, rules: Dict[str, List[Any]]):
+        self.rules = rules
+        self.keywords = [kw.lower() for kw in rules]
+        self.keyword_domains = list(rules.values())
+
+        # Domain order = first appearance in the rules (stable routing order)
+        self.domain_order: List[Any] = []
+        for domains in rules.values():
+            for domain in domains:
+                if domain not in self.domain_order:
+                    self.domain_order.append(domain)
+
+        self._pattern = self._compile()
+
+    def _compile(self) -> "re.Pattern":
+        """
+        (?<!\w)(?=(kw1|kw2|...)) - zero-width, so matches may overlap
+
+        Alternatives go longest first; a position reports only the
+        longest keyword there, so each keyword's hits also include the
+        shorter keywords that are its prefixes and match along with it.
+        """
+        self._domain_sets = [set(domains) for domains in self.keyword_domains]
+        self._indices: Dict[str, List[int]] = {}
+        for index, keyword in enumerate(self.keywords):
+            self._indices.setdefault(keyword, []).append(index)
+
+        # Keyword -> every rule index it stands for (its own + matching prefixes)
+        self._hits: Dict[str, Tuple[int, ...]] = {}
+        for keyword, own in self._indices.items():
+            self._hits[keyword] = tuple(own) + tuple(sorted(
+                index
+                for prefix, indices in self._indices.items()
+                if len(prefix) < len(keyword) and keyword.startswith(prefix)
+                and (len(prefix) >= WHOLE_WORD_BELOW or not _is_word_char(keyword[len(prefix)]))
+                for index in indices
+            ))
+
+        alternatives = [
+            re.escape(keyword) + (r"(?!\w)" if len(keyword) < WHOLE_WORD_BELOW else "")
+            for keyword in sorted(self._indices, key=len, reverse=True)
+        ]
+        return re.compile(r"(?<!\w)(?=(" + "|".join(alternatives) + "))")
+
+    def _find(self, text: str) -> List[Tuple[int, int]]:
+        hits = self._hits
+        return [
+            (index, match.start())
+            for match in self._pattern.finditer(text.lower())
+            for index in hits[match.group(1)]
+        ]
+
+    def _matched(self, text: str) -> set:
+        """Indices of the matched rules"""
+        hits = self._hits
+        found = set()
+        for keyword in self._pattern.findall(text.lower()):
+            found.update(hits[keyword])
+        return found
+
+    def find(self, text: str) -> List[Tuple[str, int]]:
+        """All (keyword, start) matches in one pass over the lowercased text"""
+        return [(self.keywords[index], start) for index, start in self._find(text)]
+
+    def matched_keywords(self, text: str) -> List[str]:
+        """Distinct matched keywords, in rules order"""
+        return [self.keywords[index] for index in sorted(self._matched(text))]
+
+    def domain_counts(self, text: str) -> Counter:
+        """Matched keywords per domain (ties keep rules order)"""
+        counts = Counter()
+        for index in sorted(self._matched(text)):
+            counts.update(self.keyword_domains[index])
+        return counts
+
+    def domains(self, text: str) -> List[Any]:
+        """Matched domains, in rules order"""
+        found = self._matched(text)
+        if not found:
+            return []
+        present = set().union(*(self._domain_sets[index] for index in found))
+        return [domain for domain in self.domain_order if domain in present]
+
+
+_router: Optional[KeywordRouter] = None
+
+
+def get_keyword_router() -> KeywordRouter:
+    """Shared router compiled from lucy_config.ROUTING_RULES"""
+    global _router
+    if _router is None:
+        _router = KeywordRouter(ROUTING_RULES)
+    return _router
+
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    queries = [
+        "Show me emails about Qdrant from last week",
+        "How do I use Qdrant filters?",
+        "Find project emails and show me the relevant docs",
+        "What N8N workflows do we have?",
+        "Show me Linear tasks for the database project",
+        "Připomeň mi schůzku zítra v 10",
+        "Kolik faktur od zákazníka Premium Gastro přišlo v prosinci a jaký je stav plateb?",
+        "Review PR #42 and deploy the docker build when it passes"
+    ]
+
+    def substring_scan(rules, query):
+        q_lower = query.lower()
+        return [kw for kw in rules if kw in q_lower]
+
+    def per_query_us(fn, n):
+        return timeit.timeit(lambda: [fn(q) for q in queries], number=n) / (n * len(queries)) * 1e6
+
+    router = get_keyword_router()
+
+    print(f"🔀 Keyword router: {len(router.keywords)} keywords, {len(router._pattern.pattern):,} char pattern")
+    print("=" * 70)
+    for query in queries:
+        print(f"   {query[:50]:50} → {[d.value for d in router.domains(query)]}")
+
+    # Substring scans cost O(keywords x query) in Python; the regex runs in C
+    print("\n   keywords   substring loop   regex")
+    random.seed(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    for size in (len(ROUTING_RULES), 250, 1000, 4000):
+        rules = dict(ROUTING_RULES)
+        while len(rules) < size:
+            rules["".join(random.choices(letters, k=random.randint(4, 10)))] = ["synthetic"]
+        compiled = KeywordRouter(rules)
+        n = max(200, 200000 // size)
+        naive = per_query_us(lambda q: substring_scan(rules, q), n)
+        fast = per_query_us(compiled.domains, n)
+        print(f"   {size:8}   {naive:10.2f} µs   {fast:5.2f} µs")
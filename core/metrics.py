@@ -0,0 +1,247 @@
+"""
+Lucy Metrics - in-process counters and latency histograms
+
+/stats used to return placeholders ("avg_response_time": "2.3s"), so
+there was no way to tell where the time goes. Metrics are kept in the
+process: counters are plain dict increments, latencies go into
+HDR-style histograms (log-linear buckets, ~1.6% relative error, constant
+memory, any percentile without keeping samples).
+
+    metrics.inc("lucy_upstream_errors_total", upstream="personal", kind="timeout")
+    metrics.observe("lucy_upstream_latency_ms", 212.5, upstream="personal")
+    metrics.snapshot()     # JSON for /stats
+    metrics.prometheus()   # text exposition for /metrics
+
+Histograms are exposed to Prometheus as summaries (quantiles + _sum +
+_count), computed from the same buckets as the JSON percentiles.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUB_BUCKET_BITS = 7                       # 128 linear values, then 64 sub-buckets per octave
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+MAX_TRACKABLE_US = 3_600_000_000          # 1 hour; larger values land in the top bucket
+QUANTILES = (0.5, 0.9, 0.99)
+
+COUNTER, GAUGE, HISTOGRAM = "counter", "gauge", "histogram"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Exact nearest-rank percentile (pct 0-100) of raw samples - benchmarks, short windows; 0.0 if empty"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def _bucket_index(value_us: int) -> int:
+    """Log-linear bucket: exact below 128µs, then 64 buckets per power of two"""
+    shift = max(0, value_us.bit_length() - SUB_BUCKET_BITS)
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value_us >> shift)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """[low, high) in µs for a bucket index"""
+    if index < 2 * SUB_BUCKET_HALF:
+        return index, index + 1
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    low = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return low, low + (1 << shift)
+
+
+class Histogram:
+    """HDR-style latency histogram (values in milliseconds, µs resolution)"""
+
+    def __init__(self):
+        self.counts = [0] * (_bucket_index(MAX_TRACKABLE_US) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value_ms: float):
+        value_us = min(max(0, int(value_ms * 1000)), MAX_TRACKABLE_US)
+        self.counts[_bucket_index(value_us)] += 1
+        self.count += 1
+        self.total += value_ms
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Value (ms, bucket midpoint) at quantile q in [0, 1]"""
+        if not self.count:
+            return None
+        target = max(1, int(round(q * self.count)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                low, high = _bucket_bounds(index)
+                return min((low + high) / 2000.0, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2),
+            "min_ms": round(self.min, 2),
+            "p50_ms": round(self.percentile(0.5), 2),
+            "p90_ms": round(self.percentile(0.9), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+            "max_ms": round(self.max, 2)
+        }
+
+
+class Metrics:
+    """Registry of labelled counters, gauges and histograms"""
+
+    def __init__(self, descriptions: Optional[Dict[str, Tuple[str, str]]] = None):
+        # name -> (kind, help)
+        self.descriptions: Dict[str, Tuple[str, str]] = dict(descriptions or {})
+        self._values: Dict[str, Dict[Labels, Any]] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self.descriptions[name] = (kind, help_text)
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        """Absolute value (gauges, or counters owned by another component)"""
+        key = self._labels(labels)
+        with self._lock:
+            self._values.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value_ms: float, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.record(value_ms)
+
+    def value(self, name: str, **labels) -> Any:
+        return self._values.get(name, {}).get(self._labels(labels))
+
+    def total(self, name: str, **labels) -> float:
+        """Counter summed over the label sets that match `labels`"""
+        wanted = set(self._labels(labels))
+        return sum(
+            value for key, value in self._values.get(name, {}).items()
+            if wanted.issubset(key)
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON view: {name: value} or {name: {"label=value,...": value}}"""
+        with self._lock:
+            result = {}
+            for name, series in sorted(self._values.items()):
+                values = {
+                    ",".join(f"{k}={v}" for k, v in labels) or "_": (
+                        value.summary() if isinstance(value, Histogram) else value
+                    )
+                    for labels, value in sorted(series.items())
+                }
+                result[name] = values["_"] if list(values) == ["_"] else values
+            return result
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._values.items()):
+                kind, help_text = self.descriptions.get(name, (GAUGE, name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {'summary' if kind == HISTOGRAM else kind}")
+                for labels, value in sorted(series.items()):
+                    if isinstance(value, Histogram):
+                        for q in QUANTILES:
+                            quantile = value.percentile(q)
+                            lines.append(_sample(name, labels + (("quantile", str(q)),), quantile if quantile is not None else float("nan")))
+                        lines.append(_sample(f"{name}_sum", labels, value.total))
+                        lines.append(_sample(f"{name}_count", labels, value.count))
+                    else:
+                        lines.append(_sample(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels: Iterable[Tuple[str, str]], value: float) -> str:
+    label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request count, latency (until the last body chunk, so
+    streams count fully) and 5xx errors per endpoint
+
+    Only listed paths get their own label; everything else is "other".
+    """
+
+    def __init__(self, app, metrics: Metrics, paths: Iterable[str] = ()):
+        self.app = app
+        self.metrics = metrics
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        endpoint = scope["path"] if scope["path"] in self.paths else "other"
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.inc("lucy_requests_total", endpoint=endpoint, status=status)
+            self.metrics.observe("lucy_request_latency_ms", (time.perf_counter() - started) * 1000, endpoint=endpoint)
+            if status >= 500:
+                self.metrics.inc("lucy_request_errors_total", endpoint=endpoint)
+
+
+if __name__ == "__main__":
+    import random
+
+    print("📊 Histogram accuracy vs exact percentiles")
+    samples = [random.lognormvariate(5, 1) for _ in range(100_000)]
+    histogram = Histogram()
+    started = time.perf_counter()
+    for sample in samples:
+        histogram.record(sample)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    for q in QUANTILES:
+        exact = percentile(samples, q * 100)
+        estimate = histogram.percentile(q)
+        print(f"   p{int(q * 100):<3} exact {exact:9.2f} ms   histogram {estimate:9.2f} ms   error {abs(estimate - exact) / exact:.2%}")
+    print(f"   record(): {elapsed / len(samples) * 1e9:.0f} ns/sample, {len(histogram.counts)} buckets")
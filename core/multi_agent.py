@@ -0,0 +1,131 @@
+"""
+Lucy Multi-Agent Strategies - how long a multi-domain query waits
+
+Multi-domain queries used to wait for every routed assistant, so they
+were as slow as the slowest one. Strategies:
+
+- all:             wait for every assistant (previous behavior)
+- first_confident: answer once N assistants replied with confidence
+                   above the threshold (the rest are cancelled)
+- quorum:          wait until the quorum deadline (bounded by the request
+                   deadline), answer with whatever arrived - or, if
+                   nothing did, with the first answer that arrives within
+                   the request deadline; streaming clients keep receiving
+                   the late results
+
+Selection: QueryRequest.multi_strategy, else the matching
+MULTI_DOMAIN_PATTERNS entry's "multi_strategy", else LUCY_MULTI_STRATEGY.
+
+Configuration (env):
+    LUCY_MULTI_STRATEGY        default strategy (default all)
+    LUCY_MULTI_MIN_CONFIDENCE  confidence counted by first_confident (default 0.7)
+    LUCY_MULTI_FIRST_N         confident answers first_confident waits for (default 1)
+    LUCY_MULTI_QUORUM_MS       quorum wait (default 5000)
+"""
+
+import os
+import re
+import time
+from typing import Dict, List, Optional, Set
+
+from core import deadline
+from lucy_config import MULTI_DOMAIN_PATTERNS
+
+ALL, FIRST_CONFIDENT, QUORUM = "all", "first_confident", "quorum"
+STRATEGIES = (ALL, FIRST_CONFIDENT, QUORUM)
+
+MULTI_STRATEGY = os.getenv("LUCY_MULTI_STRATEGY", ALL)
+MULTI_MIN_CONFIDENCE = float(os.getenv("LUCY_MULTI_MIN_CONFIDENCE", "0.7"))
+MULTI_FIRST_N = int(os.getenv("LUCY_MULTI_FIRST_N", "1"))
+MULTI_QUORUM_SECONDS = float(os.getenv("LUCY_MULTI_QUORUM_MS", "5000")) / 1000.0
+
+_PATTERNS = [
+    (re.compile(entry["pattern"]), entry["multi_strategy"])
+    for entry in MULTI_DOMAIN_PATTERNS
+    if "multi_strategy" in entry
+]
+
+
+def select_strategy(query: str, requested: Optional[str] = None) -> str:
+    """Request override > multi-domain pattern default > env default"""
+    if requested in STRATEGIES:
+        return requested
+    query_lower = query.lower()
+    for pattern, strategy in _PATTERNS:
+        if pattern.search(query_lower):
+            return strategy
+    return MULTI_STRATEGY if MULTI_STRATEGY in STRATEGIES else ALL
+
+
+class MultiAgentCollector:
+    """Collects assistant answers and decides when enough have arrived"""
+
+    def __init__(
+        self,
+        strategy: str,
+        agents: List[str],
+        min_confidence: float = MULTI_MIN_CONFIDENCE,
+        first_n: int = MULTI_FIRST_N,
+        quorum_seconds: float = MULTI_QUORUM_SECONDS,
+        reserve: float = 0.0
+    ):
+        self.strategy = strategy if len(agents) > 1 else ALL
+        self.agents = agents
+        self.min_confidence = min_confidence
+        self.first_n = first_n
+
+        self.results: List[Dict] = []
+        self.finished: Set[str] = set()
+
+        self.wait_until = None
+        if self.strategy == QUORUM:
+            # Leave `reserve` of the request budget for merging and evaluation
+            left = deadline.remaining()
+            if left is not None:
+                quorum_seconds = min(quorum_seconds, max(0.0, left - reserve))
+            self.wait_until = time.monotonic() + quorum_seconds
+
+    def add(self, agent: str, result: Optional[Dict]):
+        """Assistant finished (result None = failed)"""
+        self.finished.add(agent)
+        if result is not None:
+            self.results.append(result)
+
+    def enough(self) -> bool:
+        if len(self.finished) >= len(self.agents):
+            return True
+        if self.strategy == FIRST_CONFIDENT:
+            confident = sum(1 for r in self.results if r.get("confidence", 0) >= self.min_confidence)
+            return confident >= self.first_n
+        if self.strategy == QUORUM:
+            return bool(self.results) and time.monotonic() >= self.wait_until
+        return False
+
+    def timeout(self) -> Optional[float]:
+        """
+        Seconds left to wait (None = until enough())
+
+        Quorum window over without any answer: wait for the first one,
+        bounded only by the request deadline.
+        """
+        if self.wait_until is None:
+            return None
+        left = self.wait_until - time.monotonic()
+        if left <= 0 and not self.results:
+            remaining = deadline.remaining()
+            return None if remaining is None else max(0.0, remaining)
+        return max(0.0, left)
+
+    def no_answer_detail(self) -> str:
+        """Error when nothing usable arrived"""
+        if self.strategy == QUORUM and len(self.finished) < len(self.agents):
+            return "No assistant answered within the quorum and request deadline"
+        return "All assistants failed"
+
+    def ordered(self) -> List[Dict]:
+        """Results in routing order"""
+        return sorted(self.results, key=lambda r: self.agents.index(r["agent"]))
+
+    def late(self) -> List[str]:
+        """Routed assistants that had not finished"""
+        return [agent for agent in self.agents if agent not in self.finished]
@@ -0,0 +1,201 @@
+"""
+Lucy Response Cache - finished /query responses keyed on normalized query
+
+Repeated questions ("co mám dnes v plánu" several times a morning) ran
+routing, assistants and the evaluator every time. The cache stores the
+final response keyed on normalized query + user_id + language + context
+hash, with a TTL per answering domain (personal short, knowledge long).
+
+Invalidation is versioned per domain, like the KB search cache: a memory
+or collection change bumps the domain version and every cached response
+that used the domain becomes a miss. Other processes (ingestion, memory
+manager) call notify_invalidation(), which POSTs to the orchestrator's
+/cache/invalidate when ORCHESTRATOR_URL is set.
+
+Configuration (env):
+    LUCY_RESPONSE_CACHE          0 disables (default 1)
+    LUCY_RESPONSE_CACHE_ENTRIES  max cached responses (default 2048)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.ttl_cache import TTLCache
+from lucy_config import LUCY_ASSISTANTS
+
+# Seconds a response stays valid, per answering domain
+DOMAIN_TTLS = {
+    "personal": 60,          # Agenda / reminders change during the day
+    "communications": 120,   # New mail arrives constantly
+    "projects": 300,
+    "business": 300,
+    "content": 600,
+    "data": 600,
+    "dev": 600,
+    "knowledge": 3600        # Tech docs change on re-ingestion only
+}
+DEFAULT_TTL = 300
+
+RESPONSE_CACHE_ENABLED = os.getenv("LUCY_RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_ENTRIES = int(os.getenv("LUCY_RESPONSE_CACHE_ENTRIES", "2048"))
+
+# Qdrant collection / Mem0 namespace -> domains whose answers depend on it
+COLLECTION_DOMAINS: Dict[str, List[str]] = {}
+NAMESPACE_DOMAINS: Dict[str, List[str]] = {}
+for _domain, _config in LUCY_ASSISTANTS.items():
+    for _collection in _config.qdrant_collections:
+        COLLECTION_DOMAINS.setdefault(_collection, []).append(_domain.value)
+    NAMESPACE_DOMAINS.setdefault(_config.mem0_namespace, []).append(_domain.value)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase NFKC words only - punctuation and spacing don't split entries"""
+    query = unicodedata.normalize("NFKC", query).lower()
+    return " ".join(re.findall(r"\w+", query))
+
+
+def context_hash(context: Optional[Dict]) -> str:
+    if not context:
+        return ""
+    encoded = json.dumps(context, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class ResponseCache:
+    """TTL cache of final responses with per-domain version invalidation"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.enabled = enabled
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=DEFAULT_TTL)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.latency_saved_ms = 0.0
+        self.invalidations: Dict[str, int] = {}
+
+    @staticmethod
+    def key(query: str, user_id: Optional[str], language: Optional[str], context: Optional[Dict]) -> Tuple:
+        return (normalize_query(query), user_id or "default", language or "cs", context_hash(context))
+
+    def ttl(self, domains: Iterable[str]) -> float:
+        """Shortest TTL of the answering domains"""
+        return min((DOMAIN_TTLS.get(d, DEFAULT_TTL) for d in domains), default=DEFAULT_TTL)
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Cached entry {response, domains, cost_ms} or None"""
+        if not self.enabled:
+            return None
+
+        entry = self.cache.get(key)
+        if entry is not None and any(
+            self._versions.get(d, 0) != v for d, v in entry["versions"].items()
+        ):
+            self.cache.delete(key)
+            self.stale += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.latency_saved_ms += entry["cost_ms"]
+        return entry
+
+    def snapshot(self) -> Dict[str, int]:
+        """Domain versions now - take before running the pipeline, pass to put()"""
+        with self._lock:
+            return dict(self._versions)
+
+    def put(
+        self,
+        key: Tuple,
+        response: Dict[str, Any],
+        domains: List[str],
+        cost_ms: float,
+        versions: Optional[Dict[str, int]] = None
+    ):
+        """
+        Store a finished response; cost_ms is the pipeline time a hit saves
+
+        versions: snapshot() from when the request started, so an
+        invalidation that lands mid-pipeline makes this entry stale
+        (defaults to the current versions).
+        """
+        if not self.enabled:
+            return
+        versions = self._versions if versions is None else versions
+        entry = {
+            "response": response,
+            "domains": domains,
+            "versions": {d: versions.get(d, 0) for d in domains},
+            "cost_ms": cost_ms
+        }
+        self.cache.set(key, entry, ttl=self.ttl(domains))
+
+    def invalidate_domains(self, domains: Iterable[str]) -> List[str]:
+        """Bump domain versions - cached responses using them become misses"""
+        bumped = []
+        with self._lock:
+            for domain in dict.fromkeys(domains):
+                self._versions[domain] = self._versions.get(domain, 0) + 1
+                self.invalidations[domain] = self.invalidations.get(domain, 0) + 1
+                bumped.append(domain)
+        return bumped
+
+    def invalidate_collection(self, collection: str) -> List[str]:
+        """KB collection changed (ingestion, lexical index rebuild)"""
+        return self.invalidate_domains(COLLECTION_DOMAINS.get(collection, []))
+
+    def invalidate_namespace(self, namespace: str) -> List[str]:
+        """Memory namespace changed (new memory, correction)"""
+        return self.invalidate_domains(NAMESPACE_DOMAINS.get(namespace, []))
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "latency_saved_ms": round(self.latency_saved_ms, 1),
+            "evictions": self.cache.evictions,
+            "invalidations": dict(self.invalidations)
+        }
+
+
+def notify_invalidation(collections: Optional[List[str]] = None, namespaces: Optional[List[str]] = None):
+    """
+    Tell the orchestrator that KB collections / memory namespaces changed
+
+    Fire-and-forget in a daemon thread; no-op unless ORCHESTRATOR_URL is set.
+    """
+    url = os.getenv("ORCHESTRATOR_URL")
+    if not url or not (collections or namespaces):
+        return
+
+    def send():
+        import httpx
+        try:
+            httpx.post(
+                f"{url}/cache/invalidate",
+                json={"collections": collections or [], "namespaces": namespaces or []},
+                timeout=5.0
+            )
+        except Exception as e:
+            print(f"⚠️ Response cache invalidation failed: {e}")
+
+    threading.Thread(target=send, daemon=True, name="lucy-cache-invalidate").start()
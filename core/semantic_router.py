@@ -0,0 +1,194 @@
+"""
+Lucy Semantic Router - embedding centroids per assistant domain
+
+Keyword routing only works when the query contains a listed keyword;
+"kdy mám schůzku s Andrejem" never reaches personal. The semantic router
+embeds each assistant's description, actions and knowledge categories
+once, keeps one L2-normalized centroid per domain, and scores a query
+against all domains with a single matmul.
+
+Decision:
+- top score >= threshold            → top domain, plus any domain within
+                                      the multi margin of it (multi-agent)
+- top score below threshold         → keyword router fallback
+
+Thresholds depend on the embedding provider (defaults are tuned for
+OpenAI text-embedding-3-small):
+    LUCY_ROUTER_THRESHOLD     min cosine score to trust (default 0.30)
+    LUCY_ROUTER_MULTI_MARGIN  score gap for multi-agent (default 0.03)
+    LUCY_ROUTER_MAX_AGENTS    cap on multi-agent fan-out (default 3)
+
+Inspect scores:
+    python -m core.semantic_router "kdy mám schůzku s Andrejem"
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from lucy_config import LUCY_ASSISTANTS, LucyAssistantConfig, LucyDomain
+from core.keyword_router import get_keyword_router
+from knowledge.embeddings import EmbeddingService, get_embedding_service
+
+ROUTER_THRESHOLD = float(os.getenv("LUCY_ROUTER_THRESHOLD", "0.30"))
+ROUTER_MULTI_MARGIN = float(os.getenv("LUCY_ROUTER_MULTI_MARGIN", "0.03"))
+ROUTER_MAX_AGENTS = int(os.getenv("LUCY_ROUTER_MAX_AGENTS", "3"))
+BUILD_RETRY_SECONDS = 60.0
+
+
+@dataclass
+class SemanticRoute:
+    """Routing outcome"""
+    domains: List[LucyDomain]
+    strategy: str                 # 'single' | 'multi' | 'keyword'
+    confidence: float             # Top cosine score (keyword fallback: score that missed)
+    scores: Dict[str, float] = field(default_factory=dict)
+
+
+def domain_texts(config: LucyAssistantConfig) -> List[str]:
+    """Texts describing a domain: description, actions, knowledge categories"""
+    return [config.description] + [
+        item.replace("_", " ") for item in config.actions + config.knowledge_categories
+    ]
+
+
+class SemanticRouter:
+    """Cosine routing against per-domain centroids"""
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        assistants: Optional[Dict[LucyDomain, LucyAssistantConfig]] = None,
+        threshold: float = ROUTER_THRESHOLD,
+        multi_margin: float = ROUTER_MULTI_MARGIN,
+        max_agents: int = ROUTER_MAX_AGENTS
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.multi_margin = multi_margin
+        self.max_agents = max_agents
+
+        assistants = assistants or LUCY_ASSISTANTS
+        self.domains = [d for d in assistants if d != LucyDomain.ORCHESTRATOR]
+
+        # Embed every domain text in one batch, then average per domain
+        texts = [domain_texts(assistants[d]) for d in self.domains]
+        vectors = embedder.embed([t for group in texts for t in group])
+
+        centroids, offset = [], 0
+        for group in texts:
+            centroids.append(vectors[offset:offset + len(group)].mean(axis=0))
+            offset += len(group)
+
+        centroids = np.stack(centroids).astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids = centroids / norms    # (domains, dim)
+
+        self.counters = {"single": 0, "multi": 0, "keyword": 0}
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine score per domain (one matmul)"""
+        vector = self.embedder.embed_one(query)
+        norm = np.linalg.norm(vector)
+        return self.centroids @ (vector / norm if norm else vector)
+
+    def route(self, query: str) -> SemanticRoute:
+        """Route by centroid similarity, falling back to keywords below threshold"""
+        scores = self.scores(query)
+        order = np.argsort(-scores)
+        top = float(scores[order[0]])
+        by_domain = {self.domains[i].value: round(float(scores[i]), 4) for i in order}
+
+        if top < self.threshold:
+            self.counters["keyword"] += 1
+            return SemanticRoute(
+                domains=get_keyword_router().domains(query),
+                strategy="keyword",
+                confidence=top,
+                scores=by_domain
+            )
+
+        cutoff = max(self.threshold, top - self.multi_margin)
+        domains = [self.domains[i] for i in order[:self.max_agents] if scores[i] >= cutoff]
+        strategy = "multi" if len(domains) > 1 else "single"
+        self.counters[strategy] += 1
+
+        return SemanticRoute(domains=domains, strategy=strategy, confidence=top, scores=by_domain)
+
+    def stats(self) -> Dict:
+        return {
+            "domains": len(self.domains),
+            "threshold": self.threshold,
+            "multi_margin": self.multi_margin,
+            **self.counters
+        }
+
+
+_router: Optional[SemanticRouter] = None
+_router_lock = threading.Lock()
+_retry_at = 0.0
+
+
+def get_semantic_router(block: bool = True) -> Optional[SemanticRouter]:
+    """
+    Shared semantic router (None without an embedding provider)
+
+    Centroids are built on first use; if the provider fails, keyword
+    routing is used and the build is retried after BUILD_RETRY_SECONDS.
+    With block=False a build in progress is not waited for (returns None).
+    """
+    global _router, _retry_at
+
+    if _router is not None:
+        return _router
+    if not _router_lock.acquire(blocking=block):
+        return None
+
+    try:
+        if _router is not None or time.monotonic() < _retry_at:
+            return _router
+
+        embedder = get_embedding_service()
+        if embedder is None:
+            _retry_at = float("inf")
+            return None
+
+        try:
+            _router = SemanticRouter(embedder)
+        except Exception as e:
+            print(f"⚠️ Semantic router unavailable, using keyword routing: {e}")
+            _retry_at = time.monotonic() + BUILD_RETRY_SECONDS
+
+        return _router
+    finally:
+        _router_lock.release()
+
+
+if __name__ == "__main__":
+    import sys
+
+    router = get_semantic_router()
+    if router is None:
+        print("❌ Semantic router needs an embedding provider (LUCY_EMBEDDING_PROVIDER)")
+        sys.exit(1)
+
+    queries = sys.argv[1:] or [
+        "kdy mám schůzku s Andrejem",
+        "Show me emails about Qdrant from last week",
+        "Kolik nám dluží Premium Gastro za prosinec?",
+        "Why does the container keep restarting?",
+        "hello"
+    ]
+
+    print(f"🧭 Semantic router ({router.embedder.provider.name}, threshold {router.threshold})")
+    print("=" * 70)
+    for query in queries:
+        route = router.route(query)
+        top = ", ".join(f"{d}={s:.2f}" for d, s in list(route.scores.items())[:3])
+        print(f"   {query[:45]:45} → {[d.value for d in route.domains]} ({route.strategy})")
+        print(f"   {'':45}   {top}")
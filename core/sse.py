@@ -0,0 +1,52 @@
+"""
+Lucy SSE - server-sent event framing for streamed responses
+
+Shared by the orchestrator (/query/stream) and assistants
+(/query/stream): sse_event() formats one event, iter_sse() parses an
+upstream httpx streaming response back into (event, data) pairs so the
+orchestrator can relay assistant output as it arrives.
+"""
+
+import json
+from typing import Any, AsyncIterator, Tuple
+
+import httpx
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """One SSE frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def chunk_text(text: str, words: int = 8):
+    """Split text into word groups for incremental delivery"""
+    parts = text.split(" ")
+    for i in range(0, len(parts), words):
+        chunk = " ".join(parts[i:i + words])
+        yield chunk if i + words >= len(parts) else chunk + " "
+
+
+async def iter_sse(response: httpx.Response) -> AsyncIterator[Tuple[str, Any]]:
+    """Parse an httpx streaming response into (event, data) pairs"""
+    event, data = "message", []
+
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # Comment / keep-alive
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+    if data:
+        yield event, json.loads("\n".join(data))
@@ -0,0 +1,381 @@
+"""
+Lucy Tracing - request IDs and spans across Lucy services
+
+A query crosses the thin client, orchestrator, assistants, evaluator,
+Qdrant and memory files; without a correlation ID a slow query could not
+be followed. Each service opens spans (name, service, start, duration,
+attributes) in a contextvar, propagates the W3C `traceparent` header on
+every outgoing httpx call and exports finished spans as JSON lines. The
+trace ID doubles as the request ID (X-Request-ID response header).
+
+    with tracing.span("kb.search", collection="emails"):
+        ...
+    httpx.post(url, headers=tracing.headers())
+
+Stdlib only - the thin client image copies this file alone.
+
+Configuration (env):
+    LUCY_TRACING        0 disables export (IDs still propagate; default 1)
+    LUCY_TRACE_FILE     JSONL span file (unset = spans kept in memory only);
+                        share it via a volume so the aquarium can read all
+                        services
+    LUCY_TRACE_MAX_MB   rotate the file at this size (default 50, keeps 2 old files)
+    LUCY_TRACE_SAMPLE   fraction of new traces exported (default 1.0)
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+TRACING_ENABLED = os.getenv("LUCY_TRACING", "1") != "0"
+TRACE_FILE = os.getenv("LUCY_TRACE_FILE") or None
+TRACE_MAX_BYTES = int(float(os.getenv("LUCY_TRACE_MAX_MB", "50")) * 1024 * 1024)
+TRACE_BACKUPS = 2  # Rotated files: <file>.1 (newest) .. <file>.2
+TRACE_QUEUE = 10_000  # Spans waiting for the writer; beyond that they are dropped
+TRACE_SAMPLE = float(os.getenv("LUCY_TRACE_SAMPLE", "1.0"))
+RECENT_SPANS = 2048
+CLOCK_SKEW_SECONDS = 0.005  # Tolerance when comparing span ends across hosts
+
+TRACEPARENT = "traceparent"
+REQUEST_ID_HEADER = "X-Request-ID"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace"""
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    service: str
+    start: float                       # Epoch seconds
+    duration_ms: Optional[float] = None
+    status: str = "ok"                 # ok | error
+    sampled: bool = True
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("lucy_span", default=None)
+_request_service: ContextVar[Optional[str]] = ContextVar("lucy_service", default=None)
+_service = os.getenv("LUCY_SERVICE", "lucy")
+
+
+class JsonlExporter:
+    """
+    Appends finished spans to a JSONL file and keeps the latest in memory
+
+    export() never touches the file: a writer thread drains a bounded
+    queue (spans beyond it are dropped and counted) and rotates the file
+    at max_bytes.
+    """
+
+    def __init__(self, path: Optional[str] = TRACE_FILE, max_bytes: int = TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.recent: deque = deque(maxlen=RECENT_SPANS)
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=TRACE_QUEUE)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def export(self, span: Span):
+        record = asdict(span)
+        self.recent.append(record)
+        if not self.path:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._run, daemon=True, name="lucy-trace-writer")
+                    self._writer.start()
+
+    def _run(self):
+        """Writer thread: batches of queued spans, one flush per batch"""
+        while True:
+            records = [self._queue.get()]
+            while len(records) < 512:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write([r for r in records if r is not None])
+            for _ in records:
+                self._queue.task_done()
+
+    def _write(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in records))
+                size = f.tell()
+            self.exported += len(records)
+            if size >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self.failed += len(records)
+            if self.failed == len(records):
+                print(f"⚠️ Trace export to {self.path} failed: {e}")
+
+    def _rotate(self):
+        """<file> -> <file>.1 -> ... -> <file>.<backups> (oldest dropped)"""
+        for n in range(self.backups, 0, -1):
+            source = f"{self.path}.{n - 1}" if n > 1 else self.path
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{n}")
+
+    def flush(self, timeout: float = 2.0):
+        """Wait (bounded) until queued spans are written"""
+        if self._writer is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "recent": len(self.recent)
+        }
+
+
+exporter = JsonlExporter()
+atexit.register(exporter.flush)
+
+
+def set_service(name: str):
+    """Default service name for this process's spans (middleware sets it per request)"""
+    global _service
+    _service = name
+
+
+def current() -> Optional[Span]:
+    return _current.get()
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, root: bool = True, **attributes):
+    """
+    Child span of `parent` (default: the current span); a new trace without one
+
+    Yields the span so callers can add attributes. root=False records only
+    inside an existing trace (library code also used by scripts/CLI) and
+    yields None otherwise.
+    """
+    parent = parent or _current.get()
+    if parent is None and not root:
+        yield None
+        return
+    if parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        trace_id, parent_id, sampled = _new_id(128), None, random.random() < TRACE_SAMPLE
+
+    current_span = Span(
+        trace_id=trace_id,
+        span_id=_new_id(64),
+        parent_id=parent_id,
+        name=name,
+        service=_request_service.get() or _service,
+        start=time.time(),
+        sampled=sampled,
+        attributes=attributes
+    )
+    token = _current.set(current_span)
+    started = time.perf_counter()
+    try:
+        yield current_span
+    except BaseException as e:
+        current_span.status = "error"
+        current_span.attributes.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        current_span.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        _current.reset(token)
+        if TRACING_ENABLED and current_span.sampled:
+            exporter.export(current_span)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Span]:
+    """Remote parent from a traceparent header (None if absent/invalid)"""
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return Span(
+        trace_id=trace_id, span_id=span_id, parent_id=None, name="remote",
+        service="remote", start=0.0, sampled=bool(int(flags, 16) & 1)
+    )
+
+
+def headers() -> Dict[str, str]:
+    """Propagation headers for an outgoing call ({} outside a trace)"""
+    active = _current.get()
+    if active is None:
+        return {}
+    return {TRACEPARENT: active.traceparent(), REQUEST_ID_HEADER: active.trace_id}
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: server span per HTTP request
+
+    Continues the caller's trace from `traceparent` (else starts one) and
+    returns the trace ID as X-Request-ID. Probe endpoints are not traced.
+    """
+
+    def __init__(self, app, service: str, skip_paths: Iterable[str] = ("/health", "/metrics")):
+        self.app = app
+        self.service = service
+        self.skip_paths = set(skip_paths)
+        set_service(service)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            return await self.app(scope, receive, send)
+
+        request_headers = dict(scope["headers"])
+        parent = parse_traceparent(request_headers.get(b"traceparent", b"").decode("latin-1"))
+        token = _request_service.set(self.service)
+
+        with span(f"{scope['method']} {scope['path']}", parent=parent, kind="server") as server_span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    server_span.attributes["status_code"] = message["status"]
+                    if message["status"] >= 500:
+                        server_span.status = "error"
+                    message = {
+                        **message,
+                        "headers": list(message.get("headers", [])) + [
+                            (REQUEST_ID_HEADER.lower().encode(), server_span.trace_id.encode())
+                        ]
+                    }
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _request_service.reset(token)
+
+
+def span_files(paths: Iterable[str], backups: int = TRACE_BACKUPS) -> List[str]:
+    """Span files including their rotated copies, oldest first"""
+    files = []
+    for path in paths:
+        files.extend(f"{path}.{n}" for n in range(backups, 0, -1))
+        files.append(path)
+    return [f for f in files if os.path.exists(f)]
+
+
+def _records(lines: Iterable[str]) -> Iterable[Dict[str, Any]]:
+    """Parsed span lines; partial or corrupt lines (a writer mid-append) are skipped"""
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and "span_id" in record:
+            yield record
+
+
+def read_spans(paths: Iterable[str], tail: int) -> List[Dict[str, Any]]:
+    """The last `tail` spans of each file (blocking file IO - run in a thread)"""
+    spans = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                spans.extend(_records(deque(f, maxlen=tail)))
+        except FileNotFoundError:
+            continue
+    return spans
+
+
+def load_trace(trace_id: str, paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """All spans of one trace from JSONL files (rotated copies included), by start time"""
+    spans = []
+    for path in span_files(paths):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                spans.extend(
+                    record for record in _records(line for line in f if trace_id in line)
+                    if record.get("trace_id") == trace_id
+                )
+        except FileNotFoundError:
+            continue
+    return sorted(spans, key=lambda s: s["start"])
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Spans that determined the trace's duration, depth-first
+
+    Walking back from a span's end: the child that finished last is what
+    the span waited on, then the child that finished before that one
+    started, and so on (sequential hops all count; parallel siblings that
+    finished earlier don't). self_ms = span time not covered by that chain.
+    """
+    if not spans:
+        return []
+    ids = {s["span_id"] for s in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+
+    def end(s):
+        return s["start"] + (s["duration_ms"] or 0) / 1000.0
+
+    path: List[Dict[str, Any]] = []
+
+    def walk(node: Dict[str, Any], depth: int):
+        chain, cursor = [], end(node) + CLOCK_SKEW_SECONDS
+        for child in sorted(children.get(node["span_id"], []), key=end, reverse=True):
+            if end(child) <= cursor:
+                chain.append(child)
+                cursor = child["start"]
+        chain.reverse()
+
+        path.append({
+            "depth": depth,
+            "service": node["service"],
+            "name": node["name"],
+            "duration_ms": node["duration_ms"],
+            "self_ms": round(max(0.0, (node["duration_ms"] or 0) - sum(c["duration_ms"] or 0 for c in chain)), 3),
+            "status": node["status"],
+            "attributes": node.get("attributes", {})
+        })
+        for child in chain:
+            walk(child, depth + 1)
+
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    walk(max(roots, key=lambda s: s["duration_ms"] or 0), 0)
+    return path
@@ -20,7 +20,11 @@ import httpx
 from typing import Dict, List, Optional
 import asyncio
 
+from core import tracing
+from core.tracing import TracingMiddleware
+
 app = FastAPI(title="Lucy Thin Client")
+app.add_middleware(TracingMiddleware, service="thin-client")  # traceparent in/out
 
 # Configuration
 NAS_QDRANT_URL = os.getenv("NAS_QDRANT_URL", "http://192.168.1.129:6333")  # Přes VPN
@@ -52,22 +56,26 @@ async def health():
 async def check_nas_connection() -> bool:
     """Check if NAS is reachable via VPN"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{NAS_QDRANT_URL}/collections", timeout=5.0)
-            return response.status_code == 200
+        with tracing.span("check nas", upstream="qdrant", kind="client"):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    f"{NAS_QDRANT_URL}/collections", headers=tracing.headers(), timeout=5.0
+                )
+                return response.status_code == 200
     except:
         return False
 
 async def check_supabase_connection() -> bool:
     """Check Supabase connection"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SUPABASE_URL}/rest/v1/",
-                headers={"apikey": SUPABASE_KEY},
-                timeout=5.0
-            )
-            return response.status_code in [200, 404]  # 404 is ok (no endpoint)
+        with tracing.span("check supabase", upstream="supabase", kind="client"):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    f"{SUPABASE_URL}/rest/v1/",
+                    headers={"apikey": SUPABASE_KEY, **tracing.headers()},
+                    timeout=5.0
+                )
+                return response.status_code in [200, 404]  # 404 is ok (no endpoint)
     except:
         return False
 
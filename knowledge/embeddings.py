@@ -0,0 +1,418 @@
+"""
+Lucy Embedding Service - shared by KnowledgeBaseManager and MemoryManager
+
+- Pluggable providers (OpenAI, deterministic offline hash embedder)
+- Content-hash keys: the same text is never embedded twice
+- Micro-batching: concurrent embed calls are coalesced into one provider call
+- Local float32 store (SQLite blobs) with LRU eviction, survives restarts
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from queue import Queue, Empty
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_DIM = 1536  # Matches QDRANT_CONFIG vector_size
+EMBED_TIMEOUT_SECONDS = float(os.getenv("LUCY_EMBEDDING_TIMEOUT", "60"))  # Max wait for a batched embedding
+
+
+# ============================================================================
+# PROVIDERS
+# ============================================================================
+
+class EmbeddingProvider:
+    """Base class - turns a batch of texts into float32 vectors"""
+
+    name = "base"
+    dim = EMBEDDING_DIM
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic offline embedder for tests and benchmarks
+
+    Feature hashing of word unigrams + bigrams into `dim` signed buckets,
+    L2-normalized. Texts sharing words get similar vectors.
+    """
+
+    name = "hash"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API (text-embedding-3-small = 1536 dims)"""
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        api_key: Optional[str] = None,
+        timeout: float = float(os.getenv("LUCY_OPENAI_TIMEOUT", "20")),
+        max_retries: int = 1
+    ):
+        from openai import OpenAI
+
+        self.model = model
+        self.name = f"openai:{model}"
+        # The SDK default (600s, 2 retries) outlives every request budget
+        self.client = OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            timeout=timeout,
+            max_retries=max_retries
+        )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        return np.array([d.embedding for d in response.data], dtype=np.float32)
+
+
+# ============================================================================
+# VECTOR STORE
+# ============================================================================
+
+class EmbeddingStore:
+    """
+    Content-hash -> float32 vector store with LRU eviction
+
+    Hot entries live in memory; with a path, vectors persist as float32
+    blobs in SQLite and the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100_000, memory_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS vectors ("
+                    " key TEXT PRIMARY KEY, vector BLOB, last_used REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON vectors(last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up vectors by content key"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+        missing = [k for k in keys if k not in found]
+        if not missing or not self.path:
+            return found
+
+        now = time.time()
+        rows = []
+        with self._connect() as conn:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+            conn.executemany(
+                "UPDATE vectors SET last_used = ? WHERE key = ?",
+                [(now, key) for key, _ in rows]
+            )
+
+        with self._lock:
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                found[key] = vector
+                self._remember(key, vector)
+
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """Store vectors, evicting least recently used beyond max_entries"""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+
+        if not self.path or not vectors:
+            return
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in vectors.items()]
+            )
+            count = conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM vectors WHERE key IN ("
+                    " SELECT key FROM vectors ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class EmbeddingService:
+    """Cached, deduplicating, micro-batching embedding front-end"""
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        store: Optional[EmbeddingStore] = None,
+        batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        timeout: float = EMBED_TIMEOUT_SECONDS
+    ):
+        self.provider = provider
+        self.store = store or EmbeddingStore()
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self.dim = provider.dim
+
+        self._queue: "Queue[Tuple[str, str]]" = Queue()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+        self.stats_counters = {
+            "texts": 0,
+            "store_hits": 0,
+            "deduplicated": 0,
+            "provider_calls": 0,
+            "provider_texts": 0,
+            "provider_errors": 0
+        }
+
+    def content_key(self, text: str) -> str:
+        """Stable key: provider + text hash"""
+        return hashlib.sha256(f"{self.provider.name}\0{text}".encode()).hexdigest()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts -> (n, dim) float32 matrix
+
+        Raises the provider's error, or concurrent.futures.TimeoutError
+        when the batch worker does not answer within `timeout`.
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        keys = [self.content_key(t) for t in texts]
+        unique = dict(zip(keys, texts))
+
+        self.stats_counters["texts"] += len(texts)
+        self.stats_counters["deduplicated"] += len(texts) - len(unique)
+
+        vectors = self.store.get_many(list(unique))
+        self.stats_counters["store_hits"] += len(vectors)
+
+        futures = {
+            key: self._submit(key, text)
+            for key, text in unique.items()
+            if key not in vectors
+        }
+        for key, future in futures.items():
+            vectors[key] = future.result(timeout=self.timeout)
+
+        return np.stack([vectors[k] for k in keys]).astype(np.float32, copy=False)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed single text -> (dim,) float32 vector"""
+        return self.embed([text])[0]
+
+    def _submit(self, key: str, text: str) -> Future:
+        """Queue text for the batch worker; identical in-flight texts share a future"""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                self.stats_counters["deduplicated"] += 1
+                return future
+
+            future = Future()
+            self._pending[key] = future
+            self._queue.put((key, text))
+
+            if self._worker is None:
+                self._start_worker()
+
+        return future
+
+    def _start_worker(self):
+        """Start the batch worker (caller holds self._lock)"""
+        self._worker = threading.Thread(target=self._run, daemon=True, name="lucy-embedder")
+        self._worker.start()
+
+    def _run(self):
+        """Batch worker - drains the queue in micro-batches"""
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=30.0)]
+                except Empty:
+                    # Idle - exit unless something was queued meanwhile
+                    with self._lock:
+                        if self._queue.empty():
+                            self._worker = None
+                            return
+                    continue
+
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except Empty:
+                        break
+
+                try:
+                    self._flush(batch)
+                except Exception as e:
+                    # Bug outside the provider call: fail this batch, keep serving
+                    print(f"⚠️ Embedding batch failed: {e}")
+                    self._resolve([k for k, _ in batch], error=e)
+        finally:
+            # Died unexpectedly: let the next submit (or queued work) get a new worker
+            with self._lock:
+                if self._worker is threading.current_thread():
+                    self._worker = None
+                    if not self._queue.empty():
+                        self._start_worker()
+
+    def _flush(self, batch: List[Tuple[str, str]]):
+        """One provider call; every future in the batch gets a result or the error"""
+        keys = [k for k, _ in batch]
+
+        try:
+            matrix = np.asarray(self.provider.embed([t for _, t in batch]), dtype=np.float32)
+            self.stats_counters["provider_calls"] += 1
+            self.stats_counters["provider_texts"] += len(batch)
+            if matrix.ndim != 2 or len(matrix) != len(batch):
+                raise ValueError(
+                    f"Embedding provider {self.provider.name} returned {len(matrix)} vectors for {len(batch)} texts"
+                )
+            results = dict(zip(keys, matrix))
+            self.store.put_many(results)
+        except Exception as e:
+            self.stats_counters["provider_errors"] += 1
+            self._resolve(keys, error=e)
+            return
+
+        self._resolve(keys, results=results)
+
+    def _resolve(self, keys: List[str], results: Optional[Dict[str, np.ndarray]] = None, error: Optional[Exception] = None):
+        with self._lock:
+            for key in keys:
+                future = self._pending.pop(key, None)
+                if future is None or future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[key])
+
+    def stats(self) -> Dict:
+        """Embedding cache / batching metrics"""
+        return {
+            "provider": self.provider.name,
+            "dim": self.dim,
+            **self.stats_counters,
+            "store_evictions": self.store.evictions
+        }
+
+
+_default_service: Optional[EmbeddingService] = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_service() -> Optional[EmbeddingService]:
+    """
+    Process-wide embedding service, configured from environment
+
+    LUCY_EMBEDDING_PROVIDER   - openai | hash | none
+                                (default: openai when OPENAI_API_KEY is set)
+    LUCY_EMBEDDING_MODEL      - OpenAI model (default text-embedding-3-small)
+    LUCY_EMBEDDING_CACHE_DIR  - persist vectors to <dir>/embeddings.sqlite
+    LUCY_EMBEDDING_CACHE_SIZE - max persisted vectors (default 100000)
+    LUCY_EMBEDDING_TIMEOUT    - max wait for a batched embedding, s (default 60)
+    LUCY_OPENAI_TIMEOUT       - OpenAI request timeout, s (default 20, one retry)
+    """
+    global _default_service
+
+    with _default_lock:
+        if _default_service is not None:
+            return _default_service
+
+        default_provider = "openai" if os.getenv("OPENAI_API_KEY") else "none"
+        provider_name = os.getenv("LUCY_EMBEDDING_PROVIDER", default_provider).lower()
+
+        if provider_name == "openai":
+            provider = OpenAIEmbeddingProvider(
+                model=os.getenv("LUCY_EMBEDDING_MODEL", "text-embedding-3-small")
+            )
+        elif provider_name == "hash":
+            provider = HashEmbeddingProvider()
+        else:
+            return None
+
+        cache_dir = os.getenv("LUCY_EMBEDDING_CACHE_DIR")
+        store = EmbeddingStore(
+            path=str(Path(cache_dir) / "embeddings.sqlite") if cache_dir else None,
+            max_entries=int(os.getenv("LUCY_EMBEDDING_CACHE_SIZE", "100000"))
+        )
+
+        _default_service = EmbeddingService(provider, store)
+        return _default_service
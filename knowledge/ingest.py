@@ -0,0 +1,582 @@
+"""
+Lucy Ingestion Pipeline - incremental loading of local exports into Qdrant
+
+Sources (local export files):
+- email_history     <- mbox (Gmail Takeout etc.)
+- beeper_history    <- JSON chat dumps (file or directory)
+- tech_docs_vectors <- HTML / Markdown documentation trees
+
+Pipeline:
+1. Read items from source, split into chunks
+2. Content-hash each chunk; skip chunks whose hash is in the checkpoint
+3. Embed + upsert changed chunks in batches, several batches in parallel
+4. Checkpoint completed batches every LUCY_INGEST_CHECKPOINT_SECONDS (default
+   30) - a crashed run resumes close to where it stopped
+5. Delete points for chunks and whole items that disappeared from the export,
+   update BM25 index, invalidate caches
+"""
+
+import os
+import json
+import mailbox
+import re
+import time
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from email.header import decode_header, make_header
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, PointIdsList
+
+from knowledge.embeddings import EmbeddingService
+from knowledge.kb_manager import COLLECTION_FIELDS, PREVIEW_CHARS, PREVIEW_FIELD, KnowledgeBaseManager
+from knowledge.storage_profiles import create_collection
+
+CHUNK_CHARS = 2000
+CHUNK_OVERLAP = 200
+CHAT_WINDOW_MESSAGES = 50  # Messages per Beeper conversation item
+CHECKPOINT_SECONDS = float(os.getenv("LUCY_INGEST_CHECKPOINT_SECONDS", "30"))
+
+
+@dataclass
+class SourceItem:
+    """One logical document from an export (email, chat window, doc page)"""
+    item_id: str
+    text: str
+    payload: Dict[str, Any]
+
+
+@dataclass
+class IngestStats:
+    """Throughput report for one ingestion run"""
+    collection: str
+    items_seen: int = 0
+    items_changed: int = 0
+    items_removed: int = 0
+    chunks_seen: int = 0
+    chunks_upserted: int = 0
+    chunks_skipped: int = 0
+    points_deleted: int = 0
+    batches: int = 0
+    errors: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    elapsed: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items_seen / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_upserted / self.elapsed if self.elapsed else 0.0
+
+
+# ============================================================================
+# CHUNKING
+# ============================================================================
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split on paragraph boundaries; hard-split paragraphs longer than max_chars"""
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars - overlap:]
+
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            # Carry a tail of the previous chunk for context
+            current = current[-overlap:] + "\n\n" + paragraph if overlap else paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def content_hash(text: str, payload: Dict[str, Any]) -> str:
+    """Hash of chunk text + metadata - changes when either changes"""
+    body = json.dumps({"t": text, "p": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def point_id_for(collection: str, item_id: str, chunk_index: int) -> str:
+    """Deterministic point ID so re-ingestion overwrites in place"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"lucy:{collection}:{item_id}:{chunk_index}"))
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def _decode(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+class _HTMLText(HTMLParser):
+    """Minimal HTML -> text (drops script/style, keeps <title>)"""
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in ("p", "div", "br", "li", "h1", "h2", "h3", "h4", "pre", "tr"):
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        return re.sub(r"\n{3,}", "\n\n", "".join(self.parts)).strip()
+
+
+def html_to_text(html: str) -> Tuple[str, str]:
+    """Returns (title, text)"""
+    parser = _HTMLText()
+    parser.feed(html)
+    return parser.title.strip(), parser.text()
+
+
+def read_mbox(path: str) -> Iterator[SourceItem]:
+    """Emails from an mbox export"""
+    for message in mailbox.mbox(path):
+        message_id = (message.get("Message-ID") or "").strip()
+
+        body = ""
+        html_body = ""
+        for part in message.walk():
+            if part.is_multipart():
+                continue
+            payload = part.get_payload(decode=True)
+            if payload is None:
+                continue
+            charset = part.get_content_charset() or "utf-8"
+            decoded = payload.decode(charset, errors="replace")
+            if part.get_content_type() == "text/plain":
+                body += decoded
+            elif part.get_content_type() == "text/html":
+                html_body += decoded
+        if not body and html_body:
+            body = html_to_text(html_body)[1]
+
+        # Thread: Gmail thread ID, else root of References, else own ID
+        references = (message.get("References") or "").split()
+        thread_id = (
+            message.get("X-GM-THRID")
+            or (references[0] if references else None)
+            or (message.get("In-Reply-To") or "").strip()
+            or message_id
+        )
+
+        try:
+            date = parsedate_to_datetime(message.get("Date")).isoformat()
+        except Exception:
+            date = message.get("Date")
+
+        subject = _decode(message.get("Subject"))
+        item_id = message_id or hashlib.sha256(f"{subject}{date}{body[:200]}".encode()).hexdigest()
+
+        yield SourceItem(
+            item_id=item_id,
+            text=body,
+            payload={
+                "sender": _decode(message.get("From")),
+                "subject": subject,
+                "date": date,
+                "thread_id": thread_id
+            }
+        )
+
+
+def read_chat_dump(path: str) -> Iterator[SourceItem]:
+    """
+    Beeper chats from JSON dumps
+
+    Accepts a file or a directory of files, each either a list of chats or
+    {"chats": [...]}. A chat: {"id", "name", "network", "participants",
+    "messages": [{"sender", "text", "timestamp"}]}.
+    Chats are split into windows of CHAT_WINDOW_MESSAGES messages, so new
+    messages only touch the last window.
+    """
+    root = Path(path)
+    files = sorted(root.rglob("*.json")) if root.is_dir() else [root]
+
+    for file in files:
+        with open(file) as f:
+            data = json.load(f)
+        chats = data.get("chats", []) if isinstance(data, dict) else data
+
+        for chat in chats:
+            chat_id = str(chat.get("id") or chat.get("name"))
+            messages = chat.get("messages", [])
+
+            for start in range(0, len(messages), CHAT_WINDOW_MESSAGES):
+                window = messages[start:start + CHAT_WINDOW_MESSAGES]
+                lines = [
+                    f"[{m.get('timestamp', '')}] {m.get('sender', '?')}: {m.get('text', '')}"
+                    for m in window
+                ]
+                yield SourceItem(
+                    item_id=f"{chat_id}:{start // CHAT_WINDOW_MESSAGES}",
+                    text="\n".join(lines),
+                    payload={
+                        "chat_name": chat.get("name"),
+                        "network": chat.get("network"),
+                        "participants": chat.get("participants", []),
+                        "message_count": len(window),
+                        "chat_id": chat_id
+                    }
+                )
+
+
+def read_doc_tree(path: str, base_url: str = "") -> Iterator[SourceItem]:
+    """
+    Tech docs from an HTML/Markdown tree
+
+    Layout: <root>/<tool>/.../page.(md|html). The first directory level
+    becomes the `tool` filter value.
+    """
+    root = Path(path)
+    suffixes = {".md", ".markdown", ".html", ".htm"}
+
+    for file in sorted(p for p in root.rglob("*") if p.suffix.lower() in suffixes):
+        relative = file.relative_to(root)
+        raw = file.read_text(errors="replace")
+
+        if file.suffix.lower() in (".html", ".htm"):
+            title, text = html_to_text(raw)
+            doc_type = "html"
+        else:
+            heading = re.search(r"^#\s+(.+)$", raw, re.MULTILINE)
+            title, text = (heading.group(1).strip() if heading else ""), raw
+            doc_type = "markdown"
+
+        yield SourceItem(
+            item_id=str(relative),
+            text=text,
+            payload={
+                "title": title or file.stem,
+                "url": f"{base_url.rstrip('/')}/{relative.as_posix()}" if base_url else relative.as_posix(),
+                "tool": relative.parts[0].lower() if len(relative.parts) > 1 else "general",
+                "type": doc_type
+            }
+        )
+
+
+SOURCE_READERS: Dict[str, Callable[..., Iterator[SourceItem]]] = {
+    "email_history": read_mbox,
+    "beeper_history": read_chat_dump,
+    "tech_docs_vectors": read_doc_tree
+}
+
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+
+class IngestionCheckpoint:
+    """
+    Per-collection ingestion state (JSON)
+
+    points: point_id -> content hash of what is stored in Qdrant
+    items:  item_id  -> point_ids of its chunks
+    stale:  point_ids whose chunks disappeared but are not deleted yet -
+            saved before deleting, so a crashed run's deletions are
+            carried out by the next run instead of orphaning the points
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.points: Dict[str, str] = {}
+        self.items: Dict[str, List[str]] = {}
+        self.stale: Dict[str, None] = {}   # Ordered set
+        self._lock = threading.Lock()
+
+        if path.exists():
+            with open(path) as f:
+                data = json.load(f)
+            self.points = data.get("points", {})
+            self.items = data.get("items", {})
+            self.stale = dict.fromkeys(data.get("stale", []))
+
+    def save(self):
+        with self._lock:
+            data = {
+                "points": self.points,
+                "items": self.items,
+                "stale": list(self.stale),
+                "updated_at": time.time()
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        tmp_path.replace(self.path)
+
+    def mark_stored(self, hashes: Dict[str, str]):
+        with self._lock:
+            self.points.update(hashes)
+
+    def set_item(self, item_id: str, point_ids: List[str]):
+        """Record an item's chunks; chunks it no longer has become stale"""
+        with self._lock:
+            for pid in self.items.get(item_id, []):
+                if pid not in point_ids:
+                    self.stale[pid] = None
+            for pid in point_ids:
+                self.stale.pop(pid, None)
+            self.items[item_id] = point_ids
+
+    def drop_missing(self, seen: set) -> int:
+        """Items not in `seen` left the export: forget them, their chunks become stale"""
+        with self._lock:
+            missing = [item_id for item_id in self.items if item_id not in seen]
+            for item_id in missing:
+                for pid in self.items.pop(item_id):
+                    self.stale[pid] = None
+        return len(missing)
+
+    def mark_deleted(self, point_ids: List[str]):
+        with self._lock:
+            for pid in point_ids:
+                self.points.pop(pid, None)
+                self.stale.pop(pid, None)
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+class IngestionPipeline:
+    """Incremental, batched, resumable ingestion into one collection"""
+
+    def __init__(
+        self,
+        kb: KnowledgeBaseManager,
+        collection: str,
+        embedder: EmbeddingService,
+        state_dir: str = "./data/ingest",
+        batch_size: int = 64,
+        workers: int = 4,
+        checkpoint_seconds: float = CHECKPOINT_SECONDS
+    ):
+        if collection not in COLLECTION_FIELDS:
+            raise ValueError(f"Unknown collection: {collection}")
+        if embedder is None:
+            raise ValueError("Ingestion needs an embedding provider (set LUCY_EMBEDDING_PROVIDER)")
+
+        self.kb = kb
+        self.client: QdrantClient = kb.client
+        self.collection = collection
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint = IngestionCheckpoint(Path(state_dir) / f"{collection}.checkpoint.json")
+
+        # Per-batch version (ms timestamp, strictly increasing) - lets
+        # replicas sync incrementally, also while a run is in progress
+        self._version = 0
+        self._version_lock = threading.Lock()
+
+    def ensure_collection(self):
+        """Create collection + text indexes on first ingestion"""
+        try:
+            self.client.get_collection(self.collection)
+            return
+        except Exception:
+            pass
+
+        # Quantization / on-disk originals per the collection's storage profile
+        create_collection(self.client, self.collection)
+        self.kb.ensure_text_indexes(self.collection)
+
+    def _chunks(self, item: SourceItem) -> List[Tuple[str, str, Dict[str, Any], str]]:
+        """(point_id, text, payload, hash) per chunk of an item"""
+        fields = COLLECTION_FIELDS[self.collection]
+        chunks = []
+
+        for index, text in enumerate(chunk_text(item.text)):
+            payload = {
+                **item.payload,
+                fields["text"]: text,
+                PREVIEW_FIELD: text[:PREVIEW_CHARS],
+                "item_id": item.item_id,
+                "chunk": index
+            }
+            digest = content_hash(text, item.payload)
+            payload["content_hash"] = digest
+            chunks.append((point_id_for(self.collection, item.item_id, index), text, payload, digest))
+
+        return chunks
+
+    def _next_version(self) -> int:
+        with self._version_lock:
+            self._version = max(self._version + 1, int(time.time() * 1000))
+            return self._version
+
+    def _upsert_batch(self, batch: List[Tuple[str, str, Dict[str, Any], str]]) -> Dict[str, str]:
+        """Embed + upsert one batch; returns stored hashes"""
+        vectors = self.embedder.embed([text for _, text, _, _ in batch])
+        version = self._next_version()
+
+        self.client.upsert(
+            collection_name=self.collection,
+            points=[
+                PointStruct(id=pid, vector=vector.tolist(), payload={**payload, "version": version})
+                for (pid, _, payload, _), vector in zip(batch, vectors)
+            ],
+            wait=True
+        )
+        return {pid: digest for pid, _, _, digest in batch}
+
+    def run(self, items: Iterable[SourceItem], progress_every: int = 1000, complete: bool = True) -> IngestStats:
+        """
+        Ingest items; only new or changed chunks are embedded and upserted
+
+        complete: items is the whole export, so checkpointed items missing
+        from it are deleted after the pass (False for partial feeds).
+        """
+        stats = IngestStats(collection=self.collection)
+        self.ensure_collection()
+
+        fields = COLLECTION_FIELDS[self.collection]
+        lexical_added: List[Tuple[str, str, Dict[str, Any]]] = []
+        stored: set = set()  # Point IDs upserted by this run's successful batches
+        seen: set = set()    # Item IDs in this pass
+        last_save = time.monotonic()
+
+        pending: List[Tuple[str, str, Dict[str, Any], str]] = []
+        in_flight: List[Future] = []
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lucy-ingest")
+
+        def collect(block: bool):
+            """Record finished batches in the checkpoint (saved every checkpoint_seconds)"""
+            nonlocal last_save
+            while in_flight and (block or in_flight[0].done()):
+                future = in_flight.pop(0)
+                try:
+                    hashes = future.result()
+                    self.checkpoint.mark_stored(hashes)
+                    stored.update(hashes)
+                    stats.chunks_upserted += len(hashes)
+                    stats.batches += 1
+                except Exception as e:
+                    stats.errors += 1
+                    print(f"Batch upsert failed (will retry next run): {e}")
+            if time.monotonic() - last_save >= self.checkpoint_seconds:
+                self.checkpoint.save()
+                last_save = time.monotonic()
+
+        def submit():
+            nonlocal pending
+            if pending:
+                in_flight.append(executor.submit(self._upsert_batch, pending))
+                pending = []
+            # Bound memory: at most 2 batches queued per worker
+            if len(in_flight) >= self.workers * 2:
+                collect(block=True)
+
+        try:
+            for item in items:
+                stats.items_seen += 1
+                seen.add(item.item_id)
+                chunks = self._chunks(item)
+                stats.chunks_seen += len(chunks)
+
+                self.checkpoint.set_item(item.item_id, [pid for pid, _, _, _ in chunks])
+
+                changed = [c for c in chunks if self.checkpoint.points.get(c[0]) != c[3]]
+                stats.chunks_skipped += len(chunks) - len(changed)
+                if changed:
+                    stats.items_changed += 1
+
+                for chunk in changed:
+                    pid, _, payload, _ = chunk
+                    pending.append(chunk)
+                    lexical_added.append((
+                        pid,
+                        " ".join(str(payload.get(k) or "") for k in fields["search"]),
+                        {k: payload.get(k) for k in fields["filters"]}
+                    ))
+                    if len(pending) >= self.batch_size:
+                        submit()
+
+                collect(block=False)
+
+                if progress_every and stats.items_seen % progress_every == 0:
+                    elapsed = time.monotonic() - stats.started_at
+                    print(f"   {stats.items_seen:,} items, {stats.chunks_upserted:,} chunks upserted "
+                          f"({stats.items_seen / elapsed:.1f} items/s)")
+
+            submit()
+            collect(block=True)
+        finally:
+            executor.shutdown(wait=True)
+
+        if complete:
+            stats.items_removed = self.checkpoint.drop_missing(seen)
+
+        # Includes stale points left over from an interrupted run
+        stale = list(self.checkpoint.stale)
+        if stale:
+            self.checkpoint.save()  # Stale list is durable before deleting
+            self.client.delete(
+                collection_name=self.collection,
+                points_selector=PointIdsList(points=stale)
+            )
+            self.checkpoint.mark_deleted(stale)
+            stats.points_deleted = len(stale)
+        self.checkpoint.save()
+
+        if stats.chunks_upserted or stale:
+            if self.kb.lexical_dir:
+                # Failed batches are retried next run - index only what landed now
+                lexical_added = [e for e in lexical_added if e[0] in stored]
+                self.kb.update_lexical_index(self.collection, lexical_added, stale)
+            self.kb.invalidate_collection(self.collection)
+
+        stats.elapsed = time.monotonic() - stats.started_at
+        return stats
@@ -0,0 +1,487 @@
+"""
+Lucy KB Benchmark - KnowledgeBaseManager without the NAS
+
+- Local in-memory Qdrant stand-in (qdrant-client local mode)
+- Deterministic synthetic email / tech docs / Beeper corpora at the
+  production sizes from QDRANT_CONFIG, ingested through IngestionPipeline
+  with the offline hash embedder (1536-dim)
+- Every search method: p50/p95/p99 latency, Qdrant calls and bytes per query
+- Dense recall@k per precision against NumPy brute force, measured on a
+  Qdrant server (--qdrant-url): local mode always searches exactly
+- Rerank stage quality (nDCG/MRR before vs after) on doc queries labelled
+  by a hidden page focus the reranker features never see
+
+Usage:
+    python -m knowledge.kb_benchmark                  # full size
+    python -m knowledge.kb_benchmark --scale 0.1 -n 50
+    python -m knowledge.kb_benchmark --qdrant-url http://localhost:6333
+"""
+
+import json
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from core.metrics import percentile
+from knowledge.embeddings import EmbeddingService, HashEmbeddingProvider
+from knowledge.ingest import IngestionPipeline, SourceItem
+from knowledge.kb_manager import KnowledgeBaseManager
+from knowledge.reranker import LexicalReranker, RerankStage, evaluate_rerank
+from knowledge.storage_profiles import (
+    SEARCH_PRECISIONS, _wait_green, collection_profile, create_collection, search_params
+)
+from lucy_config import QDRANT_CONFIG
+
+# Production sizes (beeper_history is not indexed yet - assume a modest export)
+CORPUS_SIZES = {
+    "email_history": QDRANT_CONFIG["collections"]["email_history"]["indexed_count"],
+    "tech_docs_vectors": QDRANT_CONFIG["collections"]["tech_docs_vectors"]["indexed_count"],
+    "beeper_history": 2000
+}
+
+PEOPLE = ["andrej", "petra", "martin", "jana", "tomas", "lucie", "david", "eva", "jakub", "klara"]
+COMPANIES = ["premiumgastro", "gastrotech", "horeca", "bistroline", "chefpoint"]
+TOPICS = [
+    "invoice", "delivery", "warranty", "combi oven", "dishwasher", "installation",
+    "price list", "service visit", "order", "payment", "contract", "spare parts",
+    "qdrant", "deployment", "backup", "shopify", "linear", "supabase", "webhook"
+]
+TOOLS = [
+    "qdrant", "mem0", "supabase", "shopify", "linear", "fastapi", "docker", "n8n",
+    "openai", "anthropic", "beeper", "gmail", "cloudflare", "tailscale"
+]
+DOC_TERMS = [
+    "collection", "filter", "payload", "index", "vector", "endpoint", "webhook",
+    "authentication", "rate limit", "pagination", "schema", "migration", "snapshot",
+    "replication", "query", "batch", "timeout", "retry", "token", "deployment"
+]
+NETWORKS = ["whatsapp", "telegram", "signal", "slack", "instagram"]
+
+
+# ============================================================================
+# COUNTING CLIENT
+# ============================================================================
+
+def _payload_size(value: Any) -> int:
+    """Approximate wire size of a client response (JSON bytes)"""
+    def plain(v):
+        if hasattr(v, "model_dump"):
+            return v.model_dump(mode="json")
+        if isinstance(v, (list, tuple)):
+            return [plain(x) for x in v]
+        return v
+
+    try:
+        return len(json.dumps(plain(value), default=str))
+    except Exception:
+        return 0
+
+
+class CountingClient:
+    """QdrantClient proxy counting calls and response bytes per method"""
+
+    def __init__(self, client: QdrantClient):
+        self.client = client
+        self.calls: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+
+    def reset(self):
+        self.calls, self.bytes = {}, {}
+
+    def totals(self) -> Tuple[int, int]:
+        return sum(self.calls.values()), sum(self.bytes.values())
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.bytes[name] = self.bytes.get(name, 0) + _payload_size(result)
+            return result
+
+        return call
+
+
+# ============================================================================
+# SYNTHETIC CORPORA
+# ============================================================================
+
+def _sentence(rng: random.Random, words: List[str], focus: Optional[str] = None) -> str:
+    picked = rng.sample(words, 3)
+    if focus and focus not in picked:
+        picked[rng.randrange(3)] = focus
+    return f"Regarding the {picked[0]}, please check the {picked[1]} and confirm the {picked[2]}."
+
+
+def synthetic_emails(n: int, rng: random.Random) -> Iterator[SourceItem]:
+    """Emails in threads of 1-8 messages, with invoice numbers and Linear IDs"""
+    produced = 0
+    thread = 0
+    while produced < n:
+        thread += 1
+        topic = rng.choice(TOPICS)
+        company = rng.choice(COMPANIES)
+        reference = f"PG-{rng.randint(1, 9999)}" if rng.random() < 0.5 else f"INV-{rng.randint(10000, 99999)}"
+        thread_id = f"<thread-{thread}@{company}.cz>"
+
+        for reply in range(min(rng.randint(1, 8), n - produced)):
+            sender = f"{rng.choice(PEOPLE)}@{company}.cz"
+            body = " ".join(_sentence(rng, TOPICS) for _ in range(rng.randint(3, 40)))
+            yield SourceItem(
+                item_id=f"<msg-{thread}-{reply}@{company}.cz>",
+                text=f"{topic.capitalize()} {reference} for {company}. {body}",
+                payload={
+                    "sender": sender,
+                    "subject": f"{'Re: ' if reply else ''}{topic.capitalize()} {reference}",
+                    "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(7, 19):02d}:00:00",
+                    "thread_id": thread_id
+                }
+            )
+            produced += 1
+
+
+def doc_focus(page: int) -> str:
+    """Hidden subject of a synthetic doc page (the rerank relevance label)"""
+    return DOC_TERMS[(page // len(TOOLS)) % len(DOC_TERMS)]
+
+
+def synthetic_docs(n: int, rng: random.Random) -> Iterator[SourceItem]:
+    """
+    Documentation pages spread over the 14 indexed tools
+
+    Every page is about one focus term: half of its sentences mention it.
+    The title is drawn independently, so it says nothing about the focus.
+    """
+    for i in range(n):
+        tool = TOOLS[i % len(TOOLS)]
+        focus = doc_focus(i)
+        terms = rng.sample(DOC_TERMS, 2)
+        title = f"{tool.capitalize()} {terms[0]} {terms[1]}"
+        body = " ".join(
+            _sentence(rng, DOC_TERMS, focus if rng.random() < 0.5 else None)
+            for _ in range(rng.randint(5, 25))
+        )
+        yield SourceItem(
+            item_id=f"{tool}/page-{i}.md",
+            text=f"# {title}\n\n{body}",
+            payload={
+                "title": title,
+                "url": f"https://docs.example/{tool}/page-{i}",
+                "tool": tool,
+                "type": rng.choice(["markdown", "html"])
+            }
+        )
+
+
+def synthetic_chats(n: int, rng: random.Random) -> Iterator[SourceItem]:
+    """Beeper conversation windows of up to 50 messages"""
+    for i in range(n):
+        participants = rng.sample(PEOPLE, rng.randint(2, 4))
+        lines = [
+            f"[2025-06-{rng.randint(1, 28):02d}] {rng.choice(participants)}: {_sentence(rng, TOPICS)}"
+            for _ in range(rng.randint(5, 50))
+        ]
+        yield SourceItem(
+            item_id=f"chat-{i // 4}:{i % 4}",
+            text="\n".join(lines),
+            payload={
+                "chat_name": f"{participants[0].capitalize()} & co",
+                "network": rng.choice(NETWORKS),
+                "participants": participants,
+                "message_count": len(lines),
+                "chat_id": f"chat-{i // 4}"
+            }
+        )
+
+
+SYNTHETIC_SOURCES: Dict[str, Callable[[int, random.Random], Iterator[SourceItem]]] = {
+    "email_history": synthetic_emails,
+    "tech_docs_vectors": synthetic_docs,
+    "beeper_history": synthetic_chats
+}
+
+
+def build_local_kb(
+    scale: float = 1.0,
+    seed: int = 42,
+    lexical: bool = True,
+    workdir: Optional[str] = None
+) -> Tuple[KnowledgeBaseManager, CountingClient]:
+    """
+    KnowledgeBaseManager over in-memory Qdrant, loaded with synthetic corpora
+
+    The result cache is disabled so every search reaches the (local) client.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="lucy-kb-bench-")
+    client = CountingClient(QdrantClient(":memory:"))
+
+    kb = KnowledgeBaseManager(
+        client=client,
+        embedder=EmbeddingService(HashEmbeddingProvider()),
+        lexical_dir=f"{workdir}/lexical" if lexical else None
+    )
+    kb.cache = None
+
+    for collection, source in SYNTHETIC_SOURCES.items():
+        size = max(1, int(CORPUS_SIZES[collection] * scale))
+        # Local mode isn't thread-safe - one upsert at a time
+        pipeline = IngestionPipeline(
+            kb, collection, kb.embedder, state_dir=f"{workdir}/ingest", batch_size=256, workers=1
+        )
+        stats = pipeline.run(source(size, random.Random(f"{seed}:{collection}")), progress_every=0)
+        print(f"   {collection:20} {size:>6,} items → {stats.chunks_upserted:>6,} points ({stats.elapsed:.1f}s)")
+
+    kb.collections = list(SYNTHETIC_SOURCES)
+    client.reset()
+    return kb, client
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def benchmark_queries(n: int, seed: int = 7) -> List[str]:
+    """Query mix: topics, references, names, doc terms"""
+    rng = random.Random(seed)
+    makers = [
+        lambda: f"{rng.choice(TOPICS)} {rng.choice(COMPANIES)}",
+        lambda: f"PG-{rng.randint(1, 9999)}",
+        lambda: f"{rng.choice(PEOPLE)} {rng.choice(TOPICS)}",
+        lambda: f"{rng.choice(TOOLS)} {rng.choice(DOC_TERMS)}"
+    ]
+    return [makers[i % len(makers)]() for i in range(n)]
+
+
+def benchmark_searches(
+    kb: KnowledgeBaseManager,
+    client: CountingClient,
+    queries: List[str],
+    seed: int = 7
+) -> List[Dict[str, Any]]:
+    """Latency percentiles + Qdrant calls/bytes per query for every search method"""
+    rng = random.Random(seed)
+    thread_ids = [f"<thread-{i}@{c}.cz>" for i in range(1, 50) for c in COMPANIES]
+
+    cases: Dict[str, Callable[[str], Any]] = {
+        "search_emails": lambda q: kb.search_emails(q),
+        "search_emails (per point)": lambda q: kb.search_emails(q, collapse_threads=False),
+        "search_emails (sender filter)": lambda q: kb.search_emails(
+            q, sender=f"{rng.choice(PEOPLE)}@{rng.choice(COMPANIES)}.cz"
+        ),
+        "expand_thread": lambda q: kb.expand_thread(rng.choice(thread_ids)),
+        "search_tech_docs": lambda q: kb.search_tech_docs(q),
+        "search_tech_docs (tool filter)": lambda q: kb.search_tech_docs(q, tool=rng.choice(TOOLS)),
+        "search_beeper": lambda q: kb.search_beeper(q),
+        "search_beeper (network only)": lambda q: kb.search_beeper(network=rng.choice(NETWORKS))
+    }
+
+    rows = []
+    for name, run in cases.items():
+        client.reset()
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            run(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        calls, transferred = client.totals()
+        rows.append({
+            "method": name,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "calls_per_query": round(calls / len(queries), 2),
+            "bytes_per_query": int(transferred / len(queries))
+        })
+    return rows
+
+
+def dense_recall(
+    kb: KnowledgeBaseManager,
+    collection: str,
+    queries: List[str],
+    k: int = 10,
+    server: Optional[QdrantClient] = None
+) -> Dict[str, float]:
+    """
+    Dense recall@k per search precision vs float32 brute force in NumPy
+
+    Local mode ignores HNSW and quantization (every search is exact), so
+    the stored vectors are copied into a scratch collection with the
+    collection's storage profile on a Qdrant server and searched there.
+    Without a server there is nothing to measure and {} is returned.
+    """
+    if server is None:
+        return {}
+
+    ids, vectors, offset = [], [], None
+    while True:
+        points, offset = kb.client.scroll(
+            collection_name=collection, limit=1024, offset=offset,
+            with_payload=False, with_vectors=True
+        )
+        ids.extend(p.id for p in points)
+        vectors.extend(p.vector for p in points)
+        if offset is None:
+            break
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query_vectors = [kb.embedder.embed_one(query) for query in queries]
+
+    # Ties are common with synthetic text: any hit scoring at least the
+    # k-th best brute-force score counts as correct
+    row_of = {point_id: row for row, point_id in enumerate(ids)}
+    depth = min(k, len(ids))
+    truth = []
+    for vector in query_vectors:
+        scores = matrix @ vector
+        kth = np.partition(-scores, depth - 1)[depth - 1]
+        truth.append((scores, -kth - 1e-6))
+
+    profile = collection_profile(collection)
+    scratch = f"{collection}__recall_{uuid.uuid4().hex[:6]}"
+    create_collection(server, scratch, profile)
+
+    recall = {}
+    try:
+        for i in range(0, len(ids), 256):
+            server.upsert(
+                collection_name=scratch,
+                points=[
+                    PointStruct(id=point_id, vector=matrix[row].tolist(), payload={})
+                    for row, point_id in enumerate(ids[i:i + 256], start=i)
+                ],
+                wait=True
+            )
+        _wait_green(server, scratch)
+
+        for precision in SEARCH_PRECISIONS:
+            hits = [
+                sum(
+                    1 for p in server.search(scratch, query_vector=vector.tolist(), limit=k,
+                                             search_params=search_params(profile, precision))
+                    if scores[row_of[p.id]] >= threshold
+                ) / depth
+                for vector, (scores, threshold) in zip(query_vectors, truth)
+            ]
+            recall[precision] = round(float(np.mean(hits)), 4)
+    finally:
+        server.delete_collection(scratch)
+
+    return recall
+
+
+def _is_about(result: Any, tool: str, term: str) -> bool:
+    """Relevance from the page's hidden focus, not from anything the reranker scores"""
+    page = str(result.metadata.get("url") or "").rsplit("page-", 1)[-1]
+    return result.metadata.get("tool") == tool and page.isdigit() and doc_focus(int(page)) == term
+
+
+def rerank_report(kb: KnowledgeBaseManager, n: int = 100, seed: int = 7, k: int = 5) -> Dict[str, Dict]:
+    """
+    Rerank quality on tech docs: default weights vs weights fitted on half
+
+    A doc is relevant to "<tool> <term>" when it belongs to the tool and
+    its hidden focus (see synthetic_docs) is the term. Titles are drawn
+    independently of the focus, so the title feature gets no free signal.
+    """
+    rng = random.Random(seed)
+    labelled = []
+    for _ in range(n):
+        tool, term = rng.choice(TOOLS), rng.choice(DOC_TERMS)
+        labelled.append((
+            f"{tool} {term}",
+            lambda r, tool=tool, term=term: _is_about(r, tool, term)
+        ))
+
+    stage = RerankStage(LexicalReranker(), top_n=20, budget_ms=kb.reranker.budget_ms if kb.reranker else 30.0)
+
+    def first_stage(query):
+        return kb._first_stage_search("tech_docs_vectors", query, {}, stage.top_n)
+
+    train, test = labelled[:n // 2], labelled[n // 2:]
+    report = {"default": evaluate_rerank(stage, first_stage, test, k)}
+
+    examples = []
+    for query, is_relevant in train:
+        results = first_stage(query)
+        examples.append((query, results, [int(is_relevant(r)) for r in results]))
+    stage.reranker.fit(examples)
+
+    report["fitted"] = evaluate_rerank(stage, first_stage, test, k)
+    report["weights"] = dict(stage.reranker.weights)
+    report["stage"] = stage.stats()
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark KnowledgeBaseManager on local synthetic data")
+    parser.add_argument("--scale", type=float, default=1.0, help="Corpus size vs production (default 1.0)")
+    parser.add_argument("-n", "--queries", type=int, default=100, help="Queries per search method")
+    parser.add_argument("-k", type=int, default=10, help="Recall@k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-lexical", action="store_true", help="Dense only (no BM25 index)")
+    parser.add_argument("--qdrant-url", help="Qdrant server for the recall benchmark (scratch collections)")
+    parser.add_argument("--save-weights", help="Write fitted rerank weights here (for LUCY_RERANK_WEIGHTS)")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="lucy-kb-bench-")
+
+    print("🧪 Lucy KB Benchmark (in-memory Qdrant, synthetic corpora)")
+    print("=" * 70)
+    print("\n📥 Loading corpora:")
+    kb, client = build_local_kb(args.scale, args.seed, lexical=not args.no_lexical, workdir=workdir)
+
+    queries = benchmark_queries(args.queries, args.seed)
+
+    print(f"\n⏱️  Search latency ({len(queries)} queries each, mode: {kb._search_mode('email_history')}):")
+    search_rows = benchmark_searches(kb, client, queries, args.seed)
+    for row in search_rows:
+        print(f"   {row['method']:32} p50={row['p50_ms']:7.2f}ms  p95={row['p95_ms']:7.2f}ms  "
+              f"p99={row['p99_ms']:7.2f}ms  {row['calls_per_query']:.1f} calls  "
+              f"{row['bytes_per_query']:>8,} B/query")
+
+    recall = {}
+    if args.qdrant_url:
+        print(f"\n🎯 Dense recall@{args.k} vs NumPy brute force ({args.qdrant_url}):")
+        server = QdrantClient(url=args.qdrant_url)
+        for collection in SYNTHETIC_SOURCES:
+            recall[collection] = dense_recall(kb, collection, queries[:50], args.k, server)
+            print(f"   {collection:20} " + "  ".join(f"{p}={r:.3f}" for p, r in recall[collection].items()))
+    else:
+        print(f"\n🎯 Dense recall@{args.k}: skipped (local mode is always exact - pass --qdrant-url)")
+
+    print("\n🔀 Rerank stage (tech docs, labelled synthetic queries):")
+    rerank = rerank_report(kb, seed=args.seed)
+    for name in ("default", "fitted"):
+        row = rerank[name]
+        print(f"   {name:8} nDCG@5 {row['ndcg@5_before']:.3f} → {row['ndcg@5_after']:.3f}   "
+              f"MRR@5 {row['mrr@5_before']:.3f} → {row['mrr@5_after']:.3f}")
+    stage = rerank["stage"]
+    print(f"   added latency p50={stage['added_ms_p50']:.2f}ms  p95={stage['added_ms_p95']:.2f}ms  "
+          f"skipped={stage['skipped_estimate'] + stage['skipped_deadline']}/{stage['queries']}")
+    if args.save_weights:
+        LexicalReranker(rerank["weights"]).save(args.save_weights)
+        print(f"   fitted weights → {args.save_weights} (set LUCY_RERANK_WEIGHTS to enable reranking)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"searches": search_rows, "recall": recall, "rerank": rerank, "scale": args.scale}, f, indent=2)
+        print(f"\n💾 Results → {args.json}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print("\n✅ Benchmark complete")
@@ -3,11 +3,81 @@ Lucy Knowledge Base Manager
 Handles Qdrant queries and knowledge retrieval for all assistants
 """
 
+import contextvars
+import math
 import os
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Tuple
+from dataclasses import dataclass, asdict
 from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny
+from qdrant_client.models import (
+    Filter, FieldCondition, IsEmptyCondition, MatchValue, MatchAny, MatchText,
+    PayloadField, SetPayload, SetPayloadOperation, TextIndexParams, TokenizerType
+)
+
+from knowledge.search_cache import SearchCache
+from knowledge.embeddings import EmbeddingService, get_embedding_service
+from knowledge.lexical import LexicalIndex, reciprocal_rank_fusion
+from knowledge.replica import FailoverClient, LocalReplica
+from knowledge.reranker import RerankStage
+from knowledge.storage_profiles import (
+    DEFAULT_PRECISION, apply_profile, collection_profile, search_params
+)
+from lucy_config import QDRANT_CONFIG
+from core import deadline, tracing
+from core.response_cache import notify_invalidation
+from core.ttl_cache import TTLCache
+
+# Payload projection - each search pulls only the keys it returns.
+# `preview` is a truncated copy of the text field stored at ingestion time,
+# so results never drag full email bodies / doc pages over the VPN.
+# Full text is fetched lazily by point ID via fetch_content().
+PREVIEW_FIELD = "preview"
+PREVIEW_CHARS = 2000
+
+# Points ingested before previews existed get theirs written back on first
+# hit; until the write lands, previews are served from process memory
+LEGACY_PREVIEW_ENTRIES = 10_000
+
+# Hybrid search: each ranker contributes limit * factor candidates to fusion
+HYBRID_CANDIDATES_FACTOR = 3
+
+# Collapsed search (e.g. one hit per email thread): hits counted per group,
+# capped so a huge thread doesn't cost more than a handful of IDs
+GROUP_HITS_CAP = 20
+GROUP_HITS_FIELD = "group_hits"
+
+# Collection stats are served from a snapshot refreshed in the background;
+# entries older than the staleness bound are flagged (NAS unreachable)
+STATS_REFRESH_SECONDS = 60.0
+STATS_MAX_STALENESS = 300.0
+
+# Failed collection discovery is retried after this long, not on every call
+DISCOVERY_RETRY_SECONDS = 30.0
+
+COLLECTION_FIELDS = {
+    "email_history": {
+        "text": "content",
+        "search": ["content", "subject"],
+        "filters": ["sender", "subject", "thread_id"],
+        "metadata": {"sender": None, "subject": None, "date": None, "thread_id": None}
+    },
+    "tech_docs_vectors": {
+        "text": "content",
+        "search": ["content", "title"],
+        "filters": ["tool", "type"],
+        "metadata": {"title": "", "url": None, "tool": None, "type": None}
+    },
+    "beeper_history": {
+        "text": "conversation",
+        "search": ["conversation"],
+        "filters": ["network"],
+        "metadata": {"chat_name": None, "network": None, "participants": [], "message_count": None}
+    }
+}
 
 @dataclass
 class SearchResult:
@@ -16,22 +86,684 @@ class SearchResult:
     score: float
     metadata: Dict[str, Any]
     source: str  # Collection name
+    point_id: Optional[Any] = None  # For lazy full-content fetch
     
 class KnowledgeBaseManager:
     """Manages all knowledge base operations for Lucy"""
     
-    def __init__(self, qdrant_host: str = "192.168.1.129", qdrant_port: int = 6333):
-        self.client = QdrantClient(host=qdrant_host, port=qdrant_port)
-        self.collections = self._discover_collections()
+    def __init__(
+        self,
+        qdrant_host: str = "192.168.1.129",
+        qdrant_port: int = 6333,
+        cache: Optional[SearchCache] = None,
+        embedder: Optional[EmbeddingService] = None,
+        lexical_dir: Optional[str] = None,
+        replica_dir: Optional[str] = None,
+        client: Optional[Any] = None,
+        reranker: Optional[RerankStage] = None
+    ):
+        # Nothing here touches the network - the client is created and
+        # collections are discovered on first use. A ready client (e.g.
+        # in-memory Qdrant, see kb_benchmark) can be passed instead.
+        self.qdrant_host = qdrant_host
+        self.qdrant_port = qdrant_port
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._collections: Optional[List[str]] = None
+        self._discovery_retry_at = 0.0
+        
+        # Offline replica - reads fail over to it while the NAS is unreachable
+        replica_dir = replica_dir or os.getenv("LUCY_KB_REPLICA_DIR")
+        self.replica = LocalReplica(replica_dir) if replica_dir else None
+        
+        # Stats snapshot: collection -> (stats, updated_at)
+        self._stats: Dict[str, Tuple[Dict, float]] = {}
+        self._stats_lock = threading.Lock()
+        self._stats_ready = threading.Event()
+        self._stats_thread: Optional[threading.Thread] = None
+        
+        # Result cache - configured from LUCY_KB_CACHE_* unless given
+        self.cache = cache if cache is not None else SearchCache.from_env()
         
+        # Query embeddings - without an embedder, searches fall back to
+        # server-side text matching
+        self.embedder = embedder if embedder is not None else get_embedding_service()
+        
+        # Local BM25 indexes (one JSON file per collection), reloaded
+        # when `lucy ingest` rewrites them
+        self.lexical_dir = lexical_dir or os.getenv("LUCY_LEXICAL_INDEX_DIR")
+        self._lexical: Dict[str, Tuple[float, LexicalIndex]] = {}
+        
+        # Second stage for collections with "rerank" in QDRANT_CONFIG
+        self.reranker = reranker if reranker is not None else RerankStage.from_env()
+        
+        # Quantized collections: fast | balanced | exact (see storage_profiles)
+        self.search_precision = os.getenv("LUCY_KB_PRECISION", DEFAULT_PRECISION)
+        
+        # Dense + lexical rankers run concurrently
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lucy-kb")
+        
+        # Legacy points: (collection, point ID) -> preview
+        self._legacy_previews = TTLCache(max_entries=LEGACY_PREVIEW_ENTRIES, ttl_seconds=24 * 3600)
+        
+        # Collections whose full-text indexes exist (created on first text match)
+        self._text_indexed: set = set()
+        
+    @property
+    def client(self):
+        """Qdrant client (wrapped for replica failover), created on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    client = QdrantClient(host=self.qdrant_host, port=self.qdrant_port)
+                    if self.replica is not None:
+                        client = FailoverClient(client, self.replica)
+                    self._client = client
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @property
+    def collections(self) -> List[str]:
+        """Available collections, discovered on first use"""
+        if self._collections is None:
+            return self._discover_collections()
+        return self._collections
+    
+    @collections.setter
+    def collections(self, collections: List[str]):
+        self._collections = collections
+    
     def _discover_collections(self) -> List[str]:
         """Discover available collections"""
+        fallback = self.replica.collections() if self.replica else []
+        if time.monotonic() < self._discovery_retry_at:
+            return fallback
+        
         try:
             collections = self.client.get_collections().collections
-            return [c.name for c in collections]
+            self._collections = [c.name for c in collections]
+            return self._collections
         except Exception as e:
             print(f"Error discovering collections: {e}")
-            return []
+            self._discovery_retry_at = time.monotonic() + DISCOVERY_RETRY_SECONDS
+            return fallback
+    
+    def _payload_keys(self, collection: str) -> List[str]:
+        """Payload keys a search on this collection needs"""
+        fields = COLLECTION_FIELDS[collection]
+        return [PREVIEW_FIELD] + list(fields["metadata"].keys())
+    
+    def _cached_search(
+        self,
+        collection: str,
+        query: Optional[str],
+        filters: Dict[str, Any],
+        limit: int,
+        preview_chars: int = PREVIEW_CHARS,
+        precision: Optional[str] = None,
+        group_by: Optional[str] = None
+    ) -> List[SearchResult]:
+        """
+        Search through the result cache (failures are never cached)
+        
+        The cache holds first-stage results; reranking runs on top, within
+        its own time budget. Gives up (DeadlineExceeded) when the request
+        deadline is already spent.
+        """
+        deadline.check(f"searching {collection}")
+        
+        with tracing.span("kb.search", root=False, collection=collection, mode=self._search_mode(collection)):
+            if query and self._rerank_enabled(collection):
+                results = self._first_stage_search(
+                    collection, query, filters, max(limit, self.reranker.top_n),
+                    preview_chars, precision, group_by
+                )
+                return self.reranker.rerank(query, results)[:limit]
+            
+            return self._first_stage_search(
+                collection, query, filters, limit, preview_chars, precision, group_by
+            )
+    
+    def _rerank_enabled(self, collection: str) -> bool:
+        config = QDRANT_CONFIG["collections"].get(collection, {})
+        return self.reranker is not None and config.get("rerank", False)
+    
+    def _first_stage_search(
+        self,
+        collection: str,
+        query: Optional[str],
+        filters: Dict[str, Any],
+        limit: int,
+        preview_chars: int = PREVIEW_CHARS,
+        precision: Optional[str] = None,
+        group_by: Optional[str] = None
+    ) -> List[SearchResult]:
+        """Cached retrieval (no reranking)"""
+        precision = precision or self.search_precision
+        
+        if self.cache is None:
+            return self._search_collection(
+                collection, query, filters, limit, preview_chars, precision, group_by
+            )
+        
+        key = self.cache.make_key(
+            collection, query, filters,
+            limit=limit,
+            preview_chars=preview_chars,
+            precision=precision,
+            group_by=group_by,
+            mode=self._search_mode(collection)
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            return [SearchResult(**r) for r in cached]
+        
+        results = self._search_collection(
+            collection, query, filters, limit, preview_chars, precision, group_by
+        )
+        if getattr(self.client, "using_replica", False):
+            return results  # Possibly stale - don't let it outlive the outage
+        self.cache.put(key, [asdict(r) for r in results])
+        return results
+    
+    def _search_collection(
+        self,
+        collection: str,
+        query: Optional[str],
+        filters: Dict[str, Any],
+        limit: int,
+        preview_chars: int = PREVIEW_CHARS,
+        precision: Optional[str] = None,
+        group_by: Optional[str] = None
+    ) -> List[SearchResult]:
+        """
+        Filtered search with payload projection
+        
+        Ranked (vector and/or BM25) search when available; otherwise text
+        matching runs server-side (MatchText) instead of pulling every
+        payload and scanning it here. With group_by, only the best hit per
+        group is returned, with the group's hit count in metadata.
+        """
+        fields = COLLECTION_FIELDS[collection]
+        
+        conditions = [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in filters.items()
+            if value is not None
+        ]
+        
+        if query:
+            results = self._hybrid_search(
+                collection, query, filters, conditions, limit, preview_chars,
+                precision, group_by
+            )
+            if results is not None:
+                return results
+        
+        should = None
+        if query:
+            # Tokenized, lowercase matching needs the text indexes
+            self._ensure_text_indexes_once(collection)
+            should = [
+                FieldCondition(key=key, match=MatchText(text=query))
+                for key in fields["search"]
+            ]
+        
+        filter_obj = None
+        if conditions or should:
+            filter_obj = Filter(must=conditions or None, should=should)
+        
+        points = self.client.scroll(
+            collection_name=collection,
+            limit=limit * HYBRID_CANDIDATES_FACTOR if group_by else limit,
+            with_payload=self._payload_keys(collection),
+            with_vectors=False,
+            scroll_filter=filter_obj
+        )[0]
+        
+        if not group_by:
+            return self._to_results(collection, points, preview_chars)
+        
+        best, counts = self._collapse(points, lambda p: (p.payload or {}).get(group_by) or p.id)
+        best = best[:limit]
+        results = self._to_results(collection, [p for _, p in best], preview_chars)
+        for (key, _), result in zip(best, results):
+            result.metadata[GROUP_HITS_FIELD] = counts[key]
+        return results
+    
+    @staticmethod
+    def _collapse(hits: List[Any], key_of) -> Tuple[List[Tuple[Any, Any]], Dict[Any, int]]:
+        """Best hit per group (hits arrive best first) + hits per group"""
+        best: Dict[Any, Any] = {}
+        counts: Dict[Any, int] = {}
+        for hit in hits:
+            key = key_of(hit)
+            counts[key] = counts.get(key, 0) + 1
+            best.setdefault(key, hit)
+        return list(best.items()), counts
+    
+    def _search_mode(self, collection: str) -> str:
+        """Which rankers a query on this collection uses"""
+        dense = self.embedder is not None
+        lexical = self._lexical_index(collection) is not None
+        if dense and lexical:
+            return "hybrid"
+        return "dense" if dense else "lexical" if lexical else "text"
+    
+    def _hybrid_search(
+        self,
+        collection: str,
+        query: str,
+        filters: Dict[str, Any],
+        conditions: List[FieldCondition],
+        limit: int,
+        preview_chars: int,
+        precision: Optional[str] = None,
+        group_by: Optional[str] = None
+    ) -> Optional[List[SearchResult]]:
+        """
+        Dense + lexical search in parallel, fused with reciprocal rank fusion
+        
+        Returns None when no ranker is available (or all failed), so the
+        caller can fall back to server-side text matching. With group_by,
+        each ranker ranks groups (dense groups server-side) and fusion
+        runs over group keys.
+        """
+        index = self._lexical_index(collection)
+        candidates = limit * HYBRID_CANDIDATES_FACTOR
+        
+        # Workers run in a copy of the caller's context (request deadline)
+        submit = lambda fn, *args: self._executor.submit(contextvars.copy_context().run, fn, *args)
+        
+        futures = {}
+        if self.embedder is not None:
+            if group_by:
+                futures["dense"] = submit(
+                    self._dense_search_groups, collection, query, conditions, candidates,
+                    group_by, precision
+                )
+            else:
+                futures["dense"] = submit(
+                    self._dense_search, collection, query, conditions, candidates, precision
+                )
+        if index is not None:
+            futures["lexical"] = submit(
+                index.search, query, candidates * (GROUP_HITS_CAP if group_by else 1), filters
+            )
+        
+        # Ranked keys are point IDs, or group keys when collapsing
+        ranked_lists = {}
+        representative = {}  # key -> best point ID
+        group_hits = {}
+        points_by_id = {}
+        native_scores = {}
+        for name, future in futures.items():
+            try:
+                left = deadline.remaining()
+                hits = future.result(timeout=None if left is None else max(0.0, left))
+            except Exception as e:
+                print(f"{name.capitalize()} search on {collection} failed: {e!r}")
+                continue
+            
+            if name == "dense" and group_by:
+                # Grouped hits come without payload - fetched below for the winners only
+                entries = [(key, point.id, count) for key, point, count in hits]
+                native_scores.update({point.id: point.score for _, point, _ in hits})
+            elif name == "dense":
+                entries = [(p.id, p.id, 1) for p in hits]
+                points_by_id.update({p.id: p for p in hits})
+                native_scores.update({p.id: p.score for p in hits})
+            elif group_by:
+                best, counts = self._collapse(
+                    hits, lambda hit: index.fields(hit[0]).get(group_by) or hit[0]
+                )
+                entries = [(key, hit[0], counts[key]) for key, hit in best[:candidates]]
+                native_scores.update(dict(hits))
+            else:
+                entries = [(pid, pid, 1) for pid, _ in hits]
+                native_scores.update(dict(hits))
+            
+            ranked_lists[name] = [key for key, _, _ in entries]
+            for key, point_id, count in entries:
+                representative.setdefault(key, point_id)
+                group_hits[key] = max(group_hits.get(key, 0), count)
+        
+        if not ranked_lists:
+            return None
+        
+        fused = reciprocal_rank_fusion(ranked_lists, self._fusion_weights(collection))[:limit]
+        key_of = {representative[key]: key for key, _ in fused}
+        
+        # Lexical-only hits still need their (projected) payload
+        missing = [pid for pid in key_of if pid not in points_by_id]
+        if missing:
+            for point in self.client.retrieve(
+                collection_name=collection,
+                ids=missing,
+                with_payload=self._payload_keys(collection),
+                with_vectors=False
+            ):
+                points_by_id[point.id] = point
+        
+        points = [points_by_id[pid] for pid in key_of if pid in points_by_id]
+        results = self._to_results(collection, points, preview_chars)
+        
+        # Single ranker keeps its native score; hybrid reports the fused one
+        if len(ranked_lists) > 1:
+            scores = {representative[key]: score for key, score in fused}
+        else:
+            scores = native_scores
+        for r in results:
+            r.score = scores.get(r.point_id, r.score)
+            if group_by:
+                r.metadata[GROUP_HITS_FIELD] = group_hits[key_of[r.point_id]]
+        
+        return results
+    
+    def _fusion_weights(self, collection: str) -> Dict[str, float]:
+        """Per-collection RRF weights from QDRANT_CONFIG"""
+        config = QDRANT_CONFIG["collections"].get(collection, {})
+        return config.get("fusion_weights", {"dense": 1.0, "lexical": 1.0})
+    
+    def _lexical_path(self, collection: str) -> Optional[Path]:
+        if not self.lexical_dir:
+            return None
+        return Path(self.lexical_dir) / f"{collection}.json"
+    
+    def _lexical_index(self, collection: str) -> Optional[LexicalIndex]:
+        """Load (or reload, if rewritten on disk) the BM25 index for a collection"""
+        path = self._lexical_path(collection)
+        if path is None or not path.exists():
+            return None
+        
+        mtime = path.stat().st_mtime
+        cached = self._lexical.get(collection)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        try:
+            index = LexicalIndex.load(str(path))
+        except Exception as e:
+            print(f"Error loading lexical index for {collection}: {e}")
+            return cached[1] if cached else None
+        
+        self._lexical[collection] = (mtime, index)
+        return index
+    
+    def build_lexical_index(self, collection: str, batch_size: int = 256) -> int:
+        """Build the BM25 index for a collection by scrolling its text once"""
+        path = self._lexical_path(collection)
+        if path is None:
+            raise ValueError("No lexical index dir (set LUCY_LEXICAL_INDEX_DIR)")
+        
+        fields = COLLECTION_FIELDS[collection]
+        index = LexicalIndex()
+        offset = None
+        
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=fields["search"] + fields["filters"],
+                with_vectors=False
+            )
+            for point in points:
+                payload = point.payload or {}
+                index.add(
+                    point.id,
+                    " ".join(str(payload.get(k) or "") for k in fields["search"]),
+                    {k: payload.get(k) for k in fields["filters"]}
+                )
+            if offset is None:
+                break
+        
+        index.save(str(path))
+        self.invalidate_collection(collection)
+        return len(index)
+    
+    def update_lexical_index(
+        self,
+        collection: str,
+        added: List[Tuple[Any, str, Dict[str, Any]]],
+        removed: List[Any]
+    ):
+        """Apply incremental changes (point_id, text, fields) to the BM25 index"""
+        path = self._lexical_path(collection)
+        if path is None:
+            return
+        
+        index = self._lexical_index(collection) or LexicalIndex()
+        for point_id in removed:
+            index.remove(point_id)
+        for point_id, text, fields in added:
+            index.add(point_id, text, fields)
+        
+        index.save(str(path))
+    
+    def _dense_search(
+        self,
+        collection: str,
+        query: str,
+        conditions: List[FieldCondition],
+        limit: int,
+        precision: Optional[str] = None
+    ) -> List[Any]:
+        """Vector search with the query embedding"""
+        return self.client.search(
+            **self._dense_query(collection, query, conditions, precision),
+            limit=limit,
+            with_payload=self._payload_keys(collection),
+            with_vectors=False
+        )
+    
+    def _dense_search_groups(
+        self,
+        collection: str,
+        query: str,
+        conditions: List[FieldCondition],
+        limit: int,
+        group_by: str,
+        precision: Optional[str] = None
+    ) -> List[Tuple[Any, Any, int]]:
+        """
+        Vector search grouped server-side -> (group key, best hit, hit count)
+        
+        Hits carry IDs and scores only. Qdrant leaves points without the
+        group_by field out of groups, so those are searched separately
+        and merged in as groups of one (keyed by point ID).
+        """
+        response = self.client.search_groups(
+            **self._dense_query(collection, query, conditions, precision),
+            group_by=group_by,
+            limit=limit,
+            group_size=GROUP_HITS_CAP,
+            with_payload=False,
+            with_vectors=False
+        )
+        ungrouped = self.client.search(
+            **self._dense_query(
+                collection, query,
+                conditions + [IsEmptyCondition(is_empty=PayloadField(key=group_by))],
+                precision
+            ),
+            limit=limit,
+            with_payload=False,
+            with_vectors=False
+        )
+        
+        groups = [(group.id, group.hits[0], len(group.hits)) for group in response.groups]
+        groups += [(hit.id, hit, 1) for hit in ungrouped]
+        groups.sort(key=lambda group: group[1].score, reverse=True)
+        return groups[:limit]
+    
+    def _dense_query(
+        self,
+        collection: str,
+        query: str,
+        conditions: List[FieldCondition],
+        precision: Optional[str]
+    ) -> Dict[str, Any]:
+        """Common vector search arguments (server timeout from the request deadline)"""
+        vector = self.embedder.embed_one(query)
+        
+        arguments = {
+            "collection_name": collection,
+            "query_vector": vector.tolist(),
+            "query_filter": Filter(must=conditions) if conditions else None,
+            "search_params": search_params(
+                collection_profile(collection), precision or self.search_precision
+            )
+        }
+        left = deadline.remaining()
+        if left is not None:
+            # Qdrant takes whole seconds
+            arguments["timeout"] = max(1, math.ceil(left))
+        return arguments
+    
+    def _to_results(
+        self,
+        collection: str,
+        points: List[Any],
+        preview_chars: int = PREVIEW_CHARS
+    ) -> List[SearchResult]:
+        """Convert projected points to SearchResults"""
+        fields = COLLECTION_FIELDS[collection]
+        
+        # Points ingested before previews existed
+        missing = [p.id for p in points if (p.payload or {}).get(PREVIEW_FIELD) is None]
+        legacy_previews = self._legacy_preview(collection, missing) if missing else {}
+        
+        results = []
+        for point in points:
+            payload = point.payload or {}
+            preview = payload.get(PREVIEW_FIELD)
+            if preview is None:
+                preview = legacy_previews.get(point.id, '')
+            
+            metadata = {
+                key: payload[key] if payload.get(key) is not None else default
+                for key, default in fields["metadata"].items()
+            }
+            
+            score = getattr(point, 'score', None)
+            
+            results.append(SearchResult(
+                content=preview[:preview_chars],
+                score=score if score is not None else 1.0,
+                metadata=metadata,
+                source=collection,
+                point_id=point.id
+            ))
+        
+        return results
+    
+    def _legacy_preview(self, collection: str, point_ids: List[Any]) -> Dict[Any, str]:
+        """
+        Previews for points ingested before previews existed
+        
+        Qdrant can't truncate a payload field server-side, so each legacy
+        point's text crosses the VPN once: its preview is written back to
+        the point (later searches get it from the projection) and kept in
+        memory meanwhile.
+        """
+        previews = {}
+        for point_id in point_ids:
+            preview = self._legacy_previews.get((collection, point_id))
+            if preview is not None:
+                previews[point_id] = preview
+        
+        fetch = [point_id for point_id in point_ids if point_id not in previews]
+        if not fetch:
+            return previews
+        
+        fetched = {
+            point_id: text[:PREVIEW_CHARS]
+            for point_id, text in self.fetch_content(collection, fetch).items()
+        }
+        for point_id, preview in fetched.items():
+            self._legacy_previews.set((collection, point_id), preview)
+        previews.update(fetched)
+        
+        if fetched and not getattr(self.client, "using_replica", False):
+            try:
+                self.client.batch_update_points(
+                    collection_name=collection,
+                    update_operations=[
+                        SetPayloadOperation(set_payload=SetPayload(payload={PREVIEW_FIELD: preview}, points=[point_id]))
+                        for point_id, preview in fetched.items()
+                    ],
+                    wait=False
+                )
+            except Exception as e:
+                print(f"Error writing back previews to {collection}: {e}")
+        
+        return previews
+    
+    def fetch_content(self, collection: str, point_ids: List[Any]) -> Dict[Any, str]:
+        """Fetch full text for points - only when a caller actually needs it"""
+        if not point_ids:
+            return {}
+        
+        text_key = COLLECTION_FIELDS[collection]["text"]
+        
+        try:
+            points = self.client.retrieve(
+                collection_name=collection,
+                ids=list(point_ids),
+                with_payload=[text_key],
+                with_vectors=False
+            )
+            # Replica payloads carry previews only - no entry means "not available here"
+            return {
+                p.id: p.payload[text_key]
+                for p in points
+                if (p.payload or {}).get(text_key) is not None
+            }
+        except Exception as e:
+            print(f"Error fetching content from {collection}: {e}")
+            return {}
+    
+    def get_full_content(self, result: SearchResult) -> str:
+        """Full text for a search result (lazy, by point ID)"""
+        if result.point_id is None:
+            return result.content
+        return self.fetch_content(result.source, [result.point_id]).get(
+            result.point_id, result.content
+        )
+    
+    def ensure_text_indexes(self, collection: str):
+        """
+        Create full-text payload indexes for server-side text matching
+        
+        Without an index MatchText falls back to case-sensitive substring
+        matching; with it, matching is tokenized and lowercase.
+        """
+        for key in COLLECTION_FIELDS[collection]["search"]:
+            self.client.create_payload_index(
+                collection_name=collection,
+                field_name=key,
+                field_schema=TextIndexParams(
+                    type="text",
+                    tokenizer=TokenizerType.WORD,
+                    lowercase=True
+                ),
+                wait=False  # Large collections build it in the background
+            )
+        self._text_indexed.add(collection)
+    
+    def _ensure_text_indexes_once(self, collection: str):
+        """ensure_text_indexes on a collection's first text match (idempotent in Qdrant)"""
+        if collection in self._text_indexed or getattr(self.client, "using_replica", False):
+            return
+        try:
+            self.ensure_text_indexes(collection)
+        except Exception as e:
+            print(f"Error creating text indexes on {collection}: {e}")
+            self._text_indexed.add(collection)  # Don't retry on every search
     
     def search_emails(
         self,
@@ -40,121 +772,69 @@ class KnowledgeBaseManager:
         subject: str = None,
         date_from: str = None,
         date_to: str = None,
-        limit: int = 10
+        limit: int = 10,
+        preview_chars: int = PREVIEW_CHARS,
+        precision: Optional[str] = None,
+        collapse_threads: bool = True
     ) -> List[SearchResult]:
-        """Search email history"""
+        """
+        Search email history
         
-        filters = []
+        By default returns the best hit per thread, with the number of
+        matching hits in that thread as metadata["group_hits"]; use
+        expand_thread() to fetch the rest of a thread.
+        """
         
-        if sender:
-            filters.append(FieldCondition(
-                key="sender",
-                match=MatchValue(value=sender)
-            ))
+        filters = {"sender": sender, "subject": subject}
         
-        if subject:
-            filters.append(FieldCondition(
-                key="subject",
-                match=MatchValue(value=subject)
-            ))
-        
-        # For now, simple text search in payload
-        # TODO: Add vector search with embeddings
         try:
-            points = self.client.scroll(
-                collection_name="email_history",
-                limit=limit,
-                with_payload=True,
-                with_vectors=False
-            )[0]
-            
-            results = []
-            for point in points:
-                # Simple text matching for now
-                payload = point.payload
-                if query:
-                    content = payload.get('content', '') + ' ' + payload.get('subject', '')
-                    if query.lower() not in content.lower():
-                        continue
-                
-                results.append(SearchResult(
-                    content=payload.get('content', ''),
-                    score=1.0,  # Placeholder
-                    metadata={
-                        'sender': payload.get('sender'),
-                        'subject': payload.get('subject'),
-                        'date': payload.get('date'),
-                        'thread_id': payload.get('thread_id')
-                    },
-                    source='email_history'
-                ))
-            
-            return results[:limit]
+            return self._cached_search(
+                "email_history", query, filters, limit, preview_chars, precision,
+                group_by="thread_id" if collapse_threads else None
+            )
             
         except Exception as e:
             print(f"Error searching emails: {e}")
             return []
     
+    def expand_thread(
+        self,
+        thread_id: str,
+        limit: int = 50,
+        preview_chars: int = PREVIEW_CHARS
+    ) -> List[SearchResult]:
+        """All messages of an email thread, oldest first (filter-only, cached)"""
+        
+        try:
+            results = self._cached_search(
+                "email_history", None, {"thread_id": thread_id}, limit, preview_chars
+            )
+            return sorted(results, key=lambda r: r.metadata.get("date") or "")
+            
+        except Exception as e:
+            print(f"Error expanding thread {thread_id}: {e}")
+            return []
+    
     def search_tech_docs(
         self,
         query: str,
         tool: str = None,
         doc_type: str = None,
-        limit: int = 5
+        limit: int = 5,
+        preview_chars: int = PREVIEW_CHARS,
+        precision: Optional[str] = None
     ) -> List[SearchResult]:
         """Search technical documentation"""
         
         try:
-            # Build filter
-            must_conditions = []
-            
-            if tool:
-                must_conditions.append(FieldCondition(
-                    key="tool",
-                    match=MatchValue(value=tool.lower())
-                ))
-            
-            if doc_type:
-                must_conditions.append(FieldCondition(
-                    key="type",
-                    match=MatchValue(value=doc_type)
-                ))
-            
-            filter_obj = Filter(must=must_conditions) if must_conditions else None
-            
-            # For now, scroll and filter (TODO: proper vector search)
-            points = self.client.scroll(
-                collection_name="tech_docs_vectors",
-                limit=limit * 3,  # Get more to filter
-                with_payload=True,
-                with_vectors=False,
-                scroll_filter=filter_obj
-            )[0]
-            
-            results = []
-            for point in points:
-                payload = point.payload
-                content = payload.get('content', '')
-                title = payload.get('title', '')
-                
-                # Simple text matching
-                if query.lower() in content.lower() or query.lower() in title.lower():
-                    results.append(SearchResult(
-                        content=content[:2000],  # Limit content
-                        score=1.0,  # Placeholder
-                        metadata={
-                            'title': title,
-                            'url': payload.get('url'),
-                            'tool': payload.get('tool'),
-                            'type': payload.get('type')
-                        },
-                        source='tech_docs_vectors'
-                    ))
-                
-                if len(results) >= limit:
-                    break
+            filters = {
+                "tool": tool.lower() if tool else None,
+                "type": doc_type
+            }
             
-            return results
+            return self._cached_search(
+                "tech_docs_vectors", query, filters, limit, preview_chars, precision
+            )
             
         except Exception as e:
             print(f"Error searching tech docs: {e}")
@@ -165,7 +845,9 @@ class KnowledgeBaseManager:
         query: str = None,
         network: str = None,
         participant: str = None,
-        limit: int = 10
+        limit: int = 10,
+        preview_chars: int = PREVIEW_CHARS,
+        precision: Optional[str] = None
     ) -> List[SearchResult]:
         """Search Beeper chat history"""
         
@@ -174,50 +856,62 @@ class KnowledgeBaseManager:
             if "beeper_history" not in self.collections:
                 return []
             
-            must_conditions = []
-            
-            if network:
-                must_conditions.append(FieldCondition(
-                    key="network",
-                    match=MatchValue(value=network)
-                ))
-            
-            filter_obj = Filter(must=must_conditions) if must_conditions else None
-            
-            points = self.client.scroll(
-                collection_name="beeper_history",
-                limit=limit,
-                with_payload=True,
-                with_vectors=False,
-                scroll_filter=filter_obj
-            )[0]
-            
-            results = []
-            for point in points:
-                payload = point.payload
-                conversation = payload.get('conversation', '')
-                
-                if query and query.lower() not in conversation.lower():
-                    continue
-                
-                results.append(SearchResult(
-                    content=conversation[:2000],
-                    score=1.0,
-                    metadata={
-                        'chat_name': payload.get('chat_name'),
-                        'network': payload.get('network'),
-                        'participants': payload.get('participants', []),
-                        'message_count': payload.get('message_count')
-                    },
-                    source='beeper_history'
-                ))
-            
-            return results
+            return self._cached_search(
+                "beeper_history", query, {"network": network}, limit, preview_chars,
+                precision
+            )
             
         except Exception as e:
             print(f"Error searching Beeper: {e}")
             return []
     
+    def apply_storage_profile(self, collection: str, profile: Optional[str] = None):
+        """Switch a collection to its (or the given) storage profile"""
+        profile = profile or collection_profile(collection)
+        try:
+            apply_profile(self.client, collection, profile)
+            print(f"✅ {collection} storage profile → {profile}")
+        except Exception as e:
+            print(f"Error applying storage profile to {collection}: {e}")
+    
+    def sync_replica(self, collections: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Incrementally sync collections into the local replica"""
+        if self.replica is None:
+            raise ValueError("No replica dir (set LUCY_KB_REPLICA_DIR)")
+        
+        results = {}
+        for collection in collections or [c for c in COLLECTION_FIELDS if c in self.collections]:
+            fields = COLLECTION_FIELDS[collection]
+            try:
+                results[collection] = self.replica.sync(
+                    self.client.remote,
+                    collection,
+                    payload_keys=self._payload_keys(collection) + fields["filters"],
+                    field_keys=list(dict.fromkeys(fields["filters"] + list(fields["metadata"])))
+                )
+            except Exception as e:
+                print(f"Error syncing replica of {collection}: {e}")
+                results[collection] = {"error": str(e)}
+        return results
+    
+    def invalidate_collection(self, collection: str):
+        """Drop cached results for a collection (call after ingestion)"""
+        if self.cache:
+            self.cache.bump_version(collection)
+        notify_invalidation(collections=[collection])  # Orchestrator response cache
+    
+    def get_rerank_stats(self) -> Dict:
+        """Rerank stage latency / effect metrics"""
+        if self.reranker is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.reranker.stats()}
+    
+    def get_cache_stats(self) -> Dict:
+        """Search cache hit/miss metrics"""
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+    
     def get_collection_stats(self, collection_name: str) -> Dict:
         """Get statistics for a collection"""
         try:
@@ -232,11 +926,62 @@ class KnowledgeBaseManager:
         except Exception as e:
             return {'error': str(e)}
     
-    def get_all_stats(self) -> Dict[str, Dict]:
-        """Get stats for all collections"""
+    def refresh_stats(self):
+        """Re-discover collections and fetch their stats (one round-trip each)"""
+        self._discovery_retry_at = 0.0
+        collections = self._discover_collections()
+        
+        for collection in collections:
+            stat = self.get_collection_stats(collection)
+            with self._stats_lock:
+                # A failed refresh keeps the last good numbers (they age into "stale")
+                previous = self._stats.get(collection)
+                if 'error' in stat and previous is not None and 'error' not in previous[0]:
+                    continue
+                self._stats[collection] = (stat, time.time())
+        
+        self._stats_ready.set()
+    
+    def _stats_loop(self):
+        """Background refresher"""
+        while True:
+            try:
+                self.refresh_stats()
+            except Exception as e:
+                print(f"Error refreshing collection stats: {e}")
+            time.sleep(STATS_REFRESH_SECONDS)
+    
+    def get_all_stats(self, wait: bool = False, timeout: float = 10.0) -> Dict[str, Dict]:
+        """
+        Get stats for all collections from the background-refreshed snapshot
+        
+        Never waits on the NAS, except with wait=True before the first
+        snapshot exists (one-shot CLI use). Each entry carries age_seconds
+        and stale (older than STATS_MAX_STALENESS).
+        """
+        if self._stats_thread is None:
+            with self._stats_lock:
+                if self._stats_thread is None:
+                    self._stats_thread = threading.Thread(
+                        target=self._stats_loop, daemon=True, name="lucy-kb-stats"
+                    )
+                    self._stats_thread.start()
+        
+        if wait:
+            self._stats_ready.wait(timeout)
+        
+        now = time.time()
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        
         stats = {}
-        for collection in self.collections:
-            stats[collection] = self.get_collection_stats(collection)
+        for collection, (stat, updated_at) in snapshot.items():
+            age = now - updated_at
+            stats[collection] = {
+                **stat,
+                'age_seconds': round(age, 1),
+                'stale': age > STATS_MAX_STALENESS
+            }
         return stats
     
     def search_cross_collection(
@@ -268,7 +1013,7 @@ if __name__ == "__main__":
     
     # Show stats
     print("\n📊 Collection Statistics:")
-    stats = kb.get_all_stats()
+    stats = kb.get_all_stats(wait=True)
     for name, stat in stats.items():
         if 'error' in stat:
             print(f"   ❌ {name}: {stat['error']}")
@@ -0,0 +1,173 @@
+"""
+Lucy Lexical Index - local BM25 over payload text
+
+Complements vector search for exact names, invoice numbers and Linear IDs
+("PG-123") that embeddings handle poorly. One index per collection,
+persisted as JSON next to the other local KB state.
+"""
+
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Words plus joined identifiers: "PG-123", "v1.7.3", "petr@premiumgastro.cz"
+TOKEN_RE = re.compile(r"\w+(?:[-./@]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens; compound identifiers also yield their parts"""
+    tokens = []
+    for match in TOKEN_RE.findall((text or "").lower()):
+        tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(re.findall(r"\w+", match))
+    return tokens
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Dict[str, List[Any]],
+    weights: Optional[Dict[str, float]] = None,
+    k: int = 60
+) -> List[Tuple[Any, float]]:
+    """
+    Fuse ranked ID lists: score(d) = sum_i w_i / (k + rank_i(d))
+
+    Returns (id, fused_score) sorted best first.
+    """
+    weights = weights or {}
+    scores: Dict[Any, float] = defaultdict(float)
+
+    for name, ids in ranked_lists.items():
+        weight = weights.get(name, 1.0)
+        for rank, point_id in enumerate(ids, start=1):
+            scores[point_id] += weight / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """In-memory BM25 index with equality filters on stored metadata"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        # point_id -> {"len": int, "tf": {term: count}, "fields": {...}}
+        self.docs: Dict[Any, Dict] = {}
+        self.postings: Dict[str, Dict[Any, int]] = defaultdict(dict)
+        self.total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, point_id: Any, text: str, fields: Optional[Dict[str, Any]] = None):
+        """Index (or re-index) a point"""
+        tf = Counter(tokenize(text))
+
+        with self._lock:
+            self._remove(point_id)
+            self.docs[point_id] = {
+                "len": sum(tf.values()),
+                "tf": dict(tf),
+                "fields": fields or {}
+            }
+            self.total_len += self.docs[point_id]["len"]
+            for term, count in tf.items():
+                self.postings[term][point_id] = count
+
+    def remove(self, point_id: Any):
+        """Drop a point from the index"""
+        with self._lock:
+            self._remove(point_id)
+
+    def _remove(self, point_id: Any):
+        doc = self.docs.pop(point_id, None)
+        if doc is None:
+            return
+        self.total_len -= doc["len"]
+        for term in doc["tf"]:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(point_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Any, float]]:
+        """BM25 top-k as (point_id, score)"""
+        terms = set(tokenize(query))
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs or not terms:
+                return []
+
+            avg_len = self.total_len / n_docs
+            scores: Dict[Any, float] = defaultdict(float)
+
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for point_id, tf in posting.items():
+                    doc_len = self.docs[point_id]["len"]
+                    norm = tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+                    scores[point_id] += idf * tf * (self.k1 + 1) / norm
+
+            if filters:
+                scores = {
+                    pid: score for pid, score in scores.items()
+                    if all(self.docs[pid]["fields"].get(k) == v for k, v in filters.items())
+                }
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def fields(self, point_id: Any) -> Dict[str, Any]:
+        """Stored metadata for a point"""
+        doc = self.docs.get(point_id)
+        return doc["fields"] if doc else {}
+
+    def save(self, path: str):
+        """Persist index as JSON (postings are rebuilt on load)"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {
+                "k1": self.k1,
+                "b": self.b,
+                "docs": [
+                    {"id": pid, "tf": doc["tf"], "fields": doc["fields"]}
+                    for pid, doc in self.docs.items()
+                ]
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        Path(tmp_path).replace(path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Load index saved with save()"""
+        with open(path) as f:
+            data = json.load(f)
+
+        index = cls(k1=data.get("k1", 1.2), b=data.get("b", 0.75))
+        for doc in data["docs"]:
+            pid, tf = doc["id"], doc["tf"]
+            index.docs[pid] = {"len": sum(tf.values()), "tf": tf, "fields": doc["fields"]}
+            index.total_len += index.docs[pid]["len"]
+            for term, count in tf.items():
+                index.postings[term][pid] = count
+        return index
@@ -0,0 +1,699 @@
+"""
+Lucy KB Replica - offline copy of knowledge collections
+
+When the VPN to the NAS drops, searches fall back to a local replica:
+- Vectors in a memory-mapped float32 file, compact payloads in SQLite
+- In-process ANN: IVF (k-means lists over NumPy), brute force when small
+- Incremental sync by the per-batch `version` payload field written at ingestion
+- FailoverClient stands in for QdrantClient and switches automatically
+
+Layout per collection: <replica_dir>/<collection>/
+    vectors.f32    - row-major float32, normalized (cosine)
+    points.sqlite  - point ID -> row, filter fields, compact payload
+    ivf.npz        - IVF centroids + inverted lists
+    meta.json      - dim, rows, last synced version
+
+Usage:
+    python -m knowledge.replica sync [collection ...]
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from qdrant_client.http.exceptions import ResponseHandlingException
+from qdrant_client.models import (
+    CountResult, FieldCondition, Filter, GroupsResult, IsEmptyCondition, MatchAny, MatchText,
+    MatchValue, PayloadField, PointGroup, Range, Record, ScoredPoint
+)
+
+# Below this many points, exact search over the memmap is fast enough
+BRUTE_FORCE_MAX = 20000
+
+# Rewrite the vectors file when this share of rows is dead (updated/deleted)
+COMPACT_RATIO = 0.25
+
+# Incremental sync re-reads this much before the last synced version: an
+# ingest batch is stamped when its upsert starts and may land later
+SYNC_OVERLAP_MS = 10 * 60 * 1000
+
+# Errors meaning "NAS unreachable" (not "bad request")
+REMOTE_ERRORS = (ResponseHandlingException, httpx.TransportError, ConnectionError, TimeoutError)
+
+
+# ============================================================================
+# IVF INDEX
+# ============================================================================
+
+class IVFIndex:
+    """Inverted-file ANN index: vectors bucketed by nearest k-means centroid"""
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, rows: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets  # List i = rows[offsets[i]:offsets[i + 1]]
+        self.rows = rows
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        rows: np.ndarray,
+        n_lists: Optional[int] = None,
+        iterations: int = 8,
+        sample_size: int = 20000,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """k-means on a sample, then assign every live row to its nearest centroid"""
+        rng = np.random.default_rng(seed)
+        n_lists = n_lists or max(1, int(np.sqrt(len(rows))))
+
+        sample = np.asarray(vectors[np.sort(rng.choice(rows, min(sample_size, len(rows)), replace=False))])
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(n_lists):
+                members = sample[assign == i]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[i] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assign = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), 8192):
+            chunk = rows[start:start + 8192]
+            assign[start:start + 8192] = np.argmax(vectors[chunk] @ centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(n_lists + 1))
+        return cls(centroids.astype(np.float32), offsets, rows[order])
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        """Rows in the n_probe lists closest to the query"""
+        nearest = np.argsort(-(self.centroids @ query))[:n_probe]
+        return np.concatenate([self.rows[self.offsets[i]:self.offsets[i + 1]] for i in nearest])
+
+    def save(self, path: Path):
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, centroids=self.centroids, offsets=self.offsets, rows=self.rows)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        data = np.load(path)
+        return cls(data["centroids"], data["offsets"], data["rows"])
+
+
+# ============================================================================
+# FILTERS
+# ============================================================================
+
+def _matches(filter_obj: Optional[Filter], values: Dict[str, Any]) -> bool:
+    """Evaluate the subset of Qdrant filters Lucy uses (MatchValue/Any/Text, Range, IsEmpty)"""
+    if filter_obj is None:
+        return True
+
+    must = filter_obj.must or []
+    should = filter_obj.should or []
+
+    if not all(_condition(c, values) for c in must):
+        return False
+    return not should or any(_condition(c, values) for c in should)
+
+
+def _condition(condition: FieldCondition, values: Dict[str, Any]) -> bool:
+    if isinstance(condition, IsEmptyCondition):
+        return values.get(condition.is_empty.key) in (None, "", [])
+
+    value = values.get(condition.key)
+
+    if condition.range is not None:
+        r = condition.range
+        return value is not None and all((
+            r.gt is None or value > r.gt,
+            r.gte is None or value >= r.gte,
+            r.lt is None or value < r.lt,
+            r.lte is None or value <= r.lte
+        ))
+
+    match = condition.match
+    if isinstance(match, MatchValue):
+        return value == match.value
+    if isinstance(match, MatchAny):
+        return value in match.any
+    if isinstance(match, MatchText):
+        # Compact payloads keep the preview instead of full text fields
+        if value is None:
+            value = values.get("preview")
+        text = str(value or "").lower()
+        return all(token in text for token in match.text.lower().split())
+
+    raise ValueError(f"Unsupported replica filter: {condition}")
+
+
+# ============================================================================
+# REPLICA COLLECTION
+# ============================================================================
+
+class ReplicaCollection:
+    """One collection: memmapped vectors + SQLite payloads + IVF index"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.db_path = path / "points.sqlite"
+        self.meta_path = path / "meta.json"
+        self.vectors_path = path / "vectors.f32"
+        self.ivf_path = path / "ivf.npz"
+
+        self._lock = threading.RLock()
+        self._loaded_mtime: Optional[float] = None
+
+        self.meta: Dict[str, Any] = {}
+        self.vectors: Optional[np.ndarray] = None
+        self.row_keys: List[Optional[str]] = []   # Row -> point key (None = dead row)
+        self.row_fields: List[Dict[str, Any]] = []
+        self.key_rows: Dict[str, int] = {}
+        self.ivf: Optional[IVFIndex] = None
+
+    @property
+    def exists(self) -> bool:
+        return self.meta_path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            " key TEXT PRIMARY KEY, row INTEGER, version INTEGER, fields TEXT, payload TEXT)"
+        )
+        return conn
+
+    def refresh(self):
+        """(Re)load when a sync - possibly in another process - has finished"""
+        with self._lock:
+            try:
+                mtime = self.meta_path.stat().st_mtime
+            except FileNotFoundError:
+                return
+            if mtime == self._loaded_mtime:
+                return
+
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+
+            n_rows, dim = self.meta["rows"], self.meta["dim"]
+            self.vectors = (
+                np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+                if n_rows else np.zeros((0, dim), dtype=np.float32)
+            )
+
+            self.row_keys = [None] * n_rows
+            self.row_fields = [{}] * n_rows
+            with self._connect() as conn:
+                for key, row, fields in conn.execute("SELECT key, row, fields FROM points"):
+                    self.row_keys[row] = key
+                    self.row_fields[row] = json.loads(fields)
+            self.key_rows = {key: row for row, key in enumerate(self.row_keys) if key is not None}
+
+            self.ivf = IVFIndex.load(self.ivf_path) if self.ivf_path.exists() else None
+            self._loaded_mtime = mtime
+
+    def __len__(self) -> int:
+        return len(self.key_rows)
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def sync(
+        self,
+        remote,
+        collection: str,
+        payload_keys: List[str],
+        field_keys: List[str],
+        batch_size: int = 256,
+        prune: bool = True
+    ) -> Dict[str, int]:
+        """
+        Pull points changed since the last sync
+
+        Ingestion stamps each batch with the time it was written, so a
+        sync pulls versions >= (last synced version - SYNC_OVERLAP_MS):
+        batches stamped before the previous sync but stored after it are
+        still picked up. Points without a version are re-checked every
+        sync. Points whose version (unversioned: payload) is unchanged are
+        skipped before their vectors are fetched. The first sync copies
+        everything. prune=True also drops local points deleted remotely
+        (one ID-only scroll).
+        """
+        with self._lock:
+            self.refresh()
+            last_version = self.meta.get("version")
+            dim = self.meta.get("dim")
+            n_rows = self.meta.get("rows", 0)
+
+            if last_version is None:
+                filters = [None]
+            else:
+                filters = [
+                    Filter(must=[FieldCondition(key="version", range=Range(gte=last_version - SYNC_OVERLAP_MS))]),
+                    Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="version"))])
+                ]
+
+            # Drop rows appended by an interrupted sync (never recorded in meta)
+            if self.vectors_path.exists():
+                os.truncate(self.vectors_path, n_rows * (dim or 0) * 4)
+
+            stats = {"upserted": 0, "unchanged": 0, "deleted": 0}
+            max_version = last_version or 0
+
+            with self._connect() as conn, open(self.vectors_path, "ab") as vector_file:
+                for scroll_filter in filters:
+                    offset = None
+                    while True:
+                        points, offset = remote.scroll(
+                            collection_name=collection,
+                            scroll_filter=scroll_filter,
+                            limit=batch_size,
+                            offset=offset,
+                            with_payload=payload_keys + ["version"],
+                            with_vectors=False
+                        )
+                        max_version = max([max_version] + [
+                            (p.payload or {}).get("version") or 0 for p in points
+                        ])
+
+                        changed = self._changed(conn, points)
+                        stats["unchanged"] += len(points) - len(changed)
+                        if changed:
+                            vectors = {
+                                json.dumps(p.id): p.vector
+                                for p in remote.retrieve(
+                                    collection_name=collection,
+                                    ids=[p.id for p in changed],
+                                    with_payload=False,
+                                    with_vectors=True
+                                )
+                            }
+                            changed = [p for p in changed if json.dumps(p.id) in vectors]
+
+                        if changed:
+                            matrix = np.asarray([vectors[json.dumps(p.id)] for p in changed], dtype=np.float32)
+                            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                            norms[norms == 0] = 1.0
+                            matrix /= norms
+                            dim = dim or matrix.shape[1]
+                            vector_file.write(matrix.tobytes())
+
+                            # Updated points get a new row; the old one becomes dead
+                            conn.executemany(
+                                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?)",
+                                [
+                                    (
+                                        json.dumps(p.id),
+                                        n_rows + i,
+                                        (p.payload or {}).get("version"),
+                                        json.dumps({k: (p.payload or {}).get(k) for k in field_keys}),
+                                        self._compact_payload(p)
+                                    )
+                                    for i, p in enumerate(changed)
+                                ]
+                            )
+                            n_rows += len(changed)
+                            stats["upserted"] += len(changed)
+
+                        if offset is None:
+                            break
+
+                if prune and last_version is not None:
+                    stats["deleted"] = self._prune(conn, remote, collection, batch_size * 4)
+
+            live = self._live_rows(n_rows)
+            if dim and n_rows and len(live) < n_rows * (1 - COMPACT_RATIO):
+                n_rows = self._compact(dim, n_rows)
+                live = self._live_rows(n_rows)
+
+            vectors = (
+                np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+                if n_rows else None
+            )
+            if vectors is not None and len(live) > BRUTE_FORCE_MAX:
+                IVFIndex.build(vectors, live).save(self.ivf_path)
+            elif self.ivf_path.exists():
+                self.ivf_path.unlink()
+
+            self._write_meta({"dim": dim, "rows": n_rows, "version": max_version, "synced_at": time.time()})
+            self.refresh()
+
+            stats["points"] = len(self)
+            return stats
+
+    @staticmethod
+    def _compact_payload(point) -> str:
+        return json.dumps({k: v for k, v in (point.payload or {}).items() if k != "version"}, sort_keys=True)
+
+    def _changed(self, conn: sqlite3.Connection, points: List[Any]) -> List[Any]:
+        """Points not stored locally with the same version (unversioned: same payload)"""
+        if not points:
+            return []
+        keys = [json.dumps(p.id) for p in points]
+        placeholders = ",".join("?" * len(keys))
+        stored = {
+            key: (version, payload)
+            for key, version, payload in conn.execute(
+                f"SELECT key, version, payload FROM points WHERE key IN ({placeholders})", keys
+            )
+        }
+
+        changed = []
+        for key, point in zip(keys, points):
+            version = (point.payload or {}).get("version")
+            if key in stored:
+                stored_version, stored_payload = stored[key]
+                if version is not None and version == stored_version:
+                    continue
+                if version is None and stored_version is None and stored_payload == self._compact_payload(point):
+                    continue
+            changed.append(point)
+        return changed
+
+    def _prune(self, conn: sqlite3.Connection, remote, collection: str, batch_size: int) -> int:
+        """Drop local points that no longer exist remotely"""
+        remote_keys = set()
+        offset = None
+        while True:
+            points, offset = remote.scroll(
+                collection_name=collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            remote_keys.update(json.dumps(p.id) for p in points)
+            if offset is None:
+                break
+
+        stale = [(key,) for (key,) in conn.execute("SELECT key FROM points") if key not in remote_keys]
+        conn.executemany("DELETE FROM points WHERE key = ?", stale)
+        return len(stale)
+
+    def _live_rows(self, n_rows: int) -> np.ndarray:
+        with self._connect() as conn:
+            rows = [row for (row,) in conn.execute("SELECT row FROM points ORDER BY row")]
+        return np.asarray([r for r in rows if r < n_rows], dtype=np.int64)
+
+    def _compact(self, dim: int, n_rows: int) -> int:
+        """Rewrite vectors without dead rows; returns the new row count"""
+        old = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+
+        with self._connect() as conn:
+            mapping = conn.execute("SELECT key, row FROM points ORDER BY row").fetchall()
+
+            tmp_path = self.vectors_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(mapping), 8192):
+                    rows = [row for _, row in mapping[start:start + 8192]]
+                    f.write(np.asarray(old[rows]).tobytes())
+            tmp_path.replace(self.vectors_path)
+
+            conn.executemany(
+                "UPDATE points SET row = ? WHERE key = ?",
+                [(new_row, key) for new_row, (key, _) in enumerate(mapping)]
+            )
+
+        return len(mapping)
+
+    def _write_meta(self, meta: Dict[str, Any]):
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        tmp_path.replace(self.meta_path)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _payloads(self, keys: List[str], with_payload) -> Dict[str, Dict[str, Any]]:
+        """Compact payloads by key, projected like Qdrant's with_payload"""
+        if not with_payload or not keys:
+            return {}
+
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, payload in conn.execute(
+                    f"SELECT key, payload FROM points WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = json.loads(payload)
+
+        if isinstance(with_payload, (list, tuple)):
+            found = {k: {f: v for f, v in p.items() if f in with_payload} for k, p in found.items()}
+        return found
+
+    def _candidate_rows(self, query: np.ndarray, query_filter: Optional[Filter], search_params) -> np.ndarray:
+        """Rows to score: IVF lists near the query (or all), minus filtered-out rows"""
+        exact = search_params is not None and search_params.exact
+        if self.ivf is not None and not exact:
+            n_probe = max(1, self.ivf.n_lists // 8)
+            if search_params is not None and search_params.hnsw_ef and search_params.hnsw_ef <= 64:
+                n_probe = max(1, n_probe // 2)
+            rows = self.ivf.candidates(query, n_probe)
+        else:
+            rows = np.asarray(list(self.key_rows.values()), dtype=np.int64)
+
+        rows = [r for r in rows if self.row_keys[r] is not None]
+        if query_filter is not None:
+            rows = [r for r in rows if _matches(query_filter, self.row_fields[r])]
+        return np.asarray(rows, dtype=np.int64)
+
+    def _scored(self, query_vector, query_filter, search_params) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate rows and their cosine scores, best first"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        rows = self._candidate_rows(query, query_filter, search_params)
+        if not len(rows):
+            return rows, np.zeros(0, dtype=np.float32)
+
+        scores = np.asarray(self.vectors[rows]) @ query
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def _point_id(self, row: int) -> Any:
+        return json.loads(self.row_keys[row])
+
+    def search(self, query_vector, query_filter=None, search_params=None, limit=10,
+               with_payload=True, with_vectors=False, **_) -> List[ScoredPoint]:
+        with self._lock:
+            rows, scores = self._scored(query_vector, query_filter, search_params)
+            rows, scores = rows[:limit], scores[:limit]
+            keys = [self.row_keys[r] for r in rows]
+            payloads = self._payloads(keys, with_payload)
+
+            return [
+                ScoredPoint(
+                    id=json.loads(key), version=0, score=float(score),
+                    payload=payloads.get(key) if with_payload else None,
+                    vector=np.asarray(self.vectors[row]).tolist() if with_vectors else None
+                )
+                for key, row, score in zip(keys, rows, scores)
+            ]
+
+    def search_groups(self, query_vector, group_by, query_filter=None, search_params=None,
+                      limit=10, group_size=1, with_payload=True, **_) -> GroupsResult:
+        with self._lock:
+            rows, scores = self._scored(query_vector, query_filter, search_params)
+
+            groups: Dict[Any, List[Tuple[int, float]]] = {}
+            for row, score in zip(rows, scores):
+                key = self.row_fields[row].get(group_by)
+                if key is None:
+                    continue
+                if key not in groups:
+                    if len(groups) >= limit:
+                        continue
+                    groups[key] = []
+                if len(groups[key]) < group_size:
+                    groups[key].append((row, float(score)))
+
+            payloads = self._payloads(
+                [self.row_keys[r] for hits in groups.values() for r, _ in hits], with_payload
+            )
+
+            return GroupsResult(groups=[
+                PointGroup(id=key, hits=[
+                    ScoredPoint(
+                        id=self._point_id(row), version=0, score=score,
+                        payload=payloads.get(self.row_keys[row]) if with_payload else None
+                    )
+                    for row, score in hits
+                ])
+                for key, hits in groups.items()
+            ])
+
+    def retrieve(self, ids: Iterable[Any], with_payload=True, with_vectors=False, **_) -> List[Record]:
+        with self._lock:
+            keys = [json.dumps(pid) for pid in ids if json.dumps(pid) in self.key_rows]
+            payloads = self._payloads(keys, with_payload)
+
+            return [
+                Record(
+                    id=json.loads(key),
+                    payload=payloads.get(key, {}) if with_payload else None,
+                    vector=np.asarray(self.vectors[self.key_rows[key]]).tolist() if with_vectors else None
+                )
+                for key in keys
+            ]
+
+    def scroll(self, scroll_filter=None, limit=10, offset=None, with_payload=True,
+               with_vectors=False, **_) -> Tuple[List[Record], Optional[int]]:
+        """Filtered scan in row order; offset is a row number"""
+        with self._lock:
+            results = []
+            row = offset or 0
+            while row < len(self.row_keys) and len(results) < limit:
+                key = self.row_keys[row]
+                if key is not None:
+                    values = self.row_fields[row]
+                    if scroll_filter is not None and not _matches(scroll_filter, values):
+                        # Text conditions may need the payload, not just filter fields
+                        values = {**values, **self._payloads([key], True).get(key, {})}
+                    if _matches(scroll_filter, values):
+                        results.append(row)
+                row += 1
+
+            next_offset = row if row < len(self.row_keys) else None
+            keys = [self.row_keys[r] for r in results]
+            payloads = self._payloads(keys, with_payload)
+
+            return [
+                Record(
+                    id=json.loads(key),
+                    payload=payloads.get(key, {}) if with_payload else None,
+                    vector=np.asarray(self.vectors[r]).tolist() if with_vectors else None
+                )
+                for key, r in zip(keys, results)
+            ], next_offset
+
+    def count(self, count_filter=None, **_) -> CountResult:
+        with self._lock:
+            if count_filter is None:
+                return CountResult(count=len(self))
+            return CountResult(count=sum(
+                1 for row in self.key_rows.values() if _matches(count_filter, self.row_fields[row])
+            ))
+
+
+# ============================================================================
+# REPLICA + FAILOVER
+# ============================================================================
+
+class LocalReplica:
+    """All replicated collections under one directory"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._collections: Dict[str, ReplicaCollection] = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name: str) -> ReplicaCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = ReplicaCollection(self.root / name)
+            replica = self._collections[name]
+        replica.refresh()
+        return replica
+
+    def has(self, name: Optional[str]) -> bool:
+        return bool(name) and (self.root / name / "meta.json").exists()
+
+    def collections(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / "meta.json").exists())
+
+    def sync(self, remote, collection: str, payload_keys: List[str], field_keys: List[str], **kwargs) -> Dict[str, int]:
+        return self.collection(collection).sync(remote, collection, payload_keys, field_keys, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        result = {}
+        for name in self.collections():
+            replica = self.collection(name)
+            result[name] = {
+                "points": len(replica),
+                "version": replica.meta.get("version"),
+                "synced_at": replica.meta.get("synced_at"),
+                "index": "ivf" if replica.ivf is not None else "brute_force"
+            }
+        return result
+
+
+class FailoverClient:
+    """
+    QdrantClient stand-in - reads fail over to the local replica
+
+    Search/scroll/retrieve/count go to the NAS; on a connection error the
+    call is answered from the replica and the NAS is skipped for
+    retry_after seconds, so an outage costs one timeout, not one per query.
+    Everything else (upserts, deletes, admin calls) goes to the NAS only.
+    """
+
+    READ_METHODS = {"search", "search_groups", "retrieve", "scroll", "count"}
+
+    def __init__(self, remote, replica: LocalReplica, retry_after: float = 30.0):
+        self.remote = remote
+        self.replica = replica
+        self.retry_after = retry_after
+        self._down_until = 0.0
+
+    @property
+    def using_replica(self) -> bool:
+        return time.monotonic() < self._down_until
+
+    def __getattr__(self, name: str):
+        method = getattr(self.remote, name)
+        if name not in self.READ_METHODS:
+            return method
+
+        def call(*args, **kwargs):
+            collection = kwargs.pop("collection_name", None)
+            if collection is None and args:
+                collection, args = args[0], args[1:]
+
+            if self.using_replica and self.replica.has(collection):
+                return getattr(self.replica.collection(collection), name)(*args, **kwargs)
+
+            try:
+                return method(collection, *args, **kwargs)
+            except REMOTE_ERRORS as e:
+                if not self.replica.has(collection):
+                    raise
+                if not self.using_replica:
+                    print(f"⚠️  Qdrant unreachable ({e}) - serving from local replica")
+                self._down_until = time.monotonic() + self.retry_after
+                return getattr(self.replica.collection(collection), name)(*args, **kwargs)
+
+        return call
+
+
+if __name__ == "__main__":
+    import sys
+    from knowledge.kb_manager import KnowledgeBaseManager
+
+    replica_dir = os.getenv("LUCY_KB_REPLICA_DIR", "./data/replica")
+    kb = KnowledgeBaseManager(replica_dir=replica_dir)
+
+    print(f"🔄 Syncing KB replica → {replica_dir}")
+    for name, stats in kb.sync_replica(sys.argv[2:] or None).items():
+        print(f"   {name}: {stats}")
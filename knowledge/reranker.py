@@ -0,0 +1,375 @@
+"""
+Lucy Reranker - second-stage ordering of KB search results
+
+First-stage top-k (vector / hybrid) is noisy, especially on
+tech_docs_vectors. The rerank stage re-scores the top-N candidates with
+- LexicalReranker: learned linear scorer over cheap lexical features
+  (query coverage, IDF-weighted coverage, title match, phrase, proximity,
+  first-stage rank); weights can be fitted on labelled queries
+- CrossEncoderReranker: small CPU cross-encoder (sentence-transformers,
+  optional dependency)
+
+Every query has a strict time budget: reranking is skipped up front when
+the expected cost doesn't fit, and abandoned (first-stage order kept)
+when the deadline passes mid-way.
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.metrics import percentile
+from knowledge.lexical import tokenize
+
+FEATURES = ["coverage", "idf_coverage", "title", "phrase", "proximity", "retrieval"]
+
+DEFAULT_WEIGHTS = {
+    "coverage": 1.0,
+    "idf_coverage": 2.0,
+    "title": 1.5,
+    "phrase": 1.0,
+    "proximity": 0.5,
+    "retrieval": 1.0,
+    "bias": 0.0
+}
+
+# Metadata keys that act as a title per collection
+TITLE_KEYS = ("title", "subject", "chat_name")
+
+
+def _title(result: Any) -> str:
+    return " ".join(str(result.metadata.get(k) or "") for k in TITLE_KEYS)
+
+
+# ============================================================================
+# RERANKERS
+# ============================================================================
+
+class Reranker:
+    """Base class - scores candidates for a query (higher = better)"""
+
+    name = "base"
+
+    def score(self, query: str, candidates: List[Any], deadline: float) -> Optional[List[float]]:
+        """Scores in candidate order, or None if time.monotonic() passed deadline"""
+        raise NotImplementedError
+
+
+class LexicalReranker(Reranker):
+    """Linear model over lexical features (weights fitted by fit())"""
+
+    name = "lexical"
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+
+    def features(self, query: str, candidates: List[Any]) -> np.ndarray:
+        """(n_candidates, n_features) matrix; IDF is computed over the candidate set"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        phrase = " ".join(query.lower().split())
+
+        docs = [tokenize(c.content) for c in candidates]
+        doc_sets = [set(d) for d in docs]
+        n = len(candidates)
+        idf = {t: math.log(1 + (n + 1) / (1 + sum(t in s for s in doc_sets))) for t in terms}
+        idf_total = sum(idf.values()) or 1.0
+
+        rows = []
+        for rank, (candidate, tokens, token_set) in enumerate(zip(candidates, docs, doc_sets)):
+            matched = [t for t in terms if t in token_set]
+            title_tokens = set(tokenize(_title(candidate)))
+
+            rows.append([
+                len(matched) / len(terms) if terms else 0.0,
+                sum(idf[t] for t in matched) / idf_total,
+                sum(t in title_tokens for t in terms) / len(terms) if terms else 0.0,
+                1.0 if phrase and phrase in candidate.content.lower() else 0.0,
+                self._proximity(tokens, matched),
+                1.0 / (1 + rank)
+            ])
+
+        return np.asarray(rows, dtype=np.float32).reshape(n, len(FEATURES))
+
+    @staticmethod
+    def _proximity(tokens: List[str], matched: List[str]) -> float:
+        """1.0 when matched terms are adjacent, falling off with the window size"""
+        if len(matched) < 2:
+            return 1.0 if matched else 0.0
+
+        wanted = set(matched)
+        counts: Dict[str, int] = {}
+        best = len(tokens)
+        left = 0
+        for right, token in enumerate(tokens):
+            if token in wanted:
+                counts[token] = counts.get(token, 0) + 1
+            while len(counts) == len(wanted):
+                best = min(best, right - left + 1)
+                if tokens[left] in counts:
+                    counts[tokens[left]] -= 1
+                    if not counts[tokens[left]]:
+                        del counts[tokens[left]]
+                left += 1
+
+        return len(wanted) / best if best else 0.0
+
+    def score(self, query: str, candidates: List[Any], deadline: float) -> Optional[List[float]]:
+        matrix = self.features(query, candidates)
+        if time.monotonic() > deadline:
+            return None
+
+        weights = np.asarray([self.weights[f] for f in FEATURES], dtype=np.float32)
+        return (matrix @ weights + self.weights.get("bias", 0.0)).tolist()
+
+    def fit(
+        self,
+        examples: Sequence[Tuple[str, List[Any], List[int]]],
+        epochs: int = 300,
+        learning_rate: float = 0.5,
+        l2: float = 1e-3
+    ) -> Dict[str, float]:
+        """
+        Fit weights by logistic regression
+
+        examples: (query, first-stage candidates in rank order, 0/1 labels)
+        """
+        x = np.vstack([self.features(q, c) for q, c, _ in examples])
+        y = np.concatenate([np.asarray(labels, dtype=np.float32) for _, _, labels in examples])
+
+        w = np.zeros(x.shape[1], dtype=np.float32)
+        b = 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-(x @ w + b)))
+            grad = p - y
+            w -= learning_rate * (x.T @ grad / len(y) + l2 * w)
+            b -= learning_rate * float(grad.mean())
+
+        self.weights = {**dict(zip(FEATURES, w.round(4).tolist())), "bias": round(b, 4)}
+        return self.weights
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.weights, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalReranker":
+        with open(path) as f:
+            return cls(json.load(f))
+
+
+class CrossEncoderReranker(Reranker):
+    """Small CPU cross-encoder; scores in batches so the deadline is honoured"""
+
+    def __init__(self, model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 4):
+        from sentence_transformers import CrossEncoder
+
+        self.name = f"cross-encoder:{model}"
+        self.model = CrossEncoder(model, device="cpu")
+        self.batch_size = batch_size
+
+    def score(self, query: str, candidates: List[Any], deadline: float) -> Optional[List[float]]:
+        scores: List[float] = []
+        for start in range(0, len(candidates), self.batch_size):
+            if time.monotonic() > deadline:
+                return None
+            batch = candidates[start:start + self.batch_size]
+            pairs = [(query, f"{_title(c)}\n{c.content}") for c in batch]
+            scores.extend(float(s) for s in self.model.predict(pairs))
+        return scores
+
+
+# ============================================================================
+# STAGE
+# ============================================================================
+
+class RerankStage:
+    """Reranks the top-N results within a per-query time budget"""
+
+    def __init__(self, reranker: Reranker, top_n: int = 20, budget_ms: float = 30.0):
+        self.reranker = reranker
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+
+        # Running cost estimate (ms per candidate) for the up-front check
+        self._ms_per_candidate: Optional[float] = None
+        self._added_ms: deque = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self.counters = {
+            "queries": 0,
+            "reranked": 0,
+            "skipped_estimate": 0,
+            "skipped_deadline": 0,
+            "errors": 0,
+            "top1_changed": 0
+        }
+
+    @classmethod
+    def from_env(cls) -> Optional["RerankStage"]:
+        """
+        Build stage from environment
+
+        LUCY_RERANKER         - lexical | cross-encoder | none (default lexical)
+        LUCY_RERANK_WEIGHTS   - fitted LexicalReranker weights (JSON); the lexical
+                                stage stays off without it - the hand-set
+                                DEFAULT_WEIGHTS lower MRR on kb_benchmark
+        LUCY_RERANK_MODEL     - cross-encoder model name
+        LUCY_RERANK_TOP_N     - candidates to rerank (default 20)
+        LUCY_RERANK_BUDGET_MS - per-query budget (default 30)
+        """
+        kind = os.getenv("LUCY_RERANKER", "lexical").lower()
+
+        try:
+            if kind == "lexical":
+                weights_path = os.getenv("LUCY_RERANK_WEIGHTS")
+                if not weights_path:
+                    return None
+                reranker = LexicalReranker.load(weights_path)
+            elif kind == "cross-encoder":
+                reranker = CrossEncoderReranker(
+                    os.getenv("LUCY_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+                )
+            else:
+                return None
+        except Exception as e:
+            print(f"Reranker disabled ({kind}): {e}")
+            return None
+
+        return cls(
+            reranker,
+            top_n=int(os.getenv("LUCY_RERANK_TOP_N", "20")),
+            budget_ms=float(os.getenv("LUCY_RERANK_BUDGET_MS", "30"))
+        )
+
+    def rerank(self, query: str, results: List[Any]) -> List[Any]:
+        """Reordered results (rerank score in .score, first-stage score in metadata)"""
+        if not query or len(results) < 2:
+            return results
+
+        started = time.monotonic()
+        deadline = started + self.budget_ms / 1000.0
+        candidates, rest = results[:self.top_n], results[self.top_n:]
+
+        with self._lock:
+            self.counters["queries"] += 1
+            estimate = self._ms_per_candidate
+
+        if estimate is not None and estimate * len(candidates) > self.budget_ms:
+            with self._lock:
+                self.counters["skipped_estimate"] += 1
+                # Decay so one slow query doesn't disable reranking forever
+                self._ms_per_candidate = estimate * 0.9
+            return results
+
+        try:
+            scores = self.reranker.score(query, candidates, deadline)
+        except Exception as e:
+            print(f"Rerank failed: {e}")
+            with self._lock:
+                self.counters["errors"] += 1
+            return results
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            per_candidate = elapsed_ms / len(candidates)
+            self._ms_per_candidate = (
+                per_candidate if self._ms_per_candidate is None
+                else 0.8 * self._ms_per_candidate + 0.2 * per_candidate
+            )
+            self._added_ms.append(elapsed_ms)
+
+            if scores is None:
+                self.counters["skipped_deadline"] += 1
+                return results
+            self.counters["reranked"] += 1
+
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        if order[0] != 0:
+            with self._lock:
+                self.counters["top1_changed"] += 1
+
+        reranked = [
+            replace(
+                candidates[i],
+                score=round(float(scores[i]), 4),
+                metadata={**candidates[i].metadata, "retrieval_score": candidates[i].score}
+            )
+            for i in order
+        ]
+        return reranked + rest
+
+    def stats(self) -> Dict:
+        """Added latency and how often reranking ran / changed the top hit"""
+        with self._lock:
+            added = list(self._added_ms)
+            counters = dict(self.counters)
+
+        return {
+            "reranker": self.reranker.name,
+            "top_n": self.top_n,
+            "budget_ms": self.budget_ms,
+            **counters,
+            "added_ms_p50": round(percentile(added, 50), 2),
+            "added_ms_p95": round(percentile(added, 95), 2),
+            "top1_changed_rate": round(counters["top1_changed"] / counters["reranked"], 3) if counters["reranked"] else 0.0
+        }
+
+
+# ============================================================================
+# QUALITY
+# ============================================================================
+
+def _ndcg(relevant: List[bool], k: int) -> float:
+    dcg = sum(1.0 / math.log2(i + 2) for i, rel in enumerate(relevant[:k]) if rel)
+    ideal = sum(1.0 / math.log2(i + 2) for i in range(min(k, sum(relevant))))
+    return dcg / ideal if ideal else 0.0
+
+
+def _mrr(relevant: List[bool], k: int) -> float:
+    for i, rel in enumerate(relevant[:k]):
+        if rel:
+            return 1.0 / (i + 1)
+    return 0.0
+
+
+def evaluate_rerank(
+    stage: RerankStage,
+    first_stage: Callable[[str], List[Any]],
+    labelled: Sequence[Tuple[str, Callable[[Any], bool]]],
+    k: int = 5
+) -> Dict[str, float]:
+    """
+    Quality with and without reranking on labelled queries
+
+    first_stage: query -> top-N results (no reranking)
+    labelled:    (query, is_relevant(result)) pairs
+    """
+    before_ndcg, after_ndcg, before_mrr, after_mrr = [], [], [], []
+
+    for query, is_relevant in labelled:
+        results = first_stage(query)
+        reranked = stage.rerank(query, results)
+
+        before = [is_relevant(r) for r in results]
+        after = [is_relevant(r) for r in reranked]
+        before_ndcg.append(_ndcg(before, k))
+        after_ndcg.append(_ndcg(after, k))
+        before_mrr.append(_mrr(before, k))
+        after_mrr.append(_mrr(after, k))
+
+    def mean(values):
+        return round(float(np.mean(values)), 4) if values else 0.0
+
+    return {
+        f"ndcg@{k}_before": mean(before_ndcg),
+        f"ndcg@{k}_after": mean(after_ndcg),
+        f"mrr@{k}_before": mean(before_mrr),
+        f"mrr@{k}_after": mean(after_mrr),
+        "queries": len(labelled)
+    }
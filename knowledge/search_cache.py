@@ -0,0 +1,270 @@
+"""
+Lucy KB Search Cache - result cache in front of KnowledgeBaseManager
+
+- Keyed on normalized query + collection + filters (+ search params)
+- TTL + size-bounded LRU in memory (core.ttl_cache)
+- Collection versions: ingestion bumps the version, old entries die
+- Optional on-disk tier (SQLite) that survives restarts and is shared
+  with `lucy ingest`, so version bumps propagate across processes
+- Versions are held in memory; a bump also replaces a stamp file next to
+  the database, and a stat() of it per lookup is all it takes to notice
+  another process's bump (versions are reloaded only then)
+- Hits are deep copies, so callers can't mutate cached results
+"""
+
+import os
+import copy
+import json
+import sqlite3
+import threading
+import time
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.ttl_cache import TTLCache
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Case/whitespace-insensitive form of a query"""
+    if not query:
+        return ""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """TTL + LRU cache for knowledge-base search results"""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 600.0,
+        cache_dir: Optional[str] = None
+    ):
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.invalidations = 0
+
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.db_path = None
+        self.stamp_path = None
+        self._stamp = None
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self.db_path = str(Path(cache_dir) / "kb_search_cache.sqlite")
+            self.stamp_path = str(Path(cache_dir) / "kb_search_cache.versions")
+            self._init_disk()
+            self._stamp = self._read_stamp()
+            self._versions = self._load_versions()
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchCache"]:
+        """
+        Build cache from environment
+
+        LUCY_KB_CACHE_TTL  - seconds, 0 disables the cache (default 600)
+        LUCY_KB_CACHE_SIZE - max in-memory entries (default 512)
+        LUCY_KB_CACHE_DIR  - enables the on-disk tier
+        """
+        ttl = float(os.getenv("LUCY_KB_CACHE_TTL", "600"))
+        if ttl <= 0:
+            return None
+
+        return cls(
+            max_entries=int(os.getenv("LUCY_KB_CACHE_SIZE", "512")),
+            ttl_seconds=ttl,
+            cache_dir=os.getenv("LUCY_KB_CACHE_DIR") or None
+        )
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5.0)
+
+    def _init_disk(self):
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, collection TEXT, version INTEGER,"
+                " expires_at REAL, value TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS versions ("
+                " collection TEXT PRIMARY KEY, version INTEGER)"
+            )
+
+    def _disk_get(self, key: str) -> Optional[List[Dict]]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT expires_at, value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Search cache disk read failed: {e}")
+            return None
+
+        if row is None or row[0] <= time.time():
+            return None
+        return json.loads(row[1])
+
+    def _disk_put(self, key: str, collection: str, version: int, value: List[Dict]):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (key, collection, version, time.time() + self.ttl_seconds,
+                     json.dumps(value, default=str))
+                )
+        except sqlite3.Error as e:
+            print(f"Search cache disk write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Collection versions
+    # ------------------------------------------------------------------
+
+    def _read_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.stamp_path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns)
+
+    def _write_stamp(self, collection: str, version: int):
+        """Write-then-replace the stamp file (new inode + mtime), so readers notice"""
+        tmp = f"{self.stamp_path}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp, "w") as f:
+                f.write(f"{collection} {version}\n")
+            os.replace(tmp, self.stamp_path)
+        except OSError as e:
+            print(f"Search cache stamp write failed: {e}")
+
+    def _load_versions(self) -> Dict[str, int]:
+        """All versions from the disk tier (authoritative)"""
+        try:
+            with self._connect() as conn:
+                return dict(conn.execute("SELECT collection, version FROM versions").fetchall())
+        except sqlite3.Error as e:
+            print(f"Search cache version read failed: {e}")
+            return dict(self._versions)
+
+    def _refresh_versions(self):
+        """Reload versions when another process bumped one (stat only otherwise)"""
+        stamp = self._read_stamp()
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp != self._stamp:
+                self._versions = self._load_versions()
+                self._stamp = stamp
+
+    def version(self, collection: str) -> int:
+        """Current version of a collection"""
+        if self.db_path:
+            self._refresh_versions()
+        return self._versions.get(collection, 0)
+
+    def bump_version(self, collection: str) -> int:
+        """Invalidate all cached results for a collection (after ingestion)"""
+        with self._lock:
+            if self.db_path:
+                self._versions = self._load_versions()
+            version = self._versions.get(collection, 0) + 1
+            self._versions[collection] = version
+
+            if self.db_path:
+                try:
+                    with self._connect() as conn:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO versions VALUES (?, ?)",
+                            (collection, version)
+                        )
+                        conn.execute(
+                            "DELETE FROM entries WHERE collection = ? AND version < ?",
+                            (collection, version)
+                        )
+                except sqlite3.Error as e:
+                    print(f"Search cache version bump failed: {e}")
+                self._write_stamp(collection, version)
+                self._stamp = None  # Reload on the next lookup - catches concurrent bumps too
+
+            self.memory.invalidate(lambda key: key.startswith(f"{collection}:"))
+            self.invalidations += 1
+
+        return version
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def make_key(
+        self,
+        collection: str,
+        query: Optional[str],
+        filters: Optional[Dict[str, Any]] = None,
+        **params
+    ) -> str:
+        """
+        Cache key: collection + version + normalized query/filters/params
+
+        Make the key before searching: it pins the version the search
+        started under, so put() can refuse results an ingest overtook.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        body = json.dumps(
+            {"q": normalize_query(query), "f": filters, "p": params},
+            sort_keys=True,
+            default=str
+        )
+        digest = hashlib.sha256(body.encode()).hexdigest()[:32]
+        return f"{collection}:{self.version(collection)}:{digest}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached results (list of dicts, a private copy) or None"""
+        value = self.memory.get(key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        if self.db_path:
+            value = self._disk_get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return copy.deepcopy(value)
+            self.disk_misses += 1
+
+        return None
+
+    def put(self, key: str, value: List[Dict]):
+        """Store results (list of dicts) - skipped if the collection was bumped meanwhile"""
+        collection, version, _ = key.split(":", 2)
+        if int(version) < self.version(collection):
+            return  # Search started before an ingest finished - possibly stale
+
+        self.memory.set(key, value)
+        if self.db_path:
+            self._disk_put(key, collection, int(version), value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for both tiers"""
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.disk_hits
+
+        return {
+            "memory": memory,
+            "disk": {
+                "enabled": self.db_path is not None,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses
+            },
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
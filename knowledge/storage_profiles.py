@@ -0,0 +1,260 @@
+"""
+Lucy Storage Profiles - vector quantization + rescoring per collection
+
+1536-dim float32 vectors cost ~6 KB each; as email_history and Beeper
+history grow they stop fitting in the NAS RAM. A storage profile keeps a
+compressed copy in RAM (scalar int8 = 4x smaller, binary = 32x smaller)
+with the float32 originals on disk, and rescores the oversampled
+candidates against the originals.
+
+Search precision is the per-query knob trading recall for latency:
+- fast:     quantized scores only, no rescoring
+- balanced: oversample + rescore with originals (profile default)
+- exact:    brute force on originals (ground truth, slow)
+
+Usage:
+    python -m knowledge.storage_profiles apply email_history --profile scalar
+    python -m knowledge.storage_profiles report email_history --queries held_out.json
+"""
+
+import json
+import time
+import uuid
+import statistics
+from typing import Any, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization, BinaryQuantizationConfig, Disabled, Distance,
+    PointStruct, QuantizationSearchParams, ScalarQuantization,
+    ScalarQuantizationConfig, ScalarType, SearchParams, VectorParams,
+    VectorParamsDiff, CollectionStatus
+)
+
+from core.metrics import percentile
+from lucy_config import QDRANT_CONFIG
+
+STORAGE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "float32": {
+        "quantization": None,
+        "on_disk": False,
+        "oversampling": 1.0
+    },
+    "scalar": {
+        "quantization": "scalar",   # int8, 4x smaller
+        "on_disk": True,            # float32 originals on disk, used for rescoring
+        "oversampling": 2.0
+    },
+    "binary": {
+        "quantization": "binary",   # 1 bit/dim, 32x smaller
+        "on_disk": True,
+        "oversampling": 3.0
+    }
+}
+
+SEARCH_PRECISIONS = ("fast", "balanced", "exact")
+DEFAULT_PRECISION = "balanced"
+
+
+def collection_profile(collection: str) -> str:
+    """Configured storage profile for a collection"""
+    config = QDRANT_CONFIG["collections"].get(collection, {})
+    return config.get("storage_profile", "float32")
+
+
+def quantization_config(profile: str):
+    """Qdrant quantization config for a profile (None = no quantization)"""
+    kind = STORAGE_PROFILES[profile]["quantization"]
+
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params(profile: str, precision: Optional[str] = None) -> Optional[SearchParams]:
+    """Search-time params for a profile at the given precision"""
+    precision = precision or DEFAULT_PRECISION
+    if precision not in SEARCH_PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (use {', '.join(SEARCH_PRECISIONS)})")
+
+    if precision == "exact":
+        return SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+
+    settings = STORAGE_PROFILES[profile]
+    if settings["quantization"] is None:
+        return SearchParams(hnsw_ef=64) if precision == "fast" else None
+
+    if precision == "fast":
+        return SearchParams(
+            hnsw_ef=64,
+            quantization=QuantizationSearchParams(rescore=False, oversampling=1.0)
+        )
+
+    return SearchParams(
+        hnsw_ef=128,
+        quantization=QuantizationSearchParams(rescore=True, oversampling=settings["oversampling"])
+    )
+
+
+def create_collection(client: QdrantClient, collection: str, profile: Optional[str] = None):
+    """Create collection with its storage profile"""
+    profile = profile or collection_profile(collection)
+    config = QDRANT_CONFIG["collections"].get(collection, {"vector_size": 1536, "distance": "Cosine"})
+
+    client.create_collection(
+        collection_name=collection,
+        vectors_config=VectorParams(
+            size=config["vector_size"],
+            distance=Distance[config["distance"].upper()],
+            on_disk=STORAGE_PROFILES[profile]["on_disk"]
+        ),
+        quantization_config=quantization_config(profile)
+    )
+
+
+def apply_profile(client: QdrantClient, collection: str, profile: str):
+    """Switch an existing collection to a profile (Qdrant re-indexes in background)"""
+    client.update_collection(
+        collection_name=collection,
+        vectors_config={"": VectorParamsDiff(on_disk=STORAGE_PROFILES[profile]["on_disk"])},
+        quantization_config=quantization_config(profile) or Disabled.DISABLED
+    )
+
+
+# ============================================================================
+# RECALL VS LATENCY REPORT
+# ============================================================================
+
+def _wait_green(client: QdrantClient, collection: str, timeout: float = 600.0):
+    """Wait for indexing/quantization to finish"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(collection).status == CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+
+
+def _sample(client: QdrantClient, collection: str, count: int) -> List[Any]:
+    """First `count` points with vectors"""
+    points, offset = [], None
+    while len(points) < count:
+        batch, offset = client.scroll(
+            collection_name=collection,
+            limit=min(256, count - len(points)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True
+        )
+        points.extend(batch)
+        if offset is None:
+            break
+    return points
+
+
+def profile_report(
+    client: QdrantClient,
+    collection: str,
+    query_vectors: Optional[List[List[float]]] = None,
+    profiles: Optional[List[str]] = None,
+    sample_size: int = 20000,
+    n_queries: int = 100,
+    k: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Validate storage profiles against a held-out query set
+
+    Copies a sample of the collection into one scratch collection per
+    profile (production collections are never touched) and measures
+    recall@k vs exact search plus p50/p95 latency at every precision.
+    Without query_vectors, n_queries stored vectors are held out of the
+    sample and used as queries.
+    """
+    profiles = profiles or list(STORAGE_PROFILES)
+
+    points = _sample(client, collection, sample_size + (0 if query_vectors else n_queries))
+    if query_vectors is None:
+        query_vectors = [p.vector for p in points[:n_queries]]
+        points = points[n_queries:]
+
+    rows = []
+    for profile in profiles:
+        scratch = f"{collection}__profile_{profile}_{uuid.uuid4().hex[:6]}"
+        create_collection(client, scratch, profile)
+
+        try:
+            for i in range(0, len(points), 256):
+                client.upsert(
+                    collection_name=scratch,
+                    points=[PointStruct(id=p.id, vector=p.vector, payload={}) for p in points[i:i + 256]],
+                    wait=True
+                )
+            _wait_green(client, scratch)
+
+            truth = [
+                {p.id for p in client.search(scratch, query_vector=q, limit=k,
+                                             search_params=search_params(profile, "exact"))}
+                for q in query_vectors
+            ]
+
+            for precision in SEARCH_PRECISIONS:
+                latencies, recalls = [], []
+                for q, expected in zip(query_vectors, truth):
+                    started = time.perf_counter()
+                    hits = client.search(scratch, query_vector=q, limit=k,
+                                         search_params=search_params(profile, precision))
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    recalls.append(len(expected & {h.id for h in hits}) / max(1, len(expected)))
+
+                rows.append({
+                    "profile": profile,
+                    "precision": precision,
+                    "recall_at_k": round(statistics.mean(recalls), 4),
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2)
+                })
+        finally:
+            client.delete_collection(scratch)
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Lucy collection storage profiles")
+    parser.add_argument("action", choices=["apply", "report"])
+    parser.add_argument("collection")
+    parser.add_argument("--profile", choices=list(STORAGE_PROFILES), help="Profile to apply")
+    parser.add_argument("--queries", help="JSON list of held-out query strings")
+    parser.add_argument("--sample-size", type=int, default=20000)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    client = QdrantClient(host=QDRANT_CONFIG["host"], port=QDRANT_CONFIG["port"])
+
+    if args.action == "apply":
+        profile = args.profile or collection_profile(args.collection)
+        apply_profile(client, args.collection, profile)
+        print(f"✅ {args.collection} → {profile} (re-indexing in background)")
+        sys.exit(0)
+
+    vectors = None
+    if args.queries:
+        from knowledge.embeddings import get_embedding_service
+        embedder = get_embedding_service()
+        if embedder is None:
+            print("❌ --queries needs an embedding provider (LUCY_EMBEDDING_PROVIDER)")
+            sys.exit(1)
+        with open(args.queries) as f:
+            vectors = embedder.embed(json.load(f)).tolist()
+
+    print(f"📊 Storage profile report: {args.collection} (recall@{args.k} vs exact)")
+    print("=" * 70)
+    for row in profile_report(client, args.collection, vectors, sample_size=args.sample_size, k=args.k):
+        print(f"   {row['profile']:8} {row['precision']:9} "
+              f"recall={row['recall_at_k']:.3f}  p50={row['p50_ms']:.1f}ms  p95={row['p95_ms']:.1f}ms")
@@ -543,19 +543,28 @@ QDRANT_CONFIG = {
             "vector_size": 1536,
             "distance": "Cosine",
             "indexed_count": 5757,  # Current count
-            "description": "6 months of Gmail messages with threads and contacts"
+            "description": "6 months of Gmail messages with threads and contacts",
+            # Hybrid search: reciprocal rank fusion weights per ranker
+            "fusion_weights": {"dense": 1.0, "lexical": 1.5},  # Names, invoice numbers
+            # Vector storage: float32 | scalar (int8, 4x) | binary (32x) - see knowledge/storage_profiles.py
+            "storage_profile": "scalar"
         },
         "beeper_history": {
             "vector_size": 1536,
             "distance": "Cosine",
             "indexed_count": 0,  # Optional - not yet indexed
-            "description": "Beeper cross-network messaging history"
+            "description": "Beeper cross-network messaging history",
+            "fusion_weights": {"dense": 1.0, "lexical": 1.5},  # Names, Linear IDs
+            "storage_profile": "scalar"
         },
         "tech_docs_vectors": {
             "vector_size": 1536,
             "distance": "Cosine",
             "indexed_count": 22315,  # Current count
-            "description": "14 tech tools documentation (Qdrant, Mem0, Supabase, etc.)"
+            "description": "14 tech tools documentation (Qdrant, Mem0, Supabase, etc.)",
+            "fusion_weights": {"dense": 1.0, "lexical": 0.7},  # Prose - semantics first
+            "storage_profile": "binary",  # Large, static - rescoring recovers recall
+            "rerank": True  # Noisy first stage; runs once LUCY_RERANK_WEIGHTS is set (knowledge/reranker.py)
         }
     }
 }
@@ -604,8 +613,14 @@ MEM0_CONFIG = {
 
 ROUTING_RULES = {
     # Keywords that trigger specific assistants
+    # Matched by core.keyword_router: whole-word start, prefix match
+    # ("email" matches "emails"); keywords under 4 chars must match whole words
     "email": [LucyDomain.COMMUNICATIONS],
+    "mail": [LucyDomain.COMMUNICATIONS],
     "message": [LucyDomain.COMMUNICATIONS],
+    "zpráv": [LucyDomain.COMMUNICATIONS],
+    "chat": [LucyDomain.COMMUNICATIONS],
+    "conversation": [LucyDomain.COMMUNICATIONS],
     "beeper": [LucyDomain.COMMUNICATIONS],
     "contact": [LucyDomain.COMMUNICATIONS],
     
@@ -614,6 +629,9 @@ ROUTING_RULES = {
     "github": [LucyDomain.PROJECTS],
     "task": [LucyDomain.PROJECTS],
     "issue": [LucyDomain.PROJECTS],
+    "pr": [LucyDomain.PROJECTS],
+    "pull request": [LucyDomain.PROJECTS],
+    "deadline": [LucyDomain.PROJECTS],
     
     "docs": [LucyDomain.KNOWLEDGE],
     "documentation": [LucyDomain.KNOWLEDGE],
@@ -624,26 +642,43 @@ ROUTING_RULES = {
     "workflow": [LucyDomain.CONTENT],
     "n8n": [LucyDomain.CONTENT],
     "automation": [LucyDomain.CONTENT],
+    "trigger": [LucyDomain.CONTENT],
+    "webhook": [LucyDomain.CONTENT],
     
     "database": [LucyDomain.DATA],
     "qdrant": [LucyDomain.DATA],
     "supabase": [LucyDomain.DATA],
     "query": [LucyDomain.DATA],
     "postgres": [LucyDomain.DATA],
+    "data": [LucyDomain.DATA],
+    "collection": [LucyDomain.DATA],
+    "vector": [LucyDomain.DATA],
     
     "docker": [LucyDomain.DEV],
     "vscode": [LucyDomain.DEV],
     "development": [LucyDomain.DEV],
     "build": [LucyDomain.DEV],
+    "code": [LucyDomain.DEV],
+    "deploy": [LucyDomain.DEV],
+    "debug": [LucyDomain.DEV],
     
     "invoice": [LucyDomain.BUSINESS],
     "client": [LucyDomain.BUSINESS],
     "business": [LucyDomain.BUSINESS],
     "finance": [LucyDomain.BUSINESS],
+    "revenue": [LucyDomain.BUSINESS],
+    "customer": [LucyDomain.BUSINESS],
+    "deal": [LucyDomain.BUSINESS],
+    "contract": [LucyDomain.BUSINESS],
     
     "remind": [LucyDomain.PERSONAL],
     "schedule": [LucyDomain.PERSONAL],
     "personal": [LucyDomain.PERSONAL],
+    "calendar": [LucyDomain.PERSONAL],
+    "todoist": [LucyDomain.PERSONAL],
+    "todo": [LucyDomain.PERSONAL],
+    "agenda": [LucyDomain.PERSONAL],
+    "meeting": [LucyDomain.PERSONAL],
 }
 
 # Multi-domain queries (requires orchestration)
@@ -651,17 +686,20 @@ MULTI_DOMAIN_PATTERNS = [
     {
         "pattern": r".*email.*about.*(?:qdrant|supabase|database).*",
         "domains": [LucyDomain.COMMUNICATIONS, LucyDomain.DATA],
-        "strategy": "sequential"  # Communications first, then Data for context
+        "strategy": "sequential",  # Communications first, then Data for context
+        "multi_strategy": "all"  # Answer needs both
     },
     {
         "pattern": r".*project.*(?:email|message).*",
         "domains": [LucyDomain.PROJECTS, LucyDomain.COMMUNICATIONS],
-        "strategy": "parallel"  # Both can work simultaneously
+        "strategy": "parallel",  # Both can work simultaneously
+        "multi_strategy": "quorum"  # Answer with what arrived, stream the rest
     },
     {
         "pattern": r".*docs.*for.*project.*",
         "domains": [LucyDomain.KNOWLEDGE, LucyDomain.PROJECTS],
-        "strategy": "sequential"  # Knowledge first, then Projects for application
+        "strategy": "sequential",  # Knowledge first, then Projects for application
+        "multi_strategy": "first_confident"  # A confident docs answer is enough
     }
 ]
 
@@ -21,14 +21,79 @@ INTEGRATION:
 9. Evaluator - Quality control
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import contextvars
+import json
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
 import httpx
 import os
+import time
 from datetime import datetime
 
-app = FastAPI(title="Lucy Orchestrator - Premium Gastro")
+from core import deadline, tracing
+from core.circuit_breaker import CircuitBreaker
+from core.deadline import EVALUATION_RESERVE_SECONDS, DeadlineMiddleware
+from core.evaluation import EvaluationPolicy, EvaluationStore, notify_aquarium
+from core.health import HealthProber
+from core.http_pool import HTTPPool
+from core.keyword_router import get_keyword_router
+from core.metrics import COUNTER, GAUGE, HISTOGRAM, Metrics, MetricsMiddleware
+from core.multi_agent import QUORUM, MultiAgentCollector, select_strategy
+from core.response_cache import ResponseCache
+from core.singleflight import SingleFlight, cancel_on_disconnect
+from core.semantic_router import get_semantic_router
+from core.sse import SSE_HEADERS, iter_sse, sse_event
+from core.tracing import TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open pooled upstream connections and start health probing on startup"""
+    await http_pool.start()
+    await health_prober.start()
+    asyncio.create_task(asyncio.to_thread(get_semantic_router))  # Build centroids off the request path
+    yield
+    for task in list(background_evaluations):
+        task.cancel()
+    await health_prober.close()
+    await http_pool.close()
+
+
+app = FastAPI(title="Lucy Orchestrator - Premium Gastro", lifespan=lifespan)
+
+# Overall request budget per entry point; callers (voice) may send a tighter one
+app.add_middleware(DeadlineMiddleware, budgets={
+    "/query": deadline.BUDGETS_MS["chat"],
+    "/query/stream": deadline.BUDGETS_MS["stream"],
+    "/briefing": deadline.BUDGETS_MS["briefing"],
+    "/query/batch": deadline.BUDGETS_MS["batch"]
+})
+
+metrics = Metrics({
+    "lucy_requests_total": (COUNTER, "HTTP requests by endpoint and status"),
+    "lucy_request_latency_ms": (HISTOGRAM, "End-to-end request latency in ms (streams until the last event)"),
+    "lucy_request_errors_total": (COUNTER, "HTTP 5xx responses by endpoint"),
+    "lucy_routing_latency_ms": (HISTOGRAM, "Query routing time in ms by router"),
+    "lucy_routing_fallbacks_total": (COUNTER, "Semantic routing failures answered by the keyword router"),
+    "lucy_upstream_latency_ms": (HISTOGRAM, "Assistant / evaluator call latency in ms"),
+    "lucy_upstream_errors_total": (COUNTER, "Failed assistant / evaluator calls by kind"),
+    "lucy_response_cache_hits_total": (COUNTER, "Response cache hits"),
+    "lucy_response_cache_misses_total": (COUNTER, "Response cache misses"),
+    "lucy_response_cache_hit_ratio": (GAUGE, "Response cache hit ratio"),
+    "lucy_single_flight_coalesced_total": (COUNTER, "Requests that joined an in-flight identical request"),
+    "lucy_circuit_open": (GAUGE, "1 when the upstream's circuit breaker is not closed"),
+    "lucy_evaluations_total": (COUNTER, "Evaluations by mode (sync / deferred)"),
+    "lucy_uptime_seconds": (GAUGE, "Seconds since the orchestrator started")
+})
+app.add_middleware(MetricsMiddleware, metrics=metrics, paths=[
+    "/query", "/query/stream", "/query/batch", "/briefing", "/health", "/stats", "/metrics", "/cache/invalidate"
+])
+app.add_middleware(TracingMiddleware, service="orchestrator")  # traceparent in/out, LUCY_TRACE_FILE
 
 # Configuration
 ASSISTANTS = {
@@ -43,6 +108,30 @@ ASSISTANTS = {
     "evaluator": os.getenv("LUCY_EVALUATOR_URL", "http://lucy-evaluator:8080")
 }
 
+# Connection pool limits per upstream (keep-alive; "default" applies to all)
+ASSISTANT_LIMITS = {
+    "default": {"max_connections": 20, "max_keepalive_connections": 10, "keepalive_expiry": 30.0},
+    "knowledge": {"max_connections": 40, "max_keepalive_connections": 20},  # Fallback route
+    "evaluator": {"max_connections": 40, "max_keepalive_connections": 20}   # Every query
+}
+
+http_pool = HTTPPool(ASSISTANTS, ASSISTANT_LIMITS)
+health_prober = HealthProber(http_pool)  # LUCY_HEALTH_INTERVAL / _TIMEOUT / _STALENESS
+response_cache = ResponseCache()  # LUCY_RESPONSE_CACHE / _ENTRIES, TTLs per domain
+inflight = SingleFlight()  # Coalesces concurrent identical /query and /briefing calls
+breakers = {name: CircuitBreaker(name) for name in ASSISTANTS}  # LUCY_BREAKER_* env
+evaluation_policy = EvaluationPolicy()  # LUCY_EVAL_MODE / _SYNC_CONFIDENCE / _SYNC_DOMAINS
+evaluations = EvaluationStore()  # Background evaluation results by request ID
+background_evaluations = set()  # Strong refs to running background evaluation tasks
+EVALUATION_FOLLOWUP_SECONDS = 30.0  # How long /query/stream waits for a background evaluation
+
+ROUTING_TIMEOUT_SECONDS = float(os.getenv("LUCY_ROUTER_TIMEOUT_MS", "1500")) / 1000.0  # Semantic routing cap (query embedding)
+
+# /query/batch
+BATCH_MAX_QUERIES = int(os.getenv("LUCY_BATCH_MAX_QUERIES", "500"))
+BATCH_CHUNK = int(os.getenv("LUCY_BATCH_CHUNK", "16"))  # Queries per assistant call
+BATCH_CONCURRENCY = int(os.getenv("LUCY_BATCH_CONCURRENCY", "4"))  # Assistant calls in flight per batch
+
 # System Prompt - Lucy's personality & rules
 LUCY_SYSTEM_PROMPT = """
 Jsi Lucy - osobní asistentka pro Premium Gastro CEO.
@@ -213,6 +302,27 @@ class QueryRequest(BaseModel):
     user_id: Optional[str] = "default"
     context: Optional[Dict] = None
     language: Optional[str] = "cs"  # cs | en
+    cache: bool = True  # False = skip the response cache (always run the pipeline)
+    evaluation: Optional[str] = None  # sync | async | auto; None = LUCY_EVAL_MODE policy
+    multi_strategy: Optional[str] = None  # all | first_confident | quorum; None = pattern / LUCY_MULTI_STRATEGY
+
+class BatchQueryItem(BaseModel):
+    id: Optional[str] = None  # Echoed in the result line (default: position)
+    query: str
+    context: Optional[Dict] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[BatchQueryItem]
+    user_id: Optional[str] = "default"
+    language: Optional[str] = "cs"
+    cache: bool = True
+    evaluation: Optional[str] = None  # As QueryRequest.evaluation, for every query
+
+class CacheInvalidation(BaseModel):
+    domains: List[str] = []
+    collections: List[str] = []   # Qdrant collections that changed
+    namespaces: List[str] = []    # Mem0 namespaces that changed
+    all: bool = False
 
 class QueryResponse(BaseModel):
     response: str
@@ -223,33 +333,30 @@ class QueryResponse(BaseModel):
     evaluated: bool = False
     needs_refinement: bool = False
     suggestions: List[str] = []
+    request_id: Optional[str] = None
+    evaluation_pending: bool = False  # Evaluated in background - GET /evaluation/{request_id}
+    late_agents: List[str] = []  # Routed assistants not waited for (first_confident / quorum)
 
 @app.get("/health")
 async def health():
-    """Health check - verify all assistants are reachable"""
-    status = {
-        "orchestrator": "healthy",
-        "assistants": {}
-    }
-    
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        for name, url in ASSISTANTS.items():
-            try:
-                resp = await client.get(f"{url}/health")
-                status["assistants"][name] = "healthy" if resp.status_code == 200 else "unhealthy"
-            except:
-                status["assistants"][name] = "unreachable"
-    
-    all_healthy = all(s == "healthy" for s in status["assistants"].values())
+    """Health check - cached state from the background prober (no upstream calls)"""
+    probes = health_prober.snapshot()
+    assistants = {name: probe["status"] for name, probe in probes.items()}
+    all_healthy = all(s == "healthy" for s in assistants.values())
     
     return {
-        **status,
         "status": "healthy" if all_healthy else "degraded",
+        "orchestrator": "healthy",
+        "assistants": assistants,
+        "latency_ms": {name: probe["latency_ms"] for name, probe in probes.items()},
+        "probe_age_seconds": {name: probe["age_seconds"] for name, probe in probes.items()},
+        "errors": {name: probe["error"] for name, probe in probes.items() if "error" in probe},
+        "circuits": {name: breaker.state for name, breaker in breakers.items()},
         "timestamp": datetime.now().isoformat()
     }
 
 @app.post("/query")
-async def query(request: QueryRequest) -> QueryResponse:
+async def query(request: QueryRequest, http_request: Request) -> QueryResponse:
     """
     Main query endpoint
     
@@ -257,10 +364,31 @@ async def query(request: QueryRequest) -> QueryResponse:
     2. Get response(s)
     3. Evaluate quality
     4. Return or refine
+    
+    Identical (normalized) queries are answered from the response cache;
+    concurrent identical queries share one pipeline run (single-flight).
     """
     
+    started = time.perf_counter()
+    versions = response_cache.snapshot()
+    cache_key = response_cache.key(request.query, request.user_id, request.language, request.context)
+    if request.cache:
+        cached = response_cache.get(cache_key)
+        if cached:
+            return QueryResponse(**cached["response"])
+    
+    # Options that change the answer are part of the flight key
+    flight_key = ("query", cache_key, request.evaluation, request.multi_strategy, request.cache)
+    return await cancel_on_disconnect(
+        http_request,
+        inflight.do(flight_key, lambda: run_query(request, cache_key, versions, started))
+    )
+
+async def run_query(request: QueryRequest, cache_key, versions: Dict[str, int], started: float) -> QueryResponse:
+    """Route, query assistant(s), evaluate, cache"""
+    
     # 1. Route query
-    agents = route_query(request.query, request.context or {})
+    agents = await route_query(request.query, request.context or {})
     
     if not agents:
         raise HTTPException(status_code=400, detail="Cannot determine appropriate assistant")
@@ -271,12 +399,59 @@ async def query(request: QueryRequest) -> QueryResponse:
         response = await query_assistant(agents[0], request.query, request.context)
     else:
         # Multi-agent collaboration
-        response = await query_multi_agents(agents, request.query, request.context)
+        strategy = select_strategy(request.query, request.multi_strategy)
+        response = await query_multi_agents(agents, request.query, request.context, strategy)
+    
+    # 3. Evaluate quality - on the critical path only when the policy asks for it
+    request_id = uuid.uuid4().hex
+    if not evaluation_policy.synchronous(agents, response.get("confidence", 0.5), request.evaluation):
+        defer_evaluation(request, cache_key, versions, request_id, response, agents, started)
+        return build_response(response, None, request_id)
     
-    # 3. Evaluate quality
     evaluation = await evaluate_response(request.query, response)
     
     # 4. Return result
+    result = build_response(response, evaluation, request_id)
+    cache_response(request, cache_key, versions, result, agents, started)
+    return result
+
+def defer_evaluation(request: QueryRequest, cache_key, versions: Dict[str, int], request_id: str, response: Dict, agents: List[str], started: float):
+    """Evaluate after the response was returned (outside the request deadline)"""
+    evaluations.pending(request_id, agents)
+    task = asyncio.create_task(
+        evaluate_in_background(request, cache_key, versions, request_id, response, agents, started, tracing.current()),
+        context=contextvars.Context()
+    )
+    background_evaluations.add(task)
+    task.add_done_callback(background_evaluations.discard)
+
+async def evaluate_in_background(request: QueryRequest, cache_key, versions: Dict[str, int], request_id: str, response: Dict, agents: List[str], started: float, parent: Optional[tracing.Span] = None):
+    """Store the evaluation, cache the response if it passed, tell the aquarium"""
+    with tracing.span("evaluate (background)", parent=parent, request_id=request_id):
+        evaluation = await evaluate_response(request.query, response)
+    result = build_response(response, evaluation, request_id)
+    evaluations.complete(request_id, evaluation, result.needs_refinement)
+    cache_response(request, cache_key, versions, result, agents, started)
+    await notify_aquarium(evaluations.get(request_id))
+
+def cache_response(request: QueryRequest, cache_key, versions: Dict[str, int], result: QueryResponse, agents: List[str], started: float):
+    """Cache complete responses that passed evaluation (low-quality ones get another try)"""
+    if request.cache and not result.needs_refinement and not result.late_agents:
+        response_cache.put(cache_key, result.model_dump(), agents, (time.perf_counter() - started) * 1000, versions)
+
+def build_response(response: Dict, evaluation: Optional[Dict], request_id: Optional[str] = None) -> QueryResponse:
+    """Final response from assistant output + evaluation (None = evaluation pending)"""
+    if evaluation is None:
+        return QueryResponse(
+            response=response["response"],
+            agent=response["agent"],
+            confidence=response.get("confidence", 0.5),
+            sources=response.get("sources", []),
+            request_id=request_id,
+            evaluation_pending=True,
+            late_agents=response.get("late_agents", [])
+        )
+    
     return QueryResponse(
         response=response["response"],
         agent=response["agent"],
@@ -285,46 +460,217 @@ async def query(request: QueryRequest) -> QueryResponse:
         quality_score=evaluation["quality_score"],
         evaluated=True,
         needs_refinement=evaluation["quality_score"] < 0.8,
-        suggestions=evaluation.get("suggestions", [])
+        suggestions=evaluation.get("suggestions", []),
+        request_id=request_id,
+        late_agents=response.get("late_agents", [])
     )
 
-def route_query(query: str, context: Dict) -> List[str]:
-    """Determine which assistant(s) should handle the query"""
-    
-    agents = []
-    q_lower = query.lower()
-    
-    # Email/messaging keywords
-    if any(kw in q_lower for kw in ["email", "mail", "zpráv", "chat", "conversation", "beeper"]):
-        agents.append("communications")
-    
-    # Tech docs
-    if any(kw in q_lower for kw in ["docs", "documentation", "how to", "tutorial", "qdrant", "supabase", "api"]):
-        agents.append("knowledge")
-    
-    # Projects
-    if any(kw in q_lower for kw in ["linear", "github", "project", "task", "issue", "pr", "deadline"]):
-        agents.append("projects")
-    
-    # Automation
-    if any(kw in q_lower for kw in ["n8n", "workflow", "automation", "trigger", "webhook"]):
-        agents.append("content")
-    
-    # Database/data
-    if any(kw in q_lower for kw in ["database", "query", "data", "collection", "vector"]):
-        agents.append("data")
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Streaming variant of /query (SSE)
+
+    Events, in order:
+    - routing {agents}                      as soon as routing is decided
+    - delta {agent, text}                   partial assistant output
+    - assistant_done {agent, confidence, sources}
+    - assistant_error {agent, detail}
+    - evaluation {quality_score, ...}
+    - done {QueryResponse}                  or error {detail}
+
+    When evaluation is deferred (policy / request), done comes first with
+    evaluation_pending and the evaluation follows it. With the quorum
+    strategy, assistants listed in done's late_agents keep streaming
+    (delta, assistant_done/assistant_error with late=true) after done.
+    """
+    started = time.perf_counter()
+    versions = response_cache.snapshot()
+    cache_key = response_cache.key(request.query, request.user_id, request.language, request.context)
+    cached = response_cache.get(cache_key) if request.cache else None
+    agents = [] if cached else await route_query(request.query, request.context or {})
+
+    async def cached_events():
+        response = cached["response"]
+        yield sse_event("routing", {"agents": [response["agent"]], "cached": True})
+        yield sse_event("delta", {"agent": response["agent"], "text": response["response"]})
+        yield sse_event("evaluation", {"quality_score": response["quality_score"], "suggestions": response["suggestions"]})
+        yield sse_event("done", response)
+
+    async def events():
+        yield sse_event("routing", {"agents": agents})
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(stream_assistant(agent, request.query, request.context, queue))
+            for agent in agents
+        ]
+
+        collector = MultiAgentCollector(
+            select_strategy(request.query, request.multi_strategy), agents,
+            reserve=EVALUATION_RESERVE_SECONDS
+        )
+
+        async def relay(late: bool = False):
+            """Forward queued events until enough() (late: until every assistant finished)"""
+            while collector.late() if late else not collector.enough():
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), None if late else collector.timeout())
+                except asyncio.TimeoutError:
+                    return  # Quorum deadline - answer with what arrived (request deadline if nothing did)
+                if event == "assistant_done":
+                    collector.add(data["agent"], data)
+                    data = {k: v for k, v in data.items() if k != "response"}
+                elif event == "assistant_error":
+                    collector.add(data["agent"], None)
+                yield sse_event(event, {**data, "late": True} if late and event != "delta" else data)
+
+        try:
+            async for frame in relay():
+                yield frame
+
+            if not collector.results:
+                yield sse_event("error", {"detail": collector.no_answer_detail()})
+                return
+
+            if collector.strategy != QUORUM:
+                for task in tasks:
+                    task.cancel()  # first_confident: remaining answers not needed
+
+            results = collector.ordered()  # Same order as /query
+            response = results[0] if len(agents) == 1 else merge_results(results)
+            if len(agents) > 1:
+                response["late_agents"] = collector.late()
+            request_id = uuid.uuid4().hex
+            if not evaluation_policy.synchronous(agents, response.get("confidence", 0.5), request.evaluation):
+                defer_evaluation(request, cache_key, versions, request_id, response, agents, started)
+                yield sse_event("done", build_response(response, None, request_id).model_dump())
+                entry = await evaluations.wait(request_id, EVALUATION_FOLLOWUP_SECONDS)
+                if entry:
+                    yield sse_event("evaluation", entry["evaluation"])
+            else:
+                evaluation = await evaluate_response(request.query, response)
+                yield sse_event("evaluation", evaluation)
+                result = build_response(response, evaluation, request_id)
+                cache_response(request, cache_key, versions, result, agents, started)
+                yield sse_event("done", result.model_dump())
+
+            # Quorum: late assistants keep streaming after done
+            if collector.strategy == QUORUM:
+                async for frame in relay(late=True):
+                    yield frame
+        finally:
+            # Client disconnected or stream finished - stop upstream streams
+            for task in tasks:
+                task.cancel()
+
+    stream = cached_events() if cached else events()
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def stream_assistant(agent_name: str, query: str, context: Optional[Dict], queue: asyncio.Queue):
+    """
+    Relay one assistant's /query/stream into the queue
+
+    Assistants without a streaming endpoint fall back to /query, delivered
+    as a single delta.
+    """
+    breaker = breakers[agent_name]
+    if not breaker.allow():
+        metrics.inc("lucy_upstream_errors_total", upstream=agent_name, kind="circuit_open")
+        await queue.put(("assistant_error", {"agent": agent_name, "detail": f"Assistant {agent_name} unavailable (circuit open)"}))
+        return
     
-    # Development
-    if any(kw in q_lower for kw in ["code", "vscode", "docker", "deploy", "build", "debug"]):
-        agents.append("dev")
+    started = time.perf_counter()
+    holding = True  # Our breaker slot - recorded or released exactly once
+    try:
+        text = []
+        with tracing.span(f"POST {agent_name} /query/stream", upstream=agent_name, kind="client"):
+            async with http_pool.client(agent_name).stream(
+                "POST",
+                "/query/stream",
+                json={"query": query, "context": context or {}},
+                headers=upstream_headers(),
+                timeout=deadline.timeout(60.0)
+            ) as resp:
+                if resp.status_code in (404, 405):
+                    data = None
+                else:
+                    resp.raise_for_status()
+                    data = {}
+                    async for event, payload in iter_sse(resp):
+                        if event == "delta":
+                            text.append(payload["text"])
+                            await queue.put(("delta", {"agent": agent_name, "text": payload["text"]}))
+                        elif event == "done":
+                            data = payload
+                        elif event == "error":
+                            raise RuntimeError(payload.get("detail", "stream error"))
+        if data is None:
+            # No streaming endpoint: hand the slot back - the /query fallback
+            # goes through the breaker itself (one probe per logical call)
+            breaker.release()
+            holding = False
+            result = await query_assistant(agent_name, query, context)
+            await queue.put(("delta", {"agent": agent_name, "text": result["response"]}))
+        else:
+            metrics.observe("lucy_upstream_latency_ms", (time.perf_counter() - started) * 1000, upstream=agent_name)
+            breaker.record(True, (time.perf_counter() - started) * 1000)
+            holding = False
+            result = {
+                "response": "".join(text) or "No response",
+                "agent": agent_name,
+                "confidence": data.get("confidence", 0.5),
+                "sources": data.get("sources", []),
+                "reasoning": data.get("reasoning", "")
+            }
+        await queue.put(("assistant_done", result))
+    except asyncio.CancelledError:
+        if holding:
+            breaker.release()
+        raise
+    except HTTPException as e:
+        # Raised by the /query fallback, which records its own outcome
+        await queue.put(("assistant_error", {"agent": agent_name, "detail": e.detail}))
+    except (httpx.TimeoutException, deadline.DeadlineExceeded):
+        metrics.inc("lucy_upstream_errors_total", upstream=agent_name, kind="timeout")
+        if holding and deadline.expired():
+            breaker.release()
+        elif holding:
+            breaker.record(False, (time.perf_counter() - started) * 1000)
+        await queue.put(("assistant_error", {"agent": agent_name, "detail": f"Assistant {agent_name} timeout"}))
+    except Exception as e:
+        metrics.inc("lucy_upstream_errors_total", upstream=agent_name, kind="transport")
+        if holding:
+            breaker.record(False, (time.perf_counter() - started) * 1000)
+        await queue.put(("assistant_error", {"agent": agent_name, "detail": f"Assistant {agent_name} error: {str(e)}"}))
+
+async def route_query(query: str, context: Dict) -> List[str]:
+    """Determine which assistant(s) should handle the query"""
     
-    # Business
-    if any(kw in q_lower for kw in ["invoice", "revenue", "customer", "deal", "contract", "finance"]):
-        agents.append("business")
+    # Semantic routing (embedding vs domain centroids), keyword fallback inside;
+    # without an embedding provider, or if embedding fails or exceeds its
+    # budget: one pass with the compiled keyword router
+    started = time.perf_counter()
+    router = get_semantic_router(block=False)
+    mode = "semantic" if router is not None else "keyword"
+    with tracing.span("route", router=mode) as route_span:
+        domains = None
+        if router is not None:
+            try:
+                route = await asyncio.wait_for(
+                    asyncio.to_thread(router.route, query),
+                    deadline.timeout(ROUTING_TIMEOUT_SECONDS)
+                )
+                domains = route.domains
+            except Exception as e:
+                mode = "keyword_fallback"
+                metrics.inc("lucy_routing_fallbacks_total", reason=type(e).__name__)
+                route_span.attributes["fallback"] = type(e).__name__
+        if domains is None:
+            domains = get_keyword_router().domains(query)
+        route_span.attributes["domains"] = [domain.value for domain in domains]
+    metrics.observe("lucy_routing_latency_ms", (time.perf_counter() - started) * 1000, router=mode)
     
-    # Personal
-    if any(kw in q_lower for kw in ["calendar", "todoist", "reminder", "schedule", "agenda", "meeting"]):
-        agents.append("personal")
+    agents = [domain.value for domain in domains if domain.value in ASSISTANTS]
     
     # Default: knowledge (fallback)
     if not agents:
@@ -339,18 +685,26 @@ async def query_assistant(agent_name: str, query: str, context: Optional[Dict])
     if not url:
         raise HTTPException(status_code=500, detail=f"Assistant {agent_name} not configured")
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            resp = await client.post(
-                f"{url}/query",
-                json={"query": query, "context": context or {}}
-            )
-            resp.raise_for_status()
-            data = resp.json()
-        except httpx.TimeoutException:
-            raise HTTPException(status_code=504, detail=f"Assistant {agent_name} timeout")
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"Assistant {agent_name} error: {str(e)}")
+    try:
+        budget = deadline.timeout(60.0)
+    except deadline.DeadlineExceeded:
+        raise HTTPException(status_code=504, detail=f"Deadline exceeded before calling {agent_name}")
+    
+    try:
+        resp = await guarded(agent_name, lambda: http_pool.client(agent_name).post(
+            "/query",
+            json={"query": query, "context": context or {}},
+            headers=upstream_headers(),
+            timeout=budget
+        ))
+        resp.raise_for_status()
+        data = resp.json()
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail=f"Assistant {agent_name} timeout")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Assistant {agent_name} error: {str(e)}")
     
     return {
         "response": data.get("response", "No response"),
@@ -360,20 +714,82 @@ async def query_assistant(agent_name: str, query: str, context: Optional[Dict])
         "reasoning": data.get("reasoning", "")
     }
 
-async def query_multi_agents(agents: List[str], query: str, context: Optional[Dict]) -> Dict:
-    """Query multiple assistants in parallel and merge results"""
+def upstream_headers() -> Dict[str, str]:
+    """Deadline + trace propagation headers for an upstream call"""
+    return {**deadline.headers(), **tracing.headers()}
+
+async def guarded(name: str, send) -> httpx.Response:
+    """
+    Call an upstream through its circuit breaker
+    
+    Open circuit → 503 without touching the network. Transport errors,
+    timeouts and 5xx count as failures; slow calls count per breaker config.
+    """
+    breaker = breakers[name]
+    if not breaker.allow():
+        metrics.inc("lucy_upstream_errors_total", upstream=name, kind="circuit_open")
+        raise HTTPException(status_code=503, detail=f"Assistant {name} unavailable (circuit open)")
+    
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"call {name}", upstream=name, kind="client") as call_span:
+            resp = await send()
+            call_span.attributes["status_code"] = resp.status_code
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except httpx.TimeoutException:
+        metrics.inc("lucy_upstream_errors_total", upstream=name, kind="timeout")
+        if deadline.expired():
+            breaker.release()  # Our request budget ran out, not the upstream's fault
+        else:
+            breaker.record(False, (time.perf_counter() - started) * 1000)
+        raise
+    except Exception:
+        metrics.inc("lucy_upstream_errors_total", upstream=name, kind="transport")
+        breaker.record(False, (time.perf_counter() - started) * 1000)
+        raise
     
-    import asyncio
+    latency_ms = (time.perf_counter() - started) * 1000
+    metrics.observe("lucy_upstream_latency_ms", latency_ms, upstream=name)
+    if resp.status_code >= 500:
+        metrics.inc("lucy_upstream_errors_total", upstream=name, kind="http_5xx")
+    breaker.record(resp.status_code < 500, latency_ms)
+    return resp
+
+async def query_multi_agents(agents: List[str], query: str, context: Optional[Dict], strategy: str = "all") -> Dict:
+    """Query multiple assistants in parallel and merge the answers the strategy waits for"""
     
     # Query all agents in parallel
-    tasks = [query_assistant(agent, query, context) for agent in agents]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    tasks = {asyncio.create_task(query_assistant(agent, query, context)): agent for agent in agents}
+    collector = MultiAgentCollector(strategy, agents, reserve=EVALUATION_RESERVE_SECONDS)
     
-    # Filter out exceptions
-    valid_results = [r for r in results if not isinstance(r, Exception)]
+    pending = set(tasks)
+    try:
+        while pending and not collector.enough():
+            done, pending = await asyncio.wait(
+                pending, timeout=collector.timeout(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break  # Quorum (or, with nothing yet, request) deadline
+            for task in done:
+                # Failed assistants are left out of the merge
+                collector.add(tasks[task], None if task.exception() else task.result())
+    finally:
+        # Late assistants (or all of them, if we were cancelled)
+        for task in pending:
+            task.cancel()
     
-    if not valid_results:
-        raise HTTPException(status_code=500, detail="All assistants failed")
+    if not collector.results:
+        timed_out = len(collector.finished) < len(agents)
+        raise HTTPException(status_code=504 if timed_out else 500, detail=collector.no_answer_detail())
+    
+    merged = merge_results(collector.ordered())
+    merged["late_agents"] = collector.late()
+    return merged
+
+def merge_results(valid_results: List[Dict]) -> Dict:
+    """Merge successful assistant responses into one"""
     
     # Merge responses
     merged_response = "\n\n".join([
@@ -398,33 +814,43 @@ async def query_multi_agents(agents: List[str], query: str, context: Optional[Di
 async def evaluate_response(query: str, response: Dict) -> Dict:
     """Evaluate response quality using Evaluator assistant"""
     
-    evaluator_url = ASSISTANTS["evaluator"]
+    try:
+        # Keep a little budget to return the answer itself
+        budget = deadline.timeout(30.0, reserve=EVALUATION_RESERVE_SECONDS)
+    except deadline.DeadlineExceeded:
+        return {
+            "quality_score": 0.7,
+            "issues": [],
+            "suggestions": [],
+            "reasoning": "Not evaluated - request deadline reached"
+        }
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            resp = await client.post(
-                f"{evaluator_url}/evaluate",
-                json={
-                    "query": query,
-                    "response": response["response"],
-                    "agent": response["agent"],
-                    "sources": response.get("sources", []),
-                    "confidence": response.get("confidence", 0.5)
-                }
-            )
-            resp.raise_for_status()
-            return resp.json()
-        except:
-            # Fallback if evaluator fails
-            return {
-                "quality_score": 0.7,
-                "issues": [],
-                "suggestions": [],
-                "reasoning": "Evaluator unavailable"
-            }
+    try:
+        resp = await guarded("evaluator", lambda: http_pool.client("evaluator").post(
+            "/evaluate",
+            json={
+                "query": query,
+                "response": response["response"],
+                "agent": response["agent"],
+                "sources": response.get("sources", []),
+                "confidence": response.get("confidence", 0.5)
+            },
+            headers=upstream_headers(),
+            timeout=budget
+        ))
+        resp.raise_for_status()
+        return resp.json()
+    except Exception:
+        # Fallback if evaluator fails (cancellation propagates)
+        return {
+            "quality_score": 0.7,
+            "issues": [],
+            "suggestions": [],
+            "reasoning": "Evaluator unavailable"
+        }
 
 @app.post("/briefing")
-async def morning_briefing(user_id: str = "default"):
+async def morning_briefing(http_request: Request, user_id: str = "default"):
     """
     Generate morning briefing
     
@@ -432,25 +858,295 @@ async def morning_briefing(user_id: str = "default"):
     - Linear tasks due today
     - Unread important emails
     - Calendar conflicts
+    
+    Voice, chat and thin client asking at once share one upstream call.
     """
     
     # Query personal assistant for briefing
-    response = await query_assistant("personal", "Generate morning briefing", {"user_id": user_id})
+    return await cancel_on_disconnect(
+        http_request,
+        inflight.do(
+            ("briefing", user_id),
+            lambda: query_assistant("personal", "Generate morning briefing", {"user_id": user_id})
+        )
+    )
+
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest):
+    """
+    Many queries in one request (n8n automations, scheduled briefings)
+    
+    Cache hits are answered first; the rest are routed, grouped by
+    assistant and sent as batched calls (BATCH_CHUNK queries each, at most
+    BATCH_CONCURRENCY calls in flight). Streams NDJSON, one line per query
+    as it completes: {id, index, ...QueryResponse} or {id, index, error},
+    then a summary line {done, total, failed, cached, elapsed_ms}.
+    Multi-agent queries wait for all their assistants.
+    """
+    if len(request.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch")
     
-    return response
+    ids = [item.id or str(index) for index, item in enumerate(request.queries)]
+    items = [
+        QueryRequest(
+            query=item.query,
+            user_id=request.user_id,
+            context=item.context,
+            language=request.language,
+            cache=request.cache,
+            evaluation=request.evaluation
+        )
+        for item in request.queries
+    ]
+    return StreamingResponse(run_batch(ids, items), media_type="application/x-ndjson")
+
+async def run_batch(ids: List[str], items: List[QueryRequest]):
+    """NDJSON lines for a batch, in completion order"""
+    started = time.perf_counter()
+    versions = response_cache.snapshot()
+    keys = [response_cache.key(item.query, item.user_id, item.language, item.context) for item in items]
+    failed = cached = 0
+    
+    def line(index: int, payload: Dict) -> str:
+        return json.dumps({"id": ids[index], "index": index, **payload}, ensure_ascii=False, default=str) + "\n"
+    
+    # 1. Cache hits right away
+    todo = []
+    for index, item in enumerate(items):
+        hit = response_cache.get(keys[index]) if item.cache else None
+        if hit:
+            cached += 1
+            yield line(index, hit["response"])
+        else:
+            todo.append(index)
+    
+    # 2. Route everything, group by assistant
+    routes = await asyncio.gather(*(route_query(items[i].query, items[i].context or {}) for i in todo))
+    agents_of = dict(zip(todo, routes))
+    groups: Dict[str, List[int]] = {}
+    for index, agents in agents_of.items():
+        for agent in agents:
+            groups.setdefault(agent, []).append(index)
+    
+    # 3. Batched assistant calls; answers arrive per (query, assistant)
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(batch_assistant(agent, indices[start:start + BATCH_CHUNK], items, queue, semaphore))
+        for agent, indices in groups.items()
+        for start in range(0, len(indices), BATCH_CHUNK)
+    ]
+    answers: Dict[int, Dict[str, Any]] = {index: {} for index in todo}
+    
+    try:
+        emitted = set()
+        while len(emitted) < len(todo):
+            try:
+                kind, index, payload = await asyncio.wait_for(queue.get(), deadline.timeout())
+            except (asyncio.TimeoutError, deadline.DeadlineExceeded):
+                # Batch budget spent: every query still open gets an error line
+                for index in todo:
+                    if index not in emitted:
+                        failed += 1
+                        yield line(index, {"error": "Deadline exceeded before an answer arrived"})
+                break
+            if kind == "answer":
+                agent, result = payload
+                answers[index][agent] = result
+                if len(answers[index]) == len(agents_of[index]):
+                    tasks.append(asyncio.create_task(
+                        finish_batch_item(index, items[index], keys[index], versions, agents_of[index], answers[index], started, queue)
+                    ))
+                continue
+            
+            emitted.add(index)
+            failed += "error" in payload
+            yield line(index, payload)
+        
+        yield json.dumps({
+            "done": True,
+            "total": len(items),
+            "failed": failed,
+            "cached": cached,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }) + "\n"
+    finally:
+        # Client disconnected or batch finished
+        for task in tasks:
+            task.cancel()
+
+async def batch_assistant(agent_name: str, indices: List[int], items: List[QueryRequest], queue: asyncio.Queue, semaphore: asyncio.Semaphore):
+    """
+    One batched call for a chunk of queries; answers (or error strings) go
+    to the queue - exactly one per index, whatever happens to the call
+    """
+    try:
+        async with semaphore:
+            results = await query_assistant_batch(agent_name, [items[i] for i in indices])
+    except Exception as e:
+        results = [f"Assistant {agent_name} error: {str(e)}"] * len(indices)
+    for index, result in zip(indices, results):
+        await queue.put(("answer", index, (agent_name, result)))
+
+async def query_assistant_batch(agent_name: str, items: List[QueryRequest]) -> List[Any]:
+    """
+    Assistant's /query/batch -> per query a result dict or an error string
+    
+    Assistants without a batch endpoint get one /query per item.
+    """
+    
+    async def one(item: QueryRequest):
+        try:
+            return await query_assistant(agent_name, item.query, item.context)
+        except HTTPException as e:
+            return e.detail
+    
+    try:
+        budget = deadline.timeout(120.0)
+    except deadline.DeadlineExceeded:
+        return [f"Deadline exceeded before calling {agent_name}"] * len(items)
+    
+    try:
+        resp = await guarded(agent_name, lambda: http_pool.client(agent_name).post(
+            "/query/batch",
+            json={"queries": [
+                {"id": str(n), "query": item.query, "context": item.context or {}}
+                for n, item in enumerate(items)
+            ]},
+            headers=upstream_headers(),
+            timeout=budget
+        ))
+        if resp.status_code in (404, 405):
+            return await asyncio.gather(*(one(item) for item in items))
+        resp.raise_for_status()
+        data = resp.json()["results"]
+    except HTTPException as e:
+        return [e.detail] * len(items)
+    except httpx.TimeoutException:
+        return [f"Assistant {agent_name} timeout"] * len(items)
+    except Exception as e:
+        return [f"Assistant {agent_name} error: {str(e)}"] * len(items)
+    
+    # Match results to queries by id (position if the assistant sends none);
+    # queries the assistant left out get an error instead of no answer
+    by_id = {
+        str(result.get("id", n)): result
+        for n, result in enumerate(data) if isinstance(result, dict)
+    }
+    answers = []
+    for n in range(len(items)):
+        result = by_id.get(str(n))
+        if result is None:
+            answers.append(f"Assistant {agent_name} error: no result for this query in the batch response")
+        elif "error" in result:
+            answers.append(f"Assistant {agent_name} error: {result['error']}")
+        else:
+            answers.append({
+                "response": result.get("response", "No response"),
+                "agent": agent_name,
+                "confidence": result.get("confidence", 0.5),
+                "sources": result.get("sources", []),
+                "reasoning": result.get("reasoning", "")
+            })
+    return answers
+
+async def finish_batch_item(index: int, item: QueryRequest, cache_key, versions: Dict[str, int], agents: List[str], answers: Dict[str, Any], started: float, queue: asyncio.Queue):
+    """Merge a query's answers, evaluate per policy, cache, emit its line (an error line if that fails)"""
+    try:
+        payload = await batch_item_payload(item, cache_key, versions, agents, answers, started)
+    except Exception as e:
+        payload = {"error": f"Batch item failed: {str(e)}"}
+    await queue.put(("line", index, payload))
+
+async def batch_item_payload(item: QueryRequest, cache_key, versions: Dict[str, int], agents: List[str], answers: Dict[str, Any], started: float) -> Dict:
+    """QueryResponse dict for a batch item, or {error} if every assistant failed"""
+    results = [answers[agent] for agent in agents if isinstance(answers[agent], dict)]
+    if not results:
+        errors = [answers[agent] for agent in agents]
+        return {"error": "; ".join(errors)}
+    
+    response = results[0] if len(agents) == 1 else merge_results(results)
+    request_id = uuid.uuid4().hex
+    if evaluation_policy.synchronous(agents, response.get("confidence", 0.5), item.evaluation):
+        result = build_response(response, await evaluate_response(item.query, response), request_id)
+        cache_response(item, cache_key, versions, result, agents, started)
+    else:
+        defer_evaluation(item, cache_key, versions, request_id, response, agents, started)
+        result = build_response(response, None, request_id)
+    return result.model_dump()
+
+@app.get("/evaluation/{request_id}")
+async def get_evaluation(request_id: str):
+    """Result of a background evaluation (status pending | done)"""
+    entry = evaluations.get(request_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired request_id")
+    return entry
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(request: CacheInvalidation):
+    """
+    Invalidate cached responses (called by ingestion / memory writers)
+    
+    Collections and memory namespaces map to the domains that use them.
+    """
+    if request.all:
+        response_cache.clear()
+        return {"cleared": True}
+    
+    domains = response_cache.invalidate_domains(request.domains)
+    for collection in request.collections:
+        domains += response_cache.invalidate_collection(collection)
+    for namespace in request.namespaces:
+        domains += response_cache.invalidate_namespace(namespace)
+    
+    return {"invalidated_domains": sorted(set(domains))}
+
+def refresh_metrics():
+    """Copy counters owned by other components into the registry"""
+    cache = response_cache.stats()
+    metrics.set("lucy_response_cache_hits_total", cache["hits"])
+    metrics.set("lucy_response_cache_misses_total", cache["misses"])
+    metrics.set("lucy_response_cache_hit_ratio", cache["hit_rate"])
+    metrics.set("lucy_single_flight_coalesced_total", inflight.coalesced)
+    for name, breaker in breakers.items():
+        metrics.set("lucy_circuit_open", int(breaker.state != "closed"), upstream=name)
+    metrics.set("lucy_evaluations_total", evaluation_policy.sync, mode="sync")
+    metrics.set("lucy_evaluations_total", evaluation_policy.deferred, mode="deferred")
+    metrics.set("lucy_uptime_seconds", round(time.time() - metrics.started, 1))
 
 @app.get("/stats")
 async def stats():
     """System statistics"""
     
-    # Placeholder - implement actual stats
+    router = get_semantic_router(block=False)
+    refresh_metrics()
+    
+    queries = metrics.value("lucy_request_latency_ms", endpoint="/query")
     return {
-        "orchestrator_uptime": "healthy",
-        "total_queries_today": 0,  # TODO: Track in Supabase
+        "orchestrator_uptime_seconds": round(time.time() - metrics.started, 1),
+        "total_queries": int(
+            metrics.total("lucy_requests_total", endpoint="/query")
+            + metrics.total("lucy_requests_total", endpoint="/query/stream")
+        ),
         "active_assistants": len(ASSISTANTS),
-        "avg_response_time": "2.3s"  # TODO: Calculate
+        "avg_response_time": f"{queries.total / queries.count / 1000:.2f}s" if queries else None,
+        "metrics": metrics.snapshot(),
+        "http_pool": http_pool.stats(),
+        "response_cache": response_cache.stats(),
+        "single_flight": inflight.stats(),
+        "circuit_breakers": {name: breaker.stats() for name, breaker in breakers.items()},
+        "evaluation": {**evaluation_policy.stats(), **evaluations.stats()},
+        "router": router.stats() if router else {"mode": "keyword"},
+        "tracing": tracing.exporter.stats()
     }
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Same metrics as /stats in Prometheus text format"""
+    refresh_metrics()
+    return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -10,6 +10,14 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
 
+from knowledge.embeddings import EmbeddingService, get_embedding_service
+from core import deadline, tracing
+from core.response_cache import notify_invalidation
+
+# Minimum cosine similarity for a semantic (non-substring) memory match
+MIN_SEMANTIC_SCORE = 0.3
+MIN_SEMANTIC_BUDGET_SECONDS = 0.5  # Less request budget left -> text match only
+
 @dataclass
 class Memory:
     """Single memory entry"""
@@ -27,10 +35,18 @@ class Memory:
 class MemoryManager:
     """Manages Lucy's memory system using Mem0"""
     
-    def __init__(self, storage_dir: str = "./lucy_memories"):
+    def __init__(
+        self,
+        storage_dir: str = "./lucy_memories",
+        embedder: Optional[EmbeddingService] = None
+    ):
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
         
+        # Shared embedding service (same one the KB uses) - memory content
+        # is keyed by hash, so unchanged memories are embedded only once
+        self.embedder = embedder if embedder is not None else get_embedding_service()
+        
         # Namespace storage
         self.namespaces = {}
         self._load_all_namespaces()
@@ -95,6 +111,7 @@ class MemoryManager:
         
         # Save
         self._save_namespace(namespace)
+        notify_invalidation(namespaces=[namespace])  # Orchestrator response cache
         
         return memory
     
@@ -111,6 +128,20 @@ class MemoryManager:
             return []
         
         memories = self.namespaces[namespace]['memories']
+        
+        # Embedding many memories is the slow path - text match when the request is nearly out of time
+        left = deadline.remaining()
+        if query and self.embedder is not None and (left is None or left >= MIN_SEMANTIC_BUDGET_SECONDS):
+            candidates = [
+                m for m in memories
+                if not category or m['category'] == category
+            ]
+            try:
+                with tracing.span("memory.search", root=False, namespace=namespace, candidates=len(candidates)):
+                    return self._semantic_search(candidates, query, limit)
+            except Exception as e:
+                print(f"Semantic memory search failed, using text match: {e}")
+        
         results = []
         
         for mem_dict in memories:
@@ -130,6 +161,30 @@ class MemoryManager:
         
         return results
     
+    def _semantic_search(
+        self,
+        candidates: List[Dict],
+        query: str,
+        limit: int
+    ) -> List[Memory]:
+        """Rank memories by embedding similarity (substring hits always qualify)"""
+        
+        if not candidates:
+            return []
+        
+        matrix = self.embedder.embed([m['content'] for m in candidates])
+        scores = matrix @ self.embedder.embed_one(query)
+        
+        query_lower = query.lower()
+        ranked = []
+        for mem_dict, score in zip(candidates, scores):
+            substring_hit = query_lower in mem_dict['content'].lower()
+            if substring_hit or score >= MIN_SEMANTIC_SCORE:
+                ranked.append((substring_hit, float(score), mem_dict))
+        
+        ranked.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        return [Memory(**m) for _, _, m in ranked[:limit]]
+    
     def get_memories_by_category(
         self,
         namespace: str,
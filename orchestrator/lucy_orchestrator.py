@@ -16,10 +16,12 @@ sys.path.append(str(Path(__file__).parent.parent))
 from lucy_config import (
     LucyDomain,
     LUCY_ASSISTANTS,
-    ROUTING_RULES,
     MULTI_DOMAIN_PATTERNS
 )
+from core.keyword_router import get_keyword_router
+from core.semantic_router import get_semantic_router
 from knowledge.kb_manager import KnowledgeBaseManager, SearchResult
+from knowledge.embeddings import get_embedding_service
 from memory_manager import MemoryManager, LearningSystem
 
 @dataclass
@@ -39,8 +41,10 @@ class LucyOrchestrator:
     """
     
     def __init__(self):
-        self.kb = KnowledgeBaseManager()
-        self.memory = MemoryManager(storage_dir="./lucy_memories")
+        # One embedding service (cache + batcher) shared by KB and memory
+        self.embedder = get_embedding_service()
+        self.kb = KnowledgeBaseManager(embedder=self.embedder)
+        self.memory = MemoryManager(storage_dir="./lucy_memories", embedder=self.embedder)
         self.learning = LearningSystem(self.memory)
         
         # Initialize all assistant namespaces
@@ -73,16 +77,25 @@ class LucyOrchestrator:
                     reasoning=f"Matched multi-domain pattern: {pattern_config['pattern']}"
                 )
         
-        # Single domain routing
-        matched_domains = []
-        for keyword, domains in ROUTING_RULES.items():
-            if keyword in query_lower:
-                matched_domains.extend(domains)
+        # Semantic routing against domain centroids (needs an embedding provider)
+        semantic = get_semantic_router()
+        if semantic is not None:
+            route = semantic.route(query)
+            if route.strategy != 'keyword' and route.domains:
+                return RoutingDecision(
+                    primary_domain=route.domains[0],
+                    secondary_domains=route.domains[1:],
+                    strategy='single' if route.strategy == 'single' else 'parallel',
+                    confidence=round(route.confidence, 2),
+                    reasoning=f"Semantic match: {dict(list(route.scores.items())[:3])}"
+                )
+        
+        # Keyword routing (one pass, shared compiled router)
+        router = get_keyword_router()
+        domain_counts = router.domain_counts(query)
         
-        if matched_domains:
+        if domain_counts:
             # Most common domain wins
-            from collections import Counter
-            domain_counts = Counter(matched_domains)
             primary_domain = domain_counts.most_common(1)[0][0]
             
             return RoutingDecision(
@@ -90,7 +103,7 @@ class LucyOrchestrator:
                 secondary_domains=[],
                 strategy='single',
                 confidence=0.8,
-                reasoning=f"Matched keywords: {[k for k, d in ROUTING_RULES.items() if k in query_lower]}"
+                reasoning=f"Matched keywords: {router.matched_keywords(query)}"
             )
         
         # Default to orchestrator for complex/unclear queries
@@ -247,20 +260,23 @@ class LucyOrchestrator:
         results = {}
         
         for collection in config.qdrant_collections:
+            # Only a 500-char preview travels over the VPN;
+            # full text can be fetched later via kb.fetch_content(point_id)
             if collection == "email_history":
-                search_results = self.kb.search_emails(query=query, limit=5)
+                search_results = self.kb.search_emails(query=query, limit=5, preview_chars=500)
             elif collection == "tech_docs_vectors":
-                search_results = self.kb.search_tech_docs(query=query, limit=5)
+                search_results = self.kb.search_tech_docs(query=query, limit=5, preview_chars=500)
             elif collection == "beeper_history":
-                search_results = self.kb.search_beeper(query=query, limit=5)
+                search_results = self.kb.search_beeper(query=query, limit=5, preview_chars=500)
             else:
                 continue
             
             results[collection] = [
                 {
-                    "content": r.content[:500],  # Truncate
+                    "content": r.content,
                     "score": r.score,
-                    "metadata": r.metadata
+                    "metadata": r.metadata,
+                    "point_id": r.point_id
                 }
                 for r in search_results
             ]
@@ -304,14 +320,15 @@ class LucyOrchestrator:
             }
         )
     
-    def get_system_stats(self) -> Dict:
-        """Get overall system statistics"""
+    def get_system_stats(self, wait: bool = False) -> Dict:
+        """Get overall system statistics (KB stats from the cached snapshot)"""
         
-        kb_stats = self.kb.get_all_stats()
+        kb_stats = self.kb.get_all_stats(wait=wait)
         memory_stats = self.memory.get_all_stats()
         
         return {
             "knowledge_base": kb_stats,
+            "kb_rerank": self.kb.get_rerank_stats(),
             "memory": memory_stats,
             "assistants": {
                 domain.value: {
@@ -354,7 +371,7 @@ if __name__ == "__main__":
     # Show system stats
     print(f"\n{'='*70}")
     print("\n📊 System Statistics:")
-    stats = orchestrator.get_system_stats()
+    stats = orchestrator.get_system_stats(wait=True)
     
     print("\n   Knowledge Base:")
     for name, stat in stats['knowledge_base'].items():
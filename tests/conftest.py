@@ -0,0 +1,10 @@
+"""Shared test setup: repo root importable, no external services"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.pop("OPENAI_API_KEY", None)  # Keyword routing, no embedding provider
+os.environ.setdefault("LUCY_TRACING", "0")
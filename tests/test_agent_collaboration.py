@@ -0,0 +1,57 @@
+"""AgentCollaborationProtocol derives upstream timeouts from the request deadline"""
+
+import asyncio
+
+import httpx
+
+from core import deadline
+from core.agent_collaboration import AgentCollaborationProtocol, AgentDomain, AgentResponse
+
+ANSWER = AgentResponse(agent="data", response="42", confidence=0.9, sources=[], reasoning="", metadata={})
+
+
+def mock_httpx(monkeypatch, seen):
+    def handler(request):
+        seen.append((request.url.path, request.headers.get(deadline.DEADLINE_HEADER),
+                     request.extensions["timeout"]["read"]))
+        if request.url.path == "/evaluate":
+            return httpx.Response(200, json={"quality_score": 0.9})
+        return httpx.Response(200, json={"response": "42"})
+
+    real = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda: real(transport=httpx.MockTransport(handler)))
+
+
+def test_calls_carry_the_remaining_budget(monkeypatch):
+    seen = []
+    mock_httpx(monkeypatch, seen)
+
+    async def run():
+        with deadline.scope(5000):
+            await AgentCollaborationProtocol.orchestrate_multi_agent("q", [AgentDomain.DATA], {"data": "http://data"})
+            await AgentCollaborationProtocol.evaluate_response("q", ANSWER, "http://evaluator")
+
+    asyncio.run(run())
+    (query_path, query_header, query_timeout), (eval_path, eval_header, eval_timeout) = seen
+    assert (query_path, eval_path) == ("/query", "/evaluate")
+    assert 0 < int(query_header) <= 5000 and 0 < int(eval_header) <= 5000
+    assert query_timeout <= 5.0
+    assert eval_timeout <= 5.0 - deadline.EVALUATION_RESERVE_SECONDS
+
+
+def test_spent_budget_skips_the_calls(monkeypatch):
+    seen = []
+    mock_httpx(monkeypatch, seen)
+
+    async def run():
+        with deadline.scope(0):
+            agents = await AgentCollaborationProtocol.orchestrate_multi_agent(
+                "q", [AgentDomain.DATA], {"data": "http://data"}
+            )
+            evaluation = await AgentCollaborationProtocol.evaluate_response("q", ANSWER, "http://evaluator")
+        return agents, evaluation
+
+    agents, evaluation = asyncio.run(run())
+    assert agents is None
+    assert evaluation.evaluator_reasoning == "Not evaluated - request deadline reached"
+    assert seen == []
@@ -0,0 +1,77 @@
+"""/query/batch always finishes with one line per query and a summary"""
+
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+import lucy_orchestrator as orchestrator
+from core.circuit_breaker import CircuitBreaker
+
+
+def batch_lines(handler, queries, headers=None):
+    orchestrator.http_pool._clients["personal"] = httpx.AsyncClient(
+        base_url="http://personal", transport=httpx.MockTransport(handler)
+    )
+    orchestrator.breakers["personal"] = CircuitBreaker("personal")
+    client = TestClient(orchestrator.app)
+    resp = client.post("/query/batch", json={
+        "queries": [{"id": f"q{n}", "query": q} for n, q in enumerate(queries)],
+        "cache": False,
+        "evaluation": "async"
+    }, headers=headers or {})
+    assert resp.status_code == 200
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+QUERIES = ["calendar today", "schedule meeting", "calendar tomorrow"]
+
+
+def answer(item):
+    return {"id": item["id"], "response": f"answer to {item['query']}", "confidence": 0.9, "sources": []}
+
+
+def test_short_batch_response_yields_error_lines():
+    def handler(request):
+        items = json.loads(request.content)["queries"]
+        return httpx.Response(200, json={"results": [answer(item) for item in items[:-1]]})
+
+    lines = batch_lines(handler, QUERIES)
+    results, summary = lines[:-1], lines[-1]
+    assert summary["done"] and summary["total"] == 3 and summary["failed"] == 1
+    assert sorted(line["id"] for line in results) == ["q0", "q1", "q2"]
+    errors = [line for line in results if "error" in line]
+    assert [line["id"] for line in errors] == ["q2"]
+
+
+def test_failing_assistant_call_yields_error_lines():
+    def handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    lines = batch_lines(handler, QUERIES)
+    assert lines[-1]["failed"] == 3
+    assert all("error" in line for line in lines[:-1])
+
+
+def test_results_matched_by_id():
+    def handler(request):
+        items = json.loads(request.content)["queries"]
+        return httpx.Response(200, json={"results": [answer(item) for item in reversed(items)]})
+
+    lines = batch_lines(handler, QUERIES)
+    for line in lines[:-1]:
+        assert line["response"] == f"answer to {QUERIES[line['index']]}"
+    assert lines[-1]["failed"] == 0
+
+
+def test_batch_deadline_closes_open_queries():
+    async def handler(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={"results": []})
+
+    started = time.monotonic()
+    lines = batch_lines(handler, QUERIES, headers={"X-Lucy-Deadline-Ms": "300"})
+    assert time.monotonic() - started < 2
+    assert lines[-1]["done"] and lines[-1]["failed"] == 3
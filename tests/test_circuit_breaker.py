@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import circuit_breaker
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def make_breaker(**overrides):
+    settings = dict(window=10, min_calls=4, failure_rate=0.5, consecutive=3,
+                    slow_ms=1000, open_seconds=30, half_open_calls=1)
+    settings.update(overrides)
+    return CircuitBreaker("test", **settings)
+
+
+def call(breaker, ok=True, latency_ms=10.0):
+    assert breaker.allow()
+    breaker.record(ok, latency_ms)
+
+
+def test_consecutive_failures_open(clock):
+    breaker = make_breaker(failure_rate=1.0)
+    call(breaker, ok=False)
+    call(breaker, ok=False)
+    call(breaker)  # A success resets the streak
+    call(breaker, ok=False)
+    call(breaker, ok=False)
+    assert breaker.state == CLOSED
+
+    call(breaker, ok=False)
+    assert breaker.state == OPEN
+    assert breaker.stats()["retry_in_seconds"] == 30
+
+
+def test_failure_rate_opens_and_slow_calls_count(clock):
+    breaker = make_breaker(consecutive=100)
+    call(breaker)
+    call(breaker, latency_ms=5000)  # Slow = failed
+    call(breaker)
+    assert breaker.state == CLOSED  # Below min_calls
+
+    call(breaker, ok=False)
+    assert breaker.state == OPEN
+    assert breaker.stats()["failure_rate"] == 0.5
+
+
+def test_open_rejects_until_probe_and_success_closes(clock):
+    breaker = make_breaker(consecutive=1)
+    call(breaker, ok=False)
+
+    clock[0] += 29
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+    clock[0] += 1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # One probe at a time
+
+    breaker.record(True, 10.0)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_calls"] == 1
+    call(breaker)
+
+
+def test_failed_probe_reopens_and_release_frees_the_slot(clock):
+    breaker = make_breaker(consecutive=1)
+    call(breaker, ok=False)
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.release()  # Cancelled probe - no outcome
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+    breaker.record(False, 10.0)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+    assert not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record(True, 5000)  # Slow probe counts as a failure
+    assert breaker.state == OPEN
@@ -0,0 +1,100 @@
+"""EmbeddingService batch worker: failures reach every caller, the worker recovers"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from knowledge.embeddings import EmbeddingService, HashEmbeddingProvider
+
+
+class ShortProvider(HashEmbeddingProvider):
+    """Returns one vector fewer than asked while `short` is set"""
+
+    name = "short"
+
+    def __init__(self):
+        super().__init__(dim=8)
+        self.short = True
+
+    def embed(self, texts):
+        vectors = super().embed(texts)
+        return vectors[:-1] if self.short else vectors
+
+
+class FailingProvider(HashEmbeddingProvider):
+    name = "failing"
+
+    def __init__(self):
+        super().__init__(dim=8)
+        self.fail = True
+
+    def embed(self, texts):
+        if self.fail:
+            raise RuntimeError("provider down")
+        return super().embed(texts)
+
+
+def test_short_provider_response_fails_callers_and_worker_recovers():
+    provider = ShortProvider()
+    service = EmbeddingService(provider, max_wait_ms=20, timeout=5)
+
+    with pytest.raises(ValueError, match="returned 1 vectors for 2 texts"):
+        service.embed(["first text", "second text"])
+    assert not service._pending
+
+    provider.short = False
+    vectors = service.embed(["first text", "second text"])
+    assert vectors.shape == (2, 8)
+    assert service.stats()["provider_errors"] == 1
+
+
+def test_provider_error_reaches_concurrent_callers():
+    service = EmbeddingService(FailingProvider(), max_wait_ms=50, timeout=5)
+    errors = []
+
+    def call(text):
+        try:
+            service.embed([text])
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call, args=(f"text {n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert errors == ["provider down"] * 4
+    assert not service._pending
+
+
+def test_unexpected_flush_error_fails_batch_and_worker_keeps_running(monkeypatch):
+    service = EmbeddingService(HashEmbeddingProvider(dim=8), timeout=5)
+    flush = service._flush
+    calls = []
+
+    def crash_once(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise KeyError("worker bug")
+        flush(batch)
+
+    monkeypatch.setattr(service, "_flush", crash_once)
+    with pytest.raises(KeyError):
+        service.embed(["lost text"])
+    assert not service._pending
+
+    assert np.allclose(np.linalg.norm(service.embed(["new text"]), axis=1), 1.0)
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_worker_exit_resets_worker():
+    service = EmbeddingService(HashEmbeddingProvider(dim=8), timeout=5)
+    service.embed(["some text"])
+    worker = service._worker
+    service._queue.put(None)  # Malformed item: the worker thread dies
+    worker.join(timeout=5)
+
+    assert service._worker is None or service._worker is not worker
+    assert service.embed(["other text"]).shape == (1, 8)
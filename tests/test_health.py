@@ -0,0 +1,24 @@
+import asyncio
+
+import httpx
+
+from core.health import HealthProber
+from core.http_pool import HTTPPool
+
+
+def test_probes_are_not_counted_as_requests():
+    pool = HTTPPool({"personal": "http://personal", "evaluator": "http://evaluator"})
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"status": "ok"}))
+    for name, url in pool.upstreams.items():
+        pool._clients[name] = httpx.AsyncClient(base_url=url, transport=transport)
+
+    async def run():
+        prober = HealthProber(pool)
+        await prober.probe_all()
+        await prober.probe_all()
+        await pool.client("personal").post("/query", json={})
+        await pool.close()
+        return prober
+
+    assert asyncio.run(run()).rounds == 2
+    assert pool.stats()["requests"] == {"personal": 1}
@@ -0,0 +1,124 @@
+"""Ingestion checkpoint: resume after failed batches and interrupted runs"""
+
+import json
+
+import pytest
+from qdrant_client import QdrantClient
+
+from knowledge.embeddings import EmbeddingService, HashEmbeddingProvider
+from knowledge.ingest import IngestionCheckpoint, IngestionPipeline, SourceItem
+from knowledge.kb_manager import KnowledgeBaseManager
+
+COLLECTION = "tech_docs_vectors"
+
+
+class FlakyProvider(HashEmbeddingProvider):
+    """Fails the batches that contain a marked text"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_on = None
+
+    def embed(self, texts):
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            raise RuntimeError("embedding outage")
+        return super().embed(texts)
+
+
+@pytest.fixture
+def kb(tmp_path):
+    provider = FlakyProvider()
+    kb = KnowledgeBaseManager(
+        client=QdrantClient(":memory:"),
+        embedder=EmbeddingService(provider),
+        lexical_dir=str(tmp_path / "lexical")
+    )
+    kb.cache = None
+    kb.provider = provider
+    return kb
+
+
+def pipeline(kb, tmp_path):
+    return IngestionPipeline(kb, COLLECTION, kb.embedder, state_dir=str(tmp_path / "ingest"), batch_size=2, workers=1)
+
+
+def doc(name, text):
+    return SourceItem(item_id=f"tool/{name}.md", text=text, payload={"title": name, "url": name, "tool": "tool", "type": "markdown"})
+
+
+def paragraphs(n, word):
+    return "\n\n".join(f"{word} paragraph {i} " + "x" * 1500 for i in range(n))
+
+
+def stored_ids(kb):
+    points, _ = kb.client.scroll(COLLECTION, limit=1000)
+    return {str(p.id) for p in points}
+
+
+def test_failed_batch_is_retried_and_not_indexed(kb, tmp_path, monkeypatch):
+    docs = [doc("a", "alpha text"), doc("b", "beta text"), doc("c", "gamma text"), doc("d", "delta text")]
+    lexical_calls = []
+    monkeypatch.setattr(kb, "update_lexical_index", lambda collection, added, removed: lexical_calls.append(added))
+
+    kb.provider.fail_on = "gamma"
+    stats = pipeline(kb, tmp_path).run(docs, progress_every=0)
+    assert stats.errors == 1 and stats.chunks_upserted == 2
+    assert len(lexical_calls[0]) == 2  # Only chunks from the batch that landed
+
+    kb.provider.fail_on = None
+    stats = pipeline(kb, tmp_path).run(docs, progress_every=0)
+    assert stats.chunks_skipped == 2 and stats.chunks_upserted == 2
+    assert len(stored_ids(kb)) == 4
+
+
+def test_interrupted_run_deletes_stale_points_on_resume(kb, tmp_path, monkeypatch):
+    pipeline(kb, tmp_path).run([doc("a", paragraphs(3, "alpha"))], progress_every=0)
+    assert len(stored_ids(kb)) >= 3
+
+    # Item shrinks to one chunk; the run dies before deleting the old chunks
+    crashing = pipeline(kb, tmp_path)
+    monkeypatch.setattr(crashing.client, "delete", lambda **kwargs: (_ for _ in ()).throw(RuntimeError("crash")))
+    with pytest.raises(RuntimeError):
+        crashing.run([doc("a", "alpha now short")], progress_every=0)
+    monkeypatch.undo()
+
+    checkpoint = json.loads((tmp_path / "ingest" / f"{COLLECTION}.checkpoint.json").read_text())
+    assert len(checkpoint["stale"]) >= 2
+
+    stats = pipeline(kb, tmp_path).run([doc("a", "alpha now short")], progress_every=0)
+    assert stats.points_deleted == len(checkpoint["stale"])
+    assert stored_ids(kb) == set(checkpoint["items"]["tool/a.md"])
+
+
+def test_chunk_coming_back_is_not_deleted(tmp_path):
+    checkpoint = IngestionCheckpoint(tmp_path / "c.json")
+    checkpoint.set_item("a", ["p1", "p2"])
+    checkpoint.set_item("a", ["p1"])
+    assert list(checkpoint.stale) == ["p2"]
+    checkpoint.set_item("a", ["p1", "p2"])
+    assert not checkpoint.stale
+
+
+def test_items_missing_from_a_complete_pass_are_deleted(kb, tmp_path):
+    pipeline(kb, tmp_path).run([doc("a", "alpha text"), doc("b", "beta text")], progress_every=0)
+    assert len(stored_ids(kb)) == 2
+
+    partial = pipeline(kb, tmp_path).run([doc("a", "alpha text")], progress_every=0, complete=False)
+    assert partial.items_removed == 0 and len(stored_ids(kb)) == 2
+
+    stats = pipeline(kb, tmp_path).run([doc("a", "alpha text")], progress_every=0)
+    assert stats.items_removed == 1 and stats.points_deleted == 1
+    checkpoint = json.loads((tmp_path / "ingest" / f"{COLLECTION}.checkpoint.json").read_text())
+    assert list(checkpoint["items"]) == ["tool/a.md"]
+    assert stored_ids(kb) == set(checkpoint["items"]["tool/a.md"])
+
+
+def test_checkpoint_is_saved_on_an_interval_not_per_batch(kb, tmp_path, monkeypatch):
+    saves = []
+    monkeypatch.setattr(IngestionCheckpoint, "save", lambda self: saves.append(1))
+
+    docs = [doc(str(i), f"text {i}") for i in range(20)]
+    stats = IngestionPipeline(kb, COLLECTION, kb.embedder, state_dir=str(tmp_path / "ingest"),
+                              batch_size=2, workers=1, checkpoint_seconds=3600).run(docs, progress_every=0)
+    assert stats.batches == 10
+    assert len(saves) == 1  # Final save only
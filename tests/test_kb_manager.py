@@ -0,0 +1,88 @@
+"""KnowledgeBaseManager over in-memory Qdrant"""
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from knowledge.embeddings import EmbeddingService, HashEmbeddingProvider
+from knowledge.kb_manager import PREVIEW_CHARS, PREVIEW_FIELD, KnowledgeBaseManager
+
+
+class CountingClient:
+    """Counts calls per client method"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = {}
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return method(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def docs_kb():
+    client = QdrantClient(":memory:")
+    client.create_collection("tech_docs_vectors", vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+    client.upsert("tech_docs_vectors", [
+        # Ingested before previews existed: full text only
+        PointStruct(id=1, vector=[1, 0, 0, 0], payload={"content": "Docker guide " + "x" * 5000, "title": "Docker"})
+    ])
+    kb = KnowledgeBaseManager(client=CountingClient(client), embedder=None)
+    kb.cache = None
+    return kb
+
+
+def test_legacy_point_preview_fetched_once_and_written_back(docs_kb):
+    first = docs_kb.search_tech_docs("Docker")
+    assert len(first[0].content) == PREVIEW_CHARS
+    assert docs_kb.client.calls["retrieve"] == 1
+
+    stored = docs_kb.client.client.retrieve("tech_docs_vectors", [1], with_payload=[PREVIEW_FIELD])[0]
+    assert len(stored.payload[PREVIEW_FIELD]) == PREVIEW_CHARS
+
+    second = docs_kb.search_tech_docs("Docker")
+    assert second[0].content == first[0].content
+    assert docs_kb.client.calls["retrieve"] == 1  # Preview now comes with the projection
+
+
+def test_text_indexes_created_on_first_text_search(docs_kb):
+    docs_kb.search_tech_docs("Docker")
+    docs_kb.search_tech_docs("guide")
+    assert docs_kb.client.calls["create_payload_index"] == 2  # content + title, once
+
+
+@pytest.fixture
+def emails_kb():
+    embedder = EmbeddingService(HashEmbeddingProvider(dim=16))
+    client = QdrantClient(":memory:")
+    client.create_collection("email_history", vectors_config=VectorParams(size=16, distance=Distance.COSINE))
+    emails = [
+        (1, "invoice for the espresso machine", "t1"),
+        (2, "re: invoice for the espresso machine", "t1"),
+        (3, "invoice reminder espresso", None),  # Imported without a thread
+    ]
+    client.upsert("email_history", [
+        PointStruct(
+            id=point_id,
+            vector=embedder.embed_one(text).tolist(),
+            payload={"content": text, PREVIEW_FIELD: text, "subject": text, **({"thread_id": thread} if thread else {})}
+        )
+        for point_id, text, thread in emails
+    ])
+    kb = KnowledgeBaseManager(client=client, embedder=embedder)
+    kb.reranker = None
+    kb.cache = None
+    return kb
+
+
+def test_collapsed_email_search_keeps_emails_without_thread(emails_kb):
+    results = emails_kb.search_emails("invoice espresso")
+    by_id = {r.point_id: r for r in results}
+    assert len(results) == 2 and 3 in by_id
+    assert by_id[3].metadata["group_hits"] == 1
+    assert sum(r.metadata["group_hits"] for r in results) == 3
@@ -0,0 +1,19 @@
+from core.keyword_router import KeywordRouter, get_keyword_router
+
+
+def test_word_boundaries_and_prefixes():
+    router = KeywordRouter({"pr": ["dev"], "project": ["projects"], "data": ["data"], "database": ["data"],
+                            "pull request": ["dev"], "request": ["support"]})
+
+    assert router.matched_keywords("Review PR #42") == ["pr"]
+    assert router.matched_keywords("project status") == ["project"]
+    assert router.matched_keywords("database backup") == ["data", "database"]
+    assert router.matched_keywords("metadata") == []
+    assert sorted(router.find("open pull requests")) == [("pull request", 5), ("request", 10)]
+
+
+def test_routing_rules():
+    router = get_keyword_router()
+    assert [d.value for d in router.domains("Show me emails about Qdrant")] == ["communications", "data"]
+    assert router.domain_counts("calendar today").most_common(1)[0][0].value == "personal"
+    assert router.domains("Kolik faktur přišlo v prosinci?") == []
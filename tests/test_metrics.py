@@ -0,0 +1,10 @@
+from core.metrics import percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [5, 1, 4, 2, 3, 10, 9, 8, 7, 6]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile(values, 10) == 1
+    assert percentile(values, 0) == 1
+    assert percentile([], 99) == 0.0
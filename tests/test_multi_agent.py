@@ -0,0 +1,68 @@
+"""Multi-agent strategies: how long a multi-domain query waits"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import lucy_orchestrator as orchestrator
+from core import deadline
+from core.multi_agent import ALL, FIRST_CONFIDENT, QUORUM, MultiAgentCollector
+
+AGENTS = ["personal", "projects"]
+
+
+def answer(agent, confidence=0.9):
+    return {"response": f"{agent} answer", "agent": agent, "confidence": confidence, "sources": []}
+
+
+def fake_assistants(monkeypatch, delays):
+    async def query_assistant(agent, query, context):
+        await asyncio.sleep(delays[agent])
+        return answer(agent)
+
+    monkeypatch.setattr(orchestrator, "query_assistant", query_assistant)
+
+
+def test_first_confident_stops_at_first_confident_answer():
+    collector = MultiAgentCollector(FIRST_CONFIDENT, AGENTS)
+    collector.add("personal", answer("personal", confidence=0.3))
+    assert not collector.enough()
+    collector.add("projects", answer("projects"))
+    assert collector.enough()
+
+
+def test_single_agent_always_waits_for_all():
+    assert MultiAgentCollector(QUORUM, ["personal"]).strategy == ALL
+
+
+def test_quorum_with_nothing_yet_waits_for_first_answer():
+    collector = MultiAgentCollector(QUORUM, AGENTS, quorum_seconds=0.0)
+    assert collector.timeout() is None and not collector.enough()
+    collector.add("projects", answer("projects"))
+    assert collector.enough() and collector.late() == ["personal"]
+
+
+def test_quorum_answers_after_window_when_first_result_is_late(monkeypatch):
+    fake_assistants(monkeypatch, {"personal": 0.2, "projects": 2.0})
+    monkeypatch.setattr(orchestrator, "EVALUATION_RESERVE_SECONDS", 0.5)
+
+    async def scenario():
+        # Budget smaller than the reserve: quorum window is 0
+        with deadline.scope(400):
+            return await orchestrator.query_multi_agents(AGENTS, "q", None, QUORUM)
+
+    merged = asyncio.run(scenario())
+    assert merged["agents_used"] == ["personal"] and merged["late_agents"] == ["projects"]
+
+
+def test_quorum_without_any_answer_in_deadline_is_504(monkeypatch):
+    fake_assistants(monkeypatch, {"personal": 1.0, "projects": 1.0})
+
+    async def scenario():
+        with deadline.scope(200):
+            return await orchestrator.query_multi_agents(AGENTS, "q", None, QUORUM)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 504
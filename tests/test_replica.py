@@ -0,0 +1,52 @@
+"""Incremental replica sync"""
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from knowledge.replica import LocalReplica
+
+COLLECTION = "tech_docs_vectors"
+PAYLOAD_KEYS = ["preview", "title", "tool"]
+FIELD_KEYS = ["title", "tool"]
+
+
+def point(point_id, title, version=None):
+    payload = {"preview": f"{title} text", "title": title, "tool": "docker"}
+    if version is not None:
+        payload["version"] = version
+    return PointStruct(id=point_id, vector=[1.0, float(point_id), 0.0, 0.5], payload=payload)
+
+
+def sync(replica, remote):
+    return replica.sync(remote, COLLECTION, payload_keys=PAYLOAD_KEYS, field_keys=FIELD_KEYS)
+
+
+def test_sync_picks_up_batches_stamped_before_the_previous_sync(tmp_path):
+    remote = QdrantClient(":memory:")
+    remote.create_collection(COLLECTION, vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+    replica = LocalReplica(str(tmp_path))
+
+    remote.upsert(COLLECTION, [point(1, "first", version=2_000_000), point(2, "second", version=2_000_100)])
+    assert sync(replica, remote)["upserted"] == 2
+
+    # Batch of the same run, stamped earlier but stored after that sync
+    remote.upsert(COLLECTION, [point(3, "late", version=2_000_050)])
+    stats = sync(replica, remote)
+    assert stats["upserted"] == 1 and stats["unchanged"] == 2
+    assert stats["points"] == 3
+
+
+def test_unversioned_points_are_rechecked(tmp_path):
+    remote = QdrantClient(":memory:")
+    remote.create_collection(COLLECTION, vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+    replica = LocalReplica(str(tmp_path))
+
+    remote.upsert(COLLECTION, [point(1, "legacy"), point(2, "ingested", version=5_000_000)])
+    sync(replica, remote)
+
+    assert sync(replica, remote)["upserted"] == 0
+
+    remote.upsert(COLLECTION, [point(1, "legacy edited")])
+    assert sync(replica, remote)["upserted"] == 1
+    record = replica.collection(COLLECTION).retrieve([1], with_payload=True)[0]
+    assert record.payload["title"] == "legacy edited"
@@ -0,0 +1,17 @@
+from knowledge.reranker import LexicalReranker, RerankStage
+
+
+def test_lexical_stage_stays_off_without_fitted_weights(monkeypatch, tmp_path):
+    monkeypatch.delenv("LUCY_RERANKER", raising=False)
+    monkeypatch.delenv("LUCY_RERANK_WEIGHTS", raising=False)
+    assert RerankStage.from_env() is None
+
+    path = tmp_path / "weights.json"
+    weights = {"coverage": 0.5, "idf_coverage": 1.0, "title": 0.0, "phrase": 0.2,
+               "proximity": 0.1, "retrieval": 2.0, "bias": -1.0}
+    LexicalReranker(weights).save(str(path))
+    monkeypatch.setenv("LUCY_RERANK_WEIGHTS", str(path))
+
+    stage = RerankStage.from_env()
+    assert stage is not None
+    assert stage.reranker.weights == weights
@@ -0,0 +1,15 @@
+from core.response_cache import ResponseCache
+
+
+def test_invalidation_during_the_pipeline_makes_the_entry_stale():
+    cache = ResponseCache(enabled=True)
+    key = cache.key("co mám dnes v plánu", None, None, None)
+
+    versions = cache.snapshot()                  # Request starts
+    cache.invalidate_domains(["personal"])       # Memory changes mid-pipeline
+    cache.put(key, {"response": "old agenda"}, ["personal"], 120.0, versions)
+    assert cache.get(key) is None
+
+    versions = cache.snapshot()
+    cache.put(key, {"response": "new agenda"}, ["personal"], 120.0, versions)
+    assert cache.get(key)["response"] == {"response": "new agenda"}
@@ -0,0 +1,37 @@
+"""route_query falls back to keyword routing when semantic routing fails or is slow"""
+
+import asyncio
+import time
+
+import lucy_orchestrator as orchestrator
+from core import deadline
+
+
+class FailingRouter:
+    def route(self, query):
+        raise RuntimeError("embedding provider down")
+
+
+class SlowRouter:
+    def route(self, query):
+        time.sleep(1.0)
+        raise AssertionError("should have been abandoned")
+
+
+def test_failing_semantic_router_falls_back_to_keywords(monkeypatch):
+    monkeypatch.setattr(orchestrator, "get_semantic_router", lambda block=True: FailingRouter())
+    assert asyncio.run(orchestrator.route_query("calendar today", {})) == ["personal"]
+
+
+def test_semantic_routing_bounded_by_deadline(monkeypatch):
+    monkeypatch.setattr(orchestrator, "get_semantic_router", lambda block=True: SlowRouter())
+
+    async def routed():
+        started = time.monotonic()
+        with deadline.scope(200):
+            agents = await orchestrator.route_query("calendar today", {})
+        return agents, time.monotonic() - started
+
+    agents, elapsed = asyncio.run(routed())
+    assert agents == ["personal"]
+    assert elapsed < 0.8
@@ -0,0 +1,57 @@
+from knowledge.search_cache import SearchCache
+
+
+def test_version_lookups_stay_in_memory_until_another_process_bumps(tmp_path):
+    writer = SearchCache(cache_dir=str(tmp_path))
+    reader = SearchCache(cache_dir=str(tmp_path))
+    assert reader.version("email_history") == 0
+
+    connects = []
+    connect = reader._connect
+    reader._connect = lambda: connects.append(1) or connect()
+
+    for _ in range(100):
+        reader.make_key("email_history", "invoice", {})
+    assert connects == []
+
+    writer.bump_version("email_history")
+    assert reader.version("email_history") == 1
+    assert reader.version("email_history") == 1
+    assert len(connects) == 1
+
+    writer.bump_version("email_history")
+    writer.bump_version("tech_docs_vectors")
+    assert reader.version("email_history") == 2
+    assert reader.version("tech_docs_vectors") == 1
+
+
+def test_hits_are_private_copies(tmp_path):
+    for cache in (SearchCache(), SearchCache(cache_dir=str(tmp_path))):
+        key = cache.make_key("email_history", "invoice", {})
+        cache.put(key, [{"content": "x", "metadata": {"participants": ["jana"]}}])
+
+        first = cache.get(key)
+        first[0]["metadata"]["participants"].append("petra")
+        first[0]["metadata"]["subject"] = "changed"
+
+        assert cache.get(key) == [{"content": "x", "metadata": {"participants": ["jana"]}}]
+
+
+def test_stamp_is_replaced_not_grown(tmp_path):
+    cache = SearchCache(cache_dir=str(tmp_path))
+    for _ in range(50):
+        cache.bump_version("email_history")
+
+    stamp = tmp_path / "kb_search_cache.versions"
+    assert stamp.read_text() == "email_history 50\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["kb_search_cache.sqlite", "kb_search_cache.versions"]
+
+
+def test_results_of_a_search_overtaken_by_ingest_are_not_cached(tmp_path):
+    cache = SearchCache(cache_dir=str(tmp_path))
+    key = cache.make_key("email_history", "invoice", {})  # Search starts
+    cache.bump_version("email_history")                     # Ingest finishes mid-search
+    cache.put(key, [{"content": "old"}])
+
+    assert cache.get(key) is None
+    assert cache.get(cache.make_key("email_history", "invoice", {})) is None
@@ -0,0 +1,111 @@
+"""Single-flight coalescing and cancellation"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import lucy_orchestrator as orchestrator
+from core.circuit_breaker import CircuitBreaker
+from core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    async def scenario():
+        flight = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+        return results, runs, flight.stats()
+
+    results, runs, stats = asyncio.run(scenario())
+    assert results == ["answer"] * 3
+    assert len(runs) == 1 and stats["coalesced"] == 2 and stats["in_flight"] == 0
+
+
+def test_one_waiter_leaving_keeps_the_shared_task():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.1)
+            return "answer"
+
+        leaving = asyncio.create_task(flight.do("key", work))
+        staying = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying, leaving.cancelled(), flight.stats()
+
+    result, cancelled, stats = asyncio.run(scenario())
+    assert result == "answer" and cancelled and stats["cancelled"] == 0
+
+
+def test_last_waiter_leaving_cancels_the_shared_task():
+    async def scenario():
+        flight = SingleFlight()
+        finished = []
+
+        async def work():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                finished.append("cancelled")
+                raise
+
+        caller = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0)
+        return finished, flight.stats()
+
+    finished, stats = asyncio.run(scenario())
+    assert finished == ["cancelled"] and stats["cancelled"] == 1 and stats["in_flight"] == 0
+
+
+def test_query_options_are_part_of_the_flight_key(monkeypatch):
+    runs = []
+
+    async def run_query(request, cache_key, versions, started):
+        runs.append(request.evaluation)
+        await asyncio.sleep(0.05)
+        return request.evaluation
+
+    monkeypatch.setattr(orchestrator, "run_query", run_query)
+    monkeypatch.setattr(orchestrator, "cancel_on_disconnect", lambda request, awaitable: awaitable)
+
+    async def scenario():
+        requests = [
+            orchestrator.QueryRequest(query="calendar today", cache=False, evaluation=mode)
+            for mode in ("sync", "async", "sync")
+        ]
+        return await asyncio.gather(*(orchestrator.query(r, None) for r in requests))
+
+    assert asyncio.run(scenario()) == ["sync", "async", "sync"]
+    assert sorted(runs) == ["async", "sync"]
+
+
+def test_cancelled_evaluation_is_not_swallowed(monkeypatch):
+    async def slow_evaluator(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={})
+
+    monkeypatch.setitem(orchestrator.breakers, "evaluator", CircuitBreaker("evaluator"))
+
+    async def scenario():
+        orchestrator.http_pool._clients["evaluator"] = httpx.AsyncClient(
+            base_url="http://evaluator", transport=httpx.MockTransport(slow_evaluator)
+        )
+        task = asyncio.create_task(orchestrator.evaluate_response("q", {"response": "a", "agent": "personal"}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
@@ -0,0 +1,50 @@
+"""Streaming to an assistant without /query/stream uses one breaker probe per call"""
+
+import asyncio
+
+import httpx
+
+import lucy_orchestrator as orchestrator
+from core.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker("personal", min_calls=100, consecutive=2, open_seconds=0, half_open_calls=1)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False, 10.0)
+    return breaker
+
+
+def run_stream(monkeypatch, query_status):
+    def handler(request):
+        if request.url.path == "/query/stream":
+            return httpx.Response(404)
+        return httpx.Response(query_status, json={"response": "from /query"})
+
+    monkeypatch.setitem(orchestrator.http_pool._clients, "personal", httpx.AsyncClient(
+        base_url="http://personal", transport=httpx.MockTransport(handler)
+    ))
+    breaker = half_open_breaker()
+    monkeypatch.setitem(orchestrator.breakers, "personal", breaker)
+
+    async def run():
+        queue = asyncio.Queue()
+        await orchestrator.stream_assistant("personal", "agenda", None, queue)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    return breaker, asyncio.run(run())
+
+
+def test_fallback_success_closes_the_half_open_circuit(monkeypatch):
+    breaker, events = run_stream(monkeypatch, 200)
+    assert events[-1][0] == "assistant_done"
+    assert events[-1][1]["response"] == "from /query"
+    assert breaker.state == CLOSED
+
+
+def test_failed_fallback_is_the_probe_outcome(monkeypatch):
+    breaker, events = run_stream(monkeypatch, 500)
+    assert events[-1][0] == "assistant_error"
+    assert breaker.state == OPEN  # The 404 did not count as a successful probe
+    assert breaker.opened == 2
@@ -0,0 +1,48 @@
+"""Span export: rotation, partial lines, critical path"""
+
+import json
+
+from core import tracing
+from core.tracing import JsonlExporter, Span
+
+
+def make_span(n, trace_id="a" * 32, parent_id=None, start=0.0, duration_ms=10.0):
+    return Span(
+        trace_id=trace_id, span_id=f"{n:016x}", parent_id=parent_id, name=f"span {n}",
+        service="test", start=start, duration_ms=duration_ms
+    )
+
+
+def test_exporter_writes_in_background_and_rotates(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonlExporter(str(path), max_bytes=2000)
+    for n in range(40):
+        exporter.export(make_span(n))
+    exporter.flush()
+
+    assert exporter.exported == 40
+    assert (tmp_path / "spans.jsonl.1").exists()
+    assert len(list(tmp_path.iterdir())) <= 1 + tracing.TRACE_BACKUPS
+
+
+def test_exporter_without_path_keeps_spans_in_memory(tmp_path):
+    exporter = JsonlExporter(None)
+    exporter.export(make_span(1))
+    assert len(exporter.recent) == 1 and exporter.exported == 0
+
+
+def test_partial_lines_are_skipped(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    root = make_span(1, duration_ms=100.0)
+    child = make_span(2, parent_id=root.span_id, start=0.01, duration_ms=50.0)
+    with open(path, "w") as f:
+        for span in (root, child):
+            f.write(json.dumps(span.__dict__) + "\n")
+        f.write('{"trace_id": "' + "a" * 32 + '", "span_id": "00')  # Writer mid-append
+
+    spans = tracing.load_trace("a" * 32, [str(path)])
+    assert [s["name"] for s in spans] == ["span 1", "span 2"]
+    assert len(tracing.read_spans([str(path)], 100)) == 2
+
+    path_names = [step["name"] for step in tracing.critical_path(spans)]
+    assert path_names == ["span 1", "span 2"]
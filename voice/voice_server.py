@@ -16,12 +16,21 @@ import os
 import io
 from elevenlabs import generate, set_api_key, Voice, VoiceSettings
 
+from core import deadline, tracing
+from core.deadline import DeadlineMiddleware
+from core.tracing import TracingMiddleware
+
 app = FastAPI(title="Lucy Voice Interface")
 
+# Voice budget covers STT + orchestrator + TTS (LUCY_DEADLINE_VOICE_MS)
+app.add_middleware(DeadlineMiddleware, budgets={"/voice": deadline.BUDGETS_MS["voice"]})
+app.add_middleware(TracingMiddleware, service="voice")
+
 # Configuration
 ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "http://lucy-orchestrator:8080")
 USE_ELEVENLABS = os.getenv("USE_ELEVENLABS", "true").lower() == "true"
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+TTS_RESERVE_SECONDS = 1.5  # Budget kept back for speaking the answer
 
 # Initialize ElevenLabs if enabled
 if USE_ELEVENLABS and ELEVENLABS_API_KEY:
@@ -81,46 +90,55 @@ async def voice_query(audio: UploadFile = File(...)):
     
     audio_data = speech.RecognitionAudio(content=audio_content)
     
-    response = speech_client.recognize(
-        config=speech_config,
-        audio=audio_data
-    )
+    with tracing.span("stt", engine="google"):
+        response = speech_client.recognize(
+            config=speech_config,
+            audio=audio_data
+        )
     
     if not response.results:
         return {"error": "No speech detected"}
     
     transcript = response.results[0].alternatives[0].transcript
     
-    # 2. Process query via orchestrator
-    async with httpx.AsyncClient() as client:
-        query_response = await client.post(
-            f"{ORCHESTRATOR_URL}/query",
-            json={"query": transcript},
-            timeout=60.0
-        )
-        result = query_response.json()
+    # 2. Process query via orchestrator (remaining budget travels in the header)
+    try:
+        with tracing.span("call orchestrator", kind="client"):
+            async with httpx.AsyncClient() as client:
+                query_response = await client.post(
+                    f"{ORCHESTRATOR_URL}/query",
+                    json={"query": transcript},
+                    headers={**deadline.headers(), **tracing.headers()},
+                    timeout=deadline.timeout(60.0, reserve=TTS_RESERVE_SECONDS)
+                )
+                result = query_response.json()
+    except (httpx.TimeoutException, deadline.DeadlineExceeded):
+        print("⚠️ Voice deadline reached - answering with apology")
+        result = {}
     
     # 3. Convert response to speech
     text_response = result.get("response", "Omlouvám se, nepodařilo se mi zpracovat dotaz.")
     
     # Use ElevenLabs if available, otherwise Google TTS
     if USE_ELEVENLABS and ELEVENLABS_API_KEY:
-        audio_content = generate(
-            text=text_response,
-            voice=Voice(
-                voice_id=ELEVENLABS_VOICE_ID,
-                settings=ELEVENLABS_VOICE_SETTINGS
-            ),
-            model="eleven_multilingual_v2"
-        )
+        with tracing.span("tts", engine="elevenlabs"):
+            audio_content = generate(
+                text=text_response,
+                voice=Voice(
+                    voice_id=ELEVENLABS_VOICE_ID,
+                    settings=ELEVENLABS_VOICE_SETTINGS
+                ),
+                model="eleven_multilingual_v2"
+            )
     else:
-        synthesis_input = texttospeech.SynthesisInput(text=text_response)
-        tts_response = tts_client.synthesize_speech(
-            input=synthesis_input,
-            voice=VOICE_CONFIG,
-            audio_config=AUDIO_CONFIG
-        )
-        audio_content = tts_response.audio_content
+        with tracing.span("tts", engine="google"):
+            synthesis_input = texttospeech.SynthesisInput(text=text_response)
+            tts_response = tts_client.synthesize_speech(
+                input=synthesis_input,
+                voice=VOICE_CONFIG,
+                audio_config=AUDIO_CONFIG
+            )
+            audio_content = tts_response.audio_content
     
     # 4. Return both text and audio
     return {